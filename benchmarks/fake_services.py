@@ -0,0 +1,258 @@
+"""
+Benchmark fake services - Local stand-ins for ImgBB, SerpAPI Google Lens, image hosts and OpenAI
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Dict, Any, Optional
+from aiohttp import web
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from instafacade.core.similarity import hamming_distance, open_image, perceptual_hash
+
+SERVICES = ("imgbb", "serpapi", "thumbnails", "openai")
+
+
+@dataclass
+class FaultProfile:
+    """Latency and error injection for one fake service"""
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 503
+
+
+class FakeServices:
+    """
+    Serves the four external dependencies of the analyzer from one local aiohttp app:
+    
+    - POST /imgbb/1/upload             ImgBB upload, the image is served back under /img/uploads/
+    - GET  /serpapi/search.json        Google Lens exact matches from the fixture manifest
+    - GET  /img/<path>                 Thumbnail and original image host
+    - POST /openai/v1/chat/completions GPT-4o stand-in that answers by perceptual-hash distance
+    
+    Runs on its own event loop thread so synchronous and asynchronous analyzers can use it.
+    """
+    
+    def __init__(self, fixture_dir: str, manifest: Dict[str, Any], seed: int = 7, match_distance: int = 10):
+        """
+        Args:
+            fixture_dir: Directory written by fixtures.build_corpus
+            manifest: The corpus manifest
+            seed: Seed for latency jitter and error injection
+            match_distance: Max pHash distance the fake model answers YES for
+        """
+        self.fixture_dir = os.path.abspath(fixture_dir)
+        self.match_distance = match_distance
+        self.faults: Dict[str, FaultProfile] = {service: FaultProfile() for service in SERVICES}
+        self.calls: Dict[str, int] = {service: 0 for service in SERVICES}
+        self.errors: Dict[str, int] = {service: 0 for service in SERVICES}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._uploads: Dict[str, bytes] = {}
+        self._cases_by_path = {case["original"]: case for case in manifest["cases"]}
+        self._cases_by_hash = {}
+        for case in manifest["cases"]:
+            with open(os.path.join(self.fixture_dir, case["original"]), "rb") as file:
+                self._cases_by_hash[hashlib.sha256(file.read()).hexdigest()] = case
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._runner: Optional[web.AppRunner] = None
+        self._thread: Optional[threading.Thread] = None
+        self.port = 0
+    
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+    
+    def environment(self) -> Dict[str, str]:
+        """Environment variables that point the analyzer at these fakes"""
+        return {
+            "OPENAI_API_KEY": "benchmark",
+            "IMGBB_API_KEY": "benchmark",
+            "SERPAPI_KEY": "benchmark",
+            "OPENAI_BASE_URL": f"{self.base_url}/openai/v1",
+            "INSTAFACADE_IMGBB_UPLOAD_URL": f"{self.base_url}/imgbb/1/upload",
+            "INSTAFACADE_SERPAPI_SEARCH_URL": f"{self.base_url}/serpapi/search.json"
+        }
+    
+    def image_url(self, relative_path: str) -> str:
+        """Public URL of a fixture image"""
+        return f"{self.base_url}/img/{relative_path}"
+    
+    def start(self):
+        """Start serving on a free local port"""
+        ready = threading.Event()
+        self._thread = threading.Thread(target=self._serve, args=(ready,), name="fake-services", daemon=True)
+        self._thread.start()
+        ready.wait()
+    
+    def stop(self):
+        """Shut the server down"""
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop = None
+    
+    def set_faults(self, **profiles: FaultProfile):
+        """Replace the fault profile of the named services; the others are reset to no faults"""
+        with self._lock:
+            self.faults = {service: profiles.get(service, FaultProfile()) for service in SERVICES}
+    
+    def reset_counters(self):
+        with self._lock:
+            self.calls = {service: 0 for service in SERVICES}
+            self.errors = {service: 0 for service in SERVICES}
+            self._uploads.clear()
+    
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        """Calls and injected errors per service so far"""
+        with self._lock:
+            return {"calls": dict(self.calls), "errors": dict(self.errors)}
+    
+    def _serve(self, ready: threading.Event):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_post("/imgbb/1/upload", self._imgbb_upload)
+        app.router.add_get("/serpapi/search.json", self._serpapi_search)
+        app.router.add_get("/img/{path:.+}", self._image)
+        app.router.add_post("/openai/v1/chat/completions", self._chat_completion)
+        
+        self._runner = web.AppRunner(app, access_log=None)
+        self._loop.run_until_complete(self._runner.setup())
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        self._loop.run_until_complete(site.start())
+        self.port = site._server.sockets[0].getsockname()[1]
+        ready.set()
+        self._loop.run_forever()
+    
+    async def _inject(self, service: str) -> Optional[web.Response]:
+        """Count the call, sleep for the configured latency and maybe return an injected error"""
+        with self._lock:
+            self.calls[service] += 1
+            profile = self.faults[service]
+            delay = max(0.0, profile.latency_ms + self._rng.uniform(-profile.jitter_ms, profile.jitter_ms)) / 1000
+            failed = self._rng.random() < profile.error_rate
+            if failed:
+                self.errors[service] += 1
+        if delay:
+            await asyncio.sleep(delay)
+        if failed:
+            headers = {"Retry-After": "0"} if profile.error_status == 429 else {}
+            return web.json_response({"error": f"injected {profile.error_status}"}, status=profile.error_status, headers=headers)
+        return None
+    
+    async def _imgbb_upload(self, request: web.Request) -> web.Response:
+        injected = await self._inject("imgbb")
+        if injected is not None:
+            return injected
+        
+        form = await request.post()
+        image_bytes = base64.b64decode(form["image"])
+        upload_id = uuid.uuid4().hex
+        with self._lock:
+            self._uploads[upload_id] = image_bytes
+        return web.json_response({"data": {"url": self.image_url(f"uploads/{upload_id}.jpg")}, "success": True, "status": 200})
+    
+    async def _serpapi_search(self, request: web.Request) -> web.Response:
+        injected = await self._inject("serpapi")
+        if injected is not None:
+            return injected
+        
+        case = self._case_for_url(request.query.get("url", ""))
+        if case is None or not case["matches"]:
+            return web.json_response({"error": "Google Lens hasn't returned any results for this query."})
+        return web.json_response({
+            "search_metadata": {"status": "Success"},
+            "exact_matches": [
+                {
+                    "position": position,
+                    "title": match["title"],
+                    "source": match["source"],
+                    "link": f"https://{match['source']}/{case['name']}",
+                    "thumbnail": self.image_url(match["path"])
+                }
+                for position, match in enumerate(case["matches"], 1)
+            ]
+        })
+    
+    async def _image(self, request: web.Request) -> web.Response:
+        injected = await self._inject("thumbnails")
+        if injected is not None:
+            return injected
+        
+        path = request.match_info["path"]
+        if path.startswith("uploads/"):
+            data = self._uploads.get(os.path.splitext(os.path.basename(path))[0])
+        else:
+            full_path = os.path.abspath(os.path.join(self.fixture_dir, path))
+            data = None
+            if full_path.startswith(self.fixture_dir) and os.path.isfile(full_path):
+                with open(full_path, "rb") as file:
+                    data = file.read()
+        if data is None:
+            return web.Response(status=404, text="not found")
+        return web.Response(body=data, content_type="image/jpeg")
+    
+    async def _chat_completion(self, request: web.Request) -> web.Response:
+        injected = await self._inject("openai")
+        if injected is not None:
+            return injected
+        
+        try:
+            body = await request.json()
+        except ConnectionResetError:
+            # The analyzer cancels comparisons still in flight once another candidate says YES
+            return web.Response(status=499)
+        images = [
+            part["image_url"]["url"]
+            for message in body["messages"] if isinstance(message.get("content"), list)
+            for part in message["content"] if part.get("type") == "image_url"
+        ]
+        # Hashing is CPU work; keep it off the loop that serves every other fake
+        verdicts = await asyncio.to_thread(self._verdicts, images)
+        
+        if body.get("response_format", {}).get("type") == "json_object":
+            content = json.dumps({"results": [{"candidate": i, "verdict": v} for i, v in enumerate(verdicts, 1)]})
+        else:
+            content = verdicts[0] if verdicts else "NO"
+        
+        return web.json_response({
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "gpt-4o"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 85 * len(images), "completion_tokens": 5, "total_tokens": 85 * len(images) + 5}
+        })
+    
+    def _verdicts(self, data_urls: list) -> list:
+        """YES for every candidate whose pHash is close to the first (story) image"""
+        hashes = [perceptual_hash(open_image(base64.b64decode(url.split(",", 1)[1]))) for url in data_urls]
+        if not hashes:
+            return []
+        return ["YES" if hamming_distance(hashes[0], other) <= self.match_distance else "NO" for other in hashes[1:]]
+    
+    def _case_for_url(self, url: str) -> Optional[Dict[str, Any]]:
+        """Map a searched image URL (fixture original or ImgBB upload) back to its corpus case"""
+        marker = "/img/"
+        if marker not in url:
+            return None
+        path = url.split(marker, 1)[1].split("?", 1)[0]
+        if path.startswith("uploads/"):
+            data = self._uploads.get(os.path.splitext(os.path.basename(path))[0])
+            return self._cases_by_hash.get(hashlib.sha256(data).hexdigest()) if data else None
+        return self._cases_by_path.get(path)
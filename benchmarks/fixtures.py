@@ -0,0 +1,122 @@
+"""
+Benchmark fixtures - Deterministic image corpus with known verdicts
+"""
+
+import io
+import json
+import os
+import random
+from typing import Dict, Any, List
+from PIL import Image, ImageDraw, ImageEnhance
+
+CORPUS_VERSION = 1
+
+
+def _random_scene(rng: random.Random, size: tuple) -> Image.Image:
+    """A photo-like synthetic scene: gradient sky, ground and a handful of shapes"""
+    width, height = size
+    image = Image.new("RGB", size)
+    draw = ImageDraw.Draw(image)
+    
+    top = tuple(rng.randrange(256) for _ in range(3))
+    bottom = tuple(rng.randrange(256) for _ in range(3))
+    for y in range(height):
+        mix = y / height
+        draw.line([(0, y), (width, y)], fill=tuple(int(a + (b - a) * mix) for a, b in zip(top, bottom)))
+    
+    for _ in range(rng.randint(6, 14)):
+        x0, y0 = rng.randrange(width), rng.randrange(height)
+        x1, y1 = x0 + rng.randint(20, width // 2), y0 + rng.randint(20, height // 2)
+        colour = tuple(rng.randrange(256) for _ in range(3))
+        if rng.random() < 0.5:
+            draw.ellipse([x0, y0, x1, y1], fill=colour)
+        else:
+            draw.rectangle([x0, y0, x1, y1], fill=colour)
+    return image
+
+
+def _copied_variant(rng: random.Random, original: Image.Image) -> Image.Image:
+    """What a reposted copy looks like: resized, slightly cropped and brightened"""
+    width, height = original.size
+    crop = rng.randint(0, width // 40)
+    variant = original.crop((crop, crop, width - crop, height - crop))
+    variant = variant.resize((width // 2, height // 2), Image.LANCZOS)
+    return ImageEnhance.Brightness(variant).enhance(rng.uniform(0.95, 1.08))
+
+
+def _jpeg(image: Image.Image, quality: int) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality)
+    return buffer.getvalue()
+
+
+def build_corpus(directory: str, cases: int = 24, seed: int = 7) -> Dict[str, Any]:
+    """
+    Generate the fixture corpus (or reuse it if an identical one already exists)
+    
+    Every case is an original story image plus the Lens matches the fake SerpAPI returns
+    for it. Roughly half the cases are "stolen" (one match is a resized copy of the
+    original), a third are "genuine" (only unrelated matches) and the rest have no
+    matches at all.
+    
+    Args:
+        directory: Where images and manifest.json are written
+        cases: Number of original images
+        seed: Random seed; the same seed always produces the same corpus
+    
+    Returns:
+        The manifest: {"cases": [{"name", "kind", "original", "matches", "expected"}]}
+    """
+    manifest_path = os.path.join(directory, "manifest.json")
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as file:
+            manifest = json.load(file)
+        if manifest.get("version") == CORPUS_VERSION and manifest.get("seed") == seed and len(manifest["cases"]) == cases:
+            return manifest
+    
+    rng = random.Random(seed)
+    os.makedirs(os.path.join(directory, "originals"), exist_ok=True)
+    os.makedirs(os.path.join(directory, "matches"), exist_ok=True)
+    
+    def write(relative_path: str, data: bytes) -> str:
+        with open(os.path.join(directory, relative_path), "wb") as file:
+            file.write(data)
+        return relative_path
+    
+    manifest_cases: List[Dict[str, Any]] = []
+    for number in range(cases):
+        name = f"case{number:03d}"
+        roll = number % 6
+        kind = "stolen" if roll < 3 else "genuine" if roll < 5 else "no_matches"
+        
+        original = _random_scene(rng, (640, 480))
+        original_path = write(f"originals/{name}.jpg", _jpeg(original, 90))
+        
+        matches = []
+        if kind != "no_matches":
+            match_count = rng.randint(3, 6)
+            copy_position = rng.randrange(match_count) if kind == "stolen" else -1
+            for position in range(match_count):
+                if position == copy_position:
+                    image = _copied_variant(rng, original)
+                else:
+                    image = _random_scene(rng, (320, 240))
+                matches.append({
+                    "title": f"{name} match {position + 1}",
+                    "source": f"example{position}.com",
+                    "path": write(f"matches/{name}_{position + 1}.jpg", _jpeg(image, rng.randint(60, 85))),
+                    "is_copy": position == copy_position
+                })
+        
+        manifest_cases.append({
+            "name": name,
+            "kind": kind,
+            "original": original_path,
+            "matches": matches,
+            "expected": kind == "stolen"
+        })
+    
+    manifest = {"version": CORPUS_VERSION, "seed": seed, "cases": manifest_cases}
+    with open(manifest_path, "w", encoding="utf-8") as file:
+        json.dump(manifest, file, indent=2)
+    return manifest
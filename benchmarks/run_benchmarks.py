@@ -0,0 +1,291 @@
+"""
+InstaFacade - Offline Benchmark Suite
+Runs analyze_image over a fixture corpus against local fakes of ImgBB, SerpAPI, the image
+hosts and OpenAI, and reports throughput, latency percentiles and API call counts per scenario
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCHMARK_DIR), "src"))
+sys.path.insert(0, BENCHMARK_DIR)
+
+from fake_services import SERVICES, FakeServices, FaultProfile
+from fixtures import build_corpus
+from instafacade.core.analyzer import InstaFacadeAnalyzer
+from instafacade.core.async_analyzer import AsyncInstaFacadeAnalyzer
+from instafacade.core.rate_limiter import RateLimiter
+from instafacade.utils.logging_config import LOG_MODES, configure_logging
+
+# Latency of the real services, roughly; scaled by --time-scale
+BASE_FAULTS = {
+    "imgbb": FaultProfile(latency_ms=400, jitter_ms=100),
+    "serpapi": FaultProfile(latency_ms=1500, jitter_ms=400),
+    "thumbnails": FaultProfile(latency_ms=80, jitter_ms=40),
+    "openai": FaultProfile(latency_ms=1200, jitter_ms=300)
+}
+
+NO_CACHES = {"INSTAFACADE_RESULT_CACHE": "false", "INSTAFACADE_LENS_CACHE": "false"}
+
+
+@dataclass
+class Scenario:
+    """One benchmark configuration"""
+    name: str
+    description: str
+    env: Dict[str, str] = field(default_factory=dict)
+    faults: Dict[str, FaultProfile] = field(default_factory=dict)
+    analyzer: str = "sync"
+    inputs: str = "url"
+    warm: bool = False
+
+
+SCENARIOS = [
+    Scenario("pairwise", "One GPT-4o request per candidate, no pre-filter, no caches",
+             env={"INSTAFACADE_LOCAL_PREFILTER": "false", **NO_CACHES}),
+    Scenario("default", "Repository defaults, cold caches"),
+    Scenario("batched", "Up to 3 candidates per GPT-4o request, no pre-filter",
+             env={"INSTAFACADE_COMPARISON_BATCH_SIZE": "3", "INSTAFACADE_LOCAL_PREFILTER": "false", **NO_CACHES}),
+    Scenario("upload", "Local files, so every image goes through the ImgBB upload", inputs="file", env=NO_CACHES),
+    Scenario("warm-cache", "Second pass over the corpus with the caches filled by the first", warm=True),
+    Scenario("async", "AsyncInstaFacadeAnalyzer with repository defaults, cold caches", analyzer="async"),
+    Scenario("slow-openai", "GPT-4o answering four times slower than usual", env=NO_CACHES,
+             faults={"openai": FaultProfile(latency_ms=4800, jitter_ms=1200)}),
+    Scenario("flaky", "10% injected 503s on every service", env=NO_CACHES,
+             faults={service: FaultProfile(BASE_FAULTS[service].latency_ms, BASE_FAULTS[service].jitter_ms, 0.1) for service in SERVICES})
+]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+@contextlib.contextmanager
+def patched_environ(values: Dict[str, str]):
+    """Temporarily set environment variables"""
+    previous = {key: os.environ.get(key) for key in values}
+    os.environ.update(values)
+    try:
+        yield
+    finally:
+        for key, value in previous.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+def scaled(profile: FaultProfile, scale: float) -> FaultProfile:
+    return FaultProfile(profile.latency_ms * scale, profile.jitter_ms * scale, profile.error_rate, profile.error_status)
+
+
+class BenchmarkRunner:
+    """Runs scenarios against a FakeServices instance and collects their measurements"""
+    
+    def __init__(self, services: FakeServices, manifest: Dict[str, Any], fixture_dir: str, concurrency: int,
+                 time_scale: float, rate_limits: bool):
+        self.services = services
+        self.manifest = manifest
+        self.fixture_dir = fixture_dir
+        self.concurrency = concurrency
+        self.time_scale = time_scale
+        self.rate_limits = rate_limits
+    
+    def run(self, scenario: Scenario) -> Dict[str, Any]:
+        """Run one scenario and return its report"""
+        cache_dir = tempfile.mkdtemp(prefix="instafacade-bench-")
+        env = {**self.services.environment(), "INSTAFACADE_CACHE_PATH": os.path.join(cache_dir, "cache.sqlite3")}
+        if not self.rate_limits:
+            # Provider limits would dominate every number; measure the pipeline itself
+            env.update({f"INSTAFACADE_{service.upper()}_RPS": "0" for service in ("imgbb", "serpapi", "openai")})
+        env.update(scenario.env)
+        
+        cases = self.manifest["cases"]
+        inputs = [
+            self.services.image_url(case["original"]) if scenario.inputs == "url"
+            else os.path.join(self.fixture_dir, case["original"])
+            for case in cases
+        ]
+        faults = {**BASE_FAULTS, **scenario.faults}
+        self.services.set_faults(**{service: scaled(profile, self.time_scale) for service, profile in faults.items()})
+        
+        with patched_environ(env):
+            if scenario.analyzer == "async":
+                records, elapsed = asyncio.run(self._run_async(scenario, inputs))
+            else:
+                records, elapsed = self._run_sync(scenario, inputs)
+        
+        return self._report(scenario, cases, records, elapsed)
+    
+    def _run_sync(self, scenario: Scenario, inputs: List[str]):
+        analyzer = InstaFacadeAnalyzer()
+        analyzer.rate_limiter = RateLimiter.from_env()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            if scenario.warm:
+                list(executor.map(lambda image: self._measure(analyzer.analyze_image, image), inputs))
+            self.services.reset_counters()
+            started = time.perf_counter()
+            records = list(executor.map(lambda image: self._measure(analyzer.analyze_image, image), inputs))
+            return records, time.perf_counter() - started
+    
+    async def _run_async(self, scenario: Scenario, inputs: List[str]):
+        async with AsyncInstaFacadeAnalyzer() as analyzer:
+            analyzer.rate_limiter = RateLimiter.from_env()
+            semaphore = asyncio.Semaphore(self.concurrency)
+            
+            async def measure(image: str) -> Dict[str, Any]:
+                async with semaphore:
+                    started = time.perf_counter()
+                    try:
+                        return self._record(await analyzer.analyze_image(image), None, started)
+                    except Exception as e:
+                        return self._record(None, e, started)
+            
+            if scenario.warm:
+                await asyncio.gather(*(measure(image) for image in inputs))
+            self.services.reset_counters()
+            started = time.perf_counter()
+            records = await asyncio.gather(*(measure(image) for image in inputs))
+            return records, time.perf_counter() - started
+    
+    def _measure(self, analyze, image: str) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            return self._record(analyze(image), None, started)
+        except Exception as e:
+            return self._record(None, e, started)
+    
+    def _record(self, result: Optional[Dict[str, Any]], error: Optional[Exception], started: float) -> Dict[str, Any]:
+        return {"latency_ms": (time.perf_counter() - started) * 1000, "result": result, "error": str(error) if error else None}
+    
+    def _report(self, scenario: Scenario, cases: list, records: list, elapsed: float) -> Dict[str, Any]:
+        latencies = [record["latency_ms"] for record in records]
+        succeeded = [(case, record["result"]) for case, record in zip(cases, records) if record["result"] is not None]
+        correct = sum(1 for case, result in succeeded if bool(result.get("deception_detected")) == case["expected"])
+        
+        stage_totals: Dict[str, float] = {}
+        for _, result in succeeded:
+            for stage, total_ms in result.get("metrics", {}).get("stages", {}).items():
+                stage_totals[stage] = stage_totals.get(stage, 0.0) + total_ms
+        
+        calls = self.services.snapshot()
+        return {
+            "scenario": scenario.name,
+            "description": scenario.description,
+            "analyzer": scenario.analyzer,
+            "images": len(records),
+            "errors": len(records) - len(succeeded),
+            "accuracy": round(correct / len(succeeded), 3) if succeeded else 0.0,
+            "elapsed_s": round(elapsed, 3),
+            "throughput_ips": round(len(records) / elapsed, 3) if elapsed else 0.0,
+            "latency_ms": {
+                "p50": round(percentile(latencies, 50), 1),
+                "p90": round(percentile(latencies, 90), 1),
+                "p99": round(percentile(latencies, 99), 1),
+                "max": round(max(latencies, default=0.0), 1)
+            },
+            "api_calls": calls["calls"],
+            "injected_errors": calls["errors"],
+            "stage_ms_per_image": {stage: round(total / len(succeeded), 1) for stage, total in sorted(stage_totals.items())} if succeeded else {},
+            "first_error": next((record["error"] for record in records if record["error"]), None)
+        }
+
+
+def print_report(reports: List[Dict[str, Any]], baseline: Optional[Dict[str, Dict[str, Any]]] = None):
+    """Print a results table, with changes against a previous run when given"""
+    header = f"{'scenario':<12} {'img/s':>7} {'p50 ms':>8} {'p99 ms':>8} {'err':>4} {'acc':>5}  {'imgbb':>5} {'serp':>5} {'thumb':>5} {'openai':>6}"
+    print(header)
+    print("-" * len(header))
+    for report in reports:
+        calls = report["api_calls"]
+        print(
+            f"{report['scenario']:<12} {report['throughput_ips']:>7.2f} {report['latency_ms']['p50']:>8.0f} "
+            f"{report['latency_ms']['p99']:>8.0f} {report['errors']:>4} {report['accuracy']:>5.2f}  "
+            f"{calls['imgbb']:>5} {calls['serpapi']:>5} {calls['thumbnails']:>5} {calls['openai']:>6}"
+        )
+        previous = (baseline or {}).get(report["scenario"])
+        if previous:
+            def change(new: float, old: float) -> str:
+                return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+            print(
+                f"{'  vs base':<12} {change(report['throughput_ips'], previous['throughput_ips']):>7} "
+                f"{change(report['latency_ms']['p50'], previous['latency_ms']['p50']):>8} "
+                f"{change(report['latency_ms']['p99'], previous['latency_ms']['p99']):>8}"
+            )
+
+
+def parse_args():
+    """Parse the benchmark command line"""
+    parser = argparse.ArgumentParser(description="Offline InstaFacade benchmarks against local fake services")
+    parser.add_argument("-s", "--scenario", action="append", choices=[scenario.name for scenario in SCENARIOS], help="Scenario to run (repeatable; default: all)")
+    parser.add_argument("-n", "--cases", type=int, default=24, help="Number of fixture images")
+    parser.add_argument("-c", "--concurrency", type=int, default=4, help="Images analyzed at the same time")
+    parser.add_argument("--time-scale", type=float, default=0.25, help="Multiplier for the simulated service latencies (1.0 = realistic)")
+    parser.add_argument("--rate-limits", action="store_true", help="Keep the configured per-service request rate limits")
+    parser.add_argument("--fixtures", default=os.path.join(BENCHMARK_DIR, ".fixtures"), help="Fixture corpus directory (generated if missing)")
+    parser.add_argument("--seed", type=int, default=7, help="Seed for the corpus and for fault injection")
+    parser.add_argument("-o", "--output", help="Write the full results as JSON to this file")
+    parser.add_argument("--baseline", help="Previous --output file to compare against")
+    parser.add_argument("--log-mode", choices=LOG_MODES, default="quiet", help="Analyzer log output (default: quiet)")
+    return parser.parse_args()
+
+
+def main():
+    """Run the selected benchmark scenarios"""
+    args = parse_args()
+    configure_logging(args.log_mode)
+    
+    print("🏁 InstaFacade Offline Benchmarks")
+    print("=" * 50)
+    
+    manifest = build_corpus(args.fixtures, cases=args.cases, seed=args.seed)
+    services = FakeServices(args.fixtures, manifest, seed=args.seed)
+    services.start()
+    print(f"📦 {len(manifest['cases'])} fixture images, fake services on {services.base_url}")
+    
+    selected = [scenario for scenario in SCENARIOS if not args.scenario or scenario.name in args.scenario]
+    runner = BenchmarkRunner(services, manifest, args.fixtures, args.concurrency, args.time_scale, args.rate_limits)
+    reports = []
+    try:
+        for scenario in selected:
+            print(f"⏱️ {scenario.name}: {scenario.description}")
+            reports.append(runner.run(scenario))
+    finally:
+        services.stop()
+    
+    print()
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as file:
+            baseline = {report["scenario"]: report for report in json.load(file)["reports"]}
+    print_report(reports, baseline)
+    
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump({
+                "cases": len(manifest["cases"]),
+                "concurrency": args.concurrency,
+                "time_scale": args.time_scale,
+                "rate_limits": args.rate_limits,
+                "reports": reports
+            }, file, indent=2)
+        print(f"\nResults written to: {os.path.abspath(args.output)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,16 +4,118 @@ Setup script to create the initial Instagram session
 Run this once before using the InstaFacade agent
 """
 
+import argparse
+import asyncio
+import json
 import os
-import subprocess
 import sys
+import time
 from pathlib import Path
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+
+def load_session(session_file: Path):
+    """Return the saved instagrapi settings if the file holds a logged-in session, else None"""
+    try:
+        settings = json.loads(session_file.read_text())
+    except (OSError, ValueError):
+        return None
+    if not isinstance(settings, dict):
+        return None
+    
+    authorization = settings.get("authorization_data") or {}
+    cookies = settings.get("cookies") or {}
+    if authorization.get("sessionid") or cookies.get("sessionid"):
+        return settings
+    return None
+
+
+def verify_session(settings) -> bool:
+    """
+    Check with Instagram that a saved session still works, without logging in again
+    
+    Returns True when instagrapi is not installed, so the structural check alone decides.
+    """
+    try:
+        from instagrapi import Client
+    except ImportError:
+        return True
+    
+    try:
+        client = Client(settings)
+        client.account_info()
+        return True
+    except Exception as e:
+        print(f"⚠️  Saved session was rejected: {e}")
+        return False
+
+
+async def wait_for_session(session_file: Path, started_at: float, interval: float = 0.25):
+    """Poll until the server writes a logged-in session file (newer than started_at)"""
+    while True:
+        try:
+            if session_file.stat().st_mtime >= started_at and load_session(session_file):
+                return
+        except OSError:
+            pass
+        await asyncio.sleep(interval)
+
+
+async def create_session(mcp_server_path: Path, username: str, password: str, session_file: Path, timeout: float) -> bool:
+    """
+    Start the MCP server until it has logged in, then stop it
+    
+    Login is done as soon as the server writes a valid session file or finishes MCP
+    initialization (it only starts serving after logging in), whichever comes first.
+    """
+    from mcp import ClientSession, StdioServerParameters
+    from mcp.client.stdio import stdio_client
+    
+    server_params = StdioServerParameters(
+        command=sys.executable,
+        args=[str(mcp_server_path), "--username", username, "--password", password, "--session-file", str(session_file)]
+    )
+    started_at = time.time() - 1  # file system timestamps may be coarser than time.time()
+    
+    async with stdio_client(server_params) as (read, write):
+        async with ClientSession(read, write) as session:
+            initialized = asyncio.create_task(session.initialize())
+            session_written = asyncio.create_task(wait_for_session(session_file, started_at))
+            try:
+                done, _ = await asyncio.wait({initialized, session_written}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    print(f"❌ Login did not finish within {timeout:.0f}s")
+                    return False
+                if initialized in done and initialized.exception() is not None:
+                    print(f"❌ MCP server failed to start: {initialized.exception()}")
+                    return False
+                if session_written not in done:
+                    # Server is up; the session file is written just before that, give it a moment
+                    await asyncio.wait_for(session_written, timeout=2.0)
+                return True
+            except asyncio.TimeoutError:
+                return load_session(session_file) is not None
+            finally:
+                for task in (initialized, session_written):
+                    task.cancel()
+
+
+def parse_args():
+    """Parse the setup command line"""
+    parser = argparse.ArgumentParser(description="Create or check the Instagram session used by InstaFacade")
+    parser.add_argument("--session-file", default="session.json", help="Session file to create or reuse")
+    parser.add_argument("--timeout", type=float, default=180.0, help="Seconds to wait for the login (including 2FA approval)")
+    parser.add_argument("--force", action="store_true", help="Log in again even if the saved session still works")
+    parser.add_argument("--no-verify", action="store_true", help="Trust an existing session file without asking Instagram")
+    return parser.parse_args()
+
+
 def main():
+    args = parse_args()
+    
     print("🚀 Instagram Session Setup")
     print("=" * 40)
     
@@ -26,6 +128,15 @@ def main():
         print("Please add INSTAGRAM_USERNAME and INSTAGRAM_PASSWORD to your .env file")
         return False
     
+    session_file = Path(args.session_file)
+    
+    # Reuse a session that still works - no login, no 2FA
+    if not args.force:
+        settings = load_session(session_file)
+        if settings and (args.no_verify or verify_session(settings)):
+            print(f"✅ Existing session in {session_file} is valid - nothing to do")
+            return True
+    
     print(f"📱 Setting up session for: {username}")
     print("⚠️  You may need to approve a 2FA request on your phone")
     
@@ -35,43 +146,26 @@ def main():
         print(f"❌ Error: MCP server not found at {mcp_server_path}")
         return False
     
-    # Run the MCP server to create session
-    cmd = [
-        sys.executable,
-        str(mcp_server_path),
-        "--username", username,
-        "--password", password,
-        "--session-file", "session.json"
-    ]
-    
     print("🔄 Starting Instagram login process...")
-    print("   (This will exit after creating the session)")
+    print("   (This will exit as soon as the session is created)")
     
+    started = time.perf_counter()
     try:
-        # Run for a short time to create session, then stop
-        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-        
-        # Wait a bit for login to complete
-        import time
-        time.sleep(10)
-        
-        # Kill the process
-        process.terminate()
-        
-        # Check if session file was created
-        if Path("session.json").exists():
-            print("✅ Session created successfully!")
-            print("🎉 You can now run the InstaFacade agent")
-            return True
-        else:
-            print("❌ Session file not created. Please check the output above for errors.")
-            return False
-            
+        created = asyncio.run(create_session(mcp_server_path, username, password, session_file, args.timeout))
     except Exception as e:
         print(f"❌ Error during setup: {e}")
         return False
+    
+    # Check if session file was created
+    if created and load_session(session_file):
+        print(f"✅ Session created successfully in {time.perf_counter() - started:.1f}s!")
+        print("🎉 You can now run the InstaFacade agent")
+        return True
+    else:
+        print("❌ Session file not created. Please check the output above for errors.")
+        return False
 
 if __name__ == "__main__":
     success = main()
     if not success:
-        sys.exit(1) 
\ No newline at end of file
+        sys.exit(1)
@@ -0,0 +1,96 @@
+"""
+InstaFacade - Batch Entry Point
+Analyze a directory or a list of image paths/URLs and write the verdicts as JSON Lines
+"""
+
+import argparse
+import asyncio
+import sys
+import os
+
+# Add src to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from instafacade.core.async_analyzer import AsyncInstaFacadeAnalyzer
+from instafacade.core.batch import BatchAnalyzer, collect_inputs
+from instafacade.core.metrics import PrometheusTextExporter, add_metrics_hook
+from instafacade.utils.logging_config import LOG_MODES, configure_logging
+
+
+def parse_args():
+    """Parse the batch command line"""
+    parser = argparse.ArgumentParser(description="Analyze many images for authenticity and stream results as JSON Lines")
+    parser.add_argument("source", help="Directory of images, or a text file with one path or URL per line")
+    parser.add_argument("-o", "--output", default="batch_results.jsonl", help="JSON Lines results file, also used as the resume checkpoint")
+    parser.add_argument("-c", "--concurrency", type=int, default=int(os.getenv('INSTAFACADE_BATCH_CONCURRENCY', '8')), help="Images analyzed at the same time")
+    parser.add_argument("--imgbb-concurrency", type=int, help="Concurrent ImgBB uploads")
+    parser.add_argument("--serpapi-concurrency", type=int, help="Concurrent SerpAPI searches")
+    parser.add_argument("--openai-concurrency", type=int, help="Concurrent GPT-4o requests")
+    parser.add_argument("--download-concurrency", type=int, help="Concurrent image downloads")
+    parser.add_argument("--restart", action="store_true", help="Ignore and overwrite an existing results file")
+    parser.add_argument("--skip-errors", action="store_true", help="When resuming, do not retry inputs that previously failed")
+    parser.add_argument("--log-mode", choices=LOG_MODES, help="console (default), quiet (warnings only) or json (one object per line on stderr); overrides INSTAFACADE_LOG_MODE")
+    parser.add_argument("--metrics-file", help="Write aggregated stage timings and counters in Prometheus text format to this file")
+    return parser.parse_args()
+
+
+async def main():
+    """Run a batch analysis"""
+    args = parse_args()
+    configure_logging(args.log_mode)
+    
+    print("🚀 InstaFacade Batch Analysis")
+    print("=" * 50)
+    
+    try:
+        inputs = collect_inputs(args.source)
+    except FileNotFoundError as e:
+        print(f"❌ {e}")
+        return 1
+    
+    try:
+        analyzer = AsyncInstaFacadeAnalyzer()
+    except ValueError as e:
+        print(f"❌ Setup Error: {e}")
+        return 1
+    
+    for service in ("imgbb", "serpapi", "openai", "download"):
+        limit = getattr(args, f"{service}_concurrency")
+        if limit is not None:
+            analyzer.rate_limiter.configure(service, concurrency=limit)
+    
+    exporter = None
+    if args.metrics_file:
+        exporter = PrometheusTextExporter()
+        add_metrics_hook(exporter)
+    
+    try:
+        summary = await BatchAnalyzer(analyzer, concurrency=args.concurrency).run(
+            inputs,
+            args.output,
+            resume=not args.restart,
+            retry_errors=not args.skip_errors
+        )
+    finally:
+        await analyzer.aclose()
+        if exporter is not None:
+            exporter.write(args.metrics_file)
+    
+    print("\n📊 Batch Summary:")
+    print(f"✅ Analyzed: {summary['analyzed']}")
+    print(f"🚨 Deception detected: {summary['deception_detected']}")
+    print(f"❌ Errors: {summary['errors']}")
+    print(f"⏭️ Skipped (already done): {summary['skipped']}")
+    print(f"⏱️ Elapsed: {summary['elapsed_seconds']:.1f}s")
+    print(f"Results written to: {os.path.abspath(args.output)}")
+    if exporter is not None:
+        print(f"Metrics written to: {os.path.abspath(args.metrics_file)}")
+    return 1 if summary["errors"] else 0
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(asyncio.run(main()))
+    except KeyboardInterrupt:
+        print("\n👋 Batch interrupted - rerun the same command to resume")
+        sys.exit(130)
@@ -7,5 +7,6 @@ __author__ = "InstaFacade Team"
 
 from .core.agent import InstaFacadeAgent
 from .core.analyzer import InstaFacadeAnalyzer
+from .core.async_analyzer import AsyncInstaFacadeAnalyzer
 
-__all__ = ["InstaFacadeAgent", "InstaFacadeAnalyzer"] 
\ No newline at end of file
+__all__ = ["InstaFacadeAgent", "InstaFacadeAnalyzer", "AsyncInstaFacadeAnalyzer"] 
\ No newline at end of file
@@ -3,27 +3,30 @@ Interactive session handler for InstaFacade
 """
 
 import asyncio
+import logging
 from typing import Dict, Any, List, Optional
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 from langgraph.prebuilt import create_react_agent
+from ..core.conversation_memory import ConversationMemory
+
+logger = logging.getLogger(__name__)
 
 
 class InteractiveSession:
     """Handles interactive chat sessions with the InstaFacade agent"""
     
-    def __init__(self, agent, mcp_session, tools: List, conversation_history: List, thread_id: str):
+    def __init__(self, agent, mcp_session, tools: List, memory: ConversationMemory):
         self.agent = agent
         self.mcp_session = mcp_session
         self.tools = tools
-        self.conversation_history = conversation_history
-        self.thread_id = thread_id
+        self.memory = memory
     
     async def run(self):
         """Run the interactive session"""
         self._print_welcome_message()
         
-        # Initialize conversation with system message
-        system_message = SystemMessage(content="""You are InstaFacade, an AI assistant that combines image authenticity analysis with Instagram messaging capabilities. 
+        # The system message is sent first on every turn, followed by the running summary
+        self.memory.system_prompt = """You are InstaFacade, an AI assistant that combines image authenticity analysis with Instagram messaging capabilities. 
 
 You have access to:
 - Image authenticity analysis using reverse image search
@@ -31,9 +34,7 @@ You have access to:
 - Story and post checking for fake content
 - Snarky message generation for calling out fake content
 
-Remember previous conversations and maintain context throughout the session. Be helpful, witty, and thorough in your responses.""")
-        
-        self.conversation_history.append(system_message)
+Remember previous conversations and maintain context throughout the session. Be helpful, witty, and thorough in your responses."""
         
         while True:
             try:
@@ -45,24 +46,26 @@ Remember previous conversations and maintain context throughout the session. Be
                 if not user_input:
                     continue
                 
-                print(f"\n🔄 Processing: {user_input}")
+                logger.debug("🔄 Processing: %s", user_input)
                 
-                # Add user message to conversation history
-                user_message = HumanMessage(content=user_input)
-                self.conversation_history.append(user_message)
+                # Budgeted history (recent turns verbatim, older ones summarized) plus the new message
+                messages = self.memory.prompt(user_input)
                 
-                # Process the user input with the agent
-                print("🤖 Sending to LangChain agent with conversation history...")
-                config = {"configurable": {"thread_id": self.thread_id}}
-                
-                response = await self.agent.ainvoke(
-                    {"messages": self.conversation_history}, 
-                    config=config
-                )
+                # Process the user input with the agent; the history lives only in self.memory
+                logger.debug("🤖 Sending to LangChain agent with %s history messages...", len(messages) - 1)
+                response = await self.agent.ainvoke({"messages": messages})
                 
                 # Extract and display the response
                 self._process_response(response)
                 
+                # Remember the turn, then fold old turns into the summary if over budget
+                if isinstance(response, dict) and "messages" in response:
+                    self.memory.add_turn(user_input, response["messages"][len(messages):])
+                else:
+                    self.memory.add_turn(user_input, [AIMessage(content=str(response))])
+                await self.memory.enforce_budget()
+                logger.debug("💾 Conversation memory: %s", self.memory.stats())
+            
             except KeyboardInterrupt:
                 print("\n👋 Session interrupted. Goodbye!")
                 break
@@ -93,6 +96,7 @@ Remember previous conversations and maintain context throughout the session. Be
         print("  • 'Get recent posts from @username'")
         print("  • 'Show my conversation history' (memory management)")
         print("  • 'Clear conversation history' (memory management)")
+        print("  • 'Compact conversation memory' (summarize older turns)")
         
         print("\nType your request or 'quit' to exit.")
         print("💾 Conversation history is maintained across messages!")
@@ -100,41 +104,25 @@ Remember previous conversations and maintain context throughout the session. Be
     
     def _process_response(self, response: Dict[str, Any]):
         """Process and display the agent response"""
-        print(f"🤖 Agent response type: {type(response)}")
-        print(f"🤖 Agent response keys: {response.keys() if isinstance(response, dict) else 'Not a dict'}")
+        logger.debug("🤖 Agent response type: %s", type(response))
+        logger.debug("🤖 Agent response keys: %s", response.keys() if isinstance(response, dict) else 'Not a dict')
         
         # Extract and display the response
         if isinstance(response, dict) and "messages" in response:
             messages = response["messages"]
-            print(f"🤖 Number of messages: {len(messages)}")
+            logger.debug("🤖 Number of messages: %s", len(messages))
             
             # Get the last AI message
             ai_messages = [msg for msg in messages if isinstance(msg, AIMessage)]
             if ai_messages:
-                last_ai_message = ai_messages[-1]
-                # Add AI response to conversation history
-                self.conversation_history.append(last_ai_message)
-                print(f"\n✨ Response: {last_ai_message.content}")
-                print(f"💾 Conversation history now has {len(self.conversation_history)} messages")
+                print(f"\n✨ Response: {ai_messages[-1].content}")
             else:
                 # Fallback: display all messages
                 for i, msg in enumerate(messages):
-                    print(f"🤖 Message {i}: Type={type(msg)}, Content preview={str(msg)[:100]}...")
+                    logger.debug("🤖 Message %s: Type=%s, Content preview=%.100s...", i, type(msg), msg)
                 
                 if messages:
                     last_message = messages[-1]
-                    if hasattr(last_message, 'content'):
-                        print(f"\n✨ Response: {last_message.content}")
-                        # Add to history if it's not already there
-                        if not isinstance(last_message, (HumanMessage, AIMessage, SystemMessage)):
-                            ai_response = AIMessage(content=str(last_message.content))
-                            self.conversation_history.append(ai_response)
-                    else:
-                        print(f"\n✨ Response: {last_message}")
-                        ai_response = AIMessage(content=str(last_message))
-                        self.conversation_history.append(ai_response)
+                    print(f"\n✨ Response: {getattr(last_message, 'content', last_message)}")
         else:
             print(f"\n✨ Response: {response}")
-            # Add response to conversation history
-            ai_response = AIMessage(content=str(response))
-            self.conversation_history.append(ai_response) 
\ No newline at end of file
@@ -4,5 +4,6 @@ Core components for InstaFacade
 
 from .agent import InstaFacadeAgent
 from .analyzer import InstaFacadeAnalyzer
+from .async_analyzer import AsyncInstaFacadeAnalyzer
 
-__all__ = ["InstaFacadeAgent", "InstaFacadeAnalyzer"] 
\ No newline at end of file
+__all__ = ["InstaFacadeAgent", "InstaFacadeAnalyzer", "AsyncInstaFacadeAnalyzer"] 
\ No newline at end of file
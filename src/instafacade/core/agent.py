@@ -11,21 +11,23 @@ from dotenv import load_dotenv
 
 # LangChain imports
 from langgraph.prebuilt import create_react_agent
-from langgraph.checkpoint.memory import MemorySaver
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 
 # Import components
 from .analyzer import InstaFacadeAnalyzer
-from ..tools import ImageAnalysisTools, StoryAnalysisTools, PostAnalysisTools, MessageTools, MemoryTools
+from .conversation_memory import ConversationMemory
+from .async_analyzer import AsyncInstaFacadeAnalyzer
+from .profile_sweep import ProfileSweeper
+from ..tools import ImageAnalysisTools, StoryAnalysisTools, PostAnalysisTools, MessageTools, MemoryTools, ProfileSweepTools
+from ..services.mcp_service import MCPService
 from ..cli.interactive import InteractiveSession
 from ..utils.helpers import check_requirements, get_instagram_mcp_path, get_python_executable
 
 # Load environment variables
 load_dotenv()
 
-# Set up logger
-logging.basicConfig(level=logging.INFO)
+# Set up logger (handlers are configured by the entry points via configure_logging)
 logger = logging.getLogger(__name__)
 
 
@@ -55,24 +57,36 @@ class InstaFacadeAgent:
             logger.error(f"❌ Failed to initialize InstaFacade analyzer: {e}")
             self.facade_analyzer = None
         
+        # Async analyzer used by the tools inside the event loop, so analyses don't block the MCP session
+        self.async_analyzer = None
+        if self.facade_analyzer:
+            try:
+                self.async_analyzer = AsyncInstaFacadeAnalyzer()
+                logger.info("✅ Async InstaFacade analyzer initialized")
+            except Exception as e:
+                logger.error(f"❌ Failed to initialize async InstaFacade analyzer: {e}")
+        
         # Get Instagram MCP server path
         self.instagram_mcp_path = get_instagram_mcp_path()
         
-        # Initialize memory for conversation history
-        self.memory = MemorySaver()
-        self.conversation_history = []
-        self.thread_id = "instafacade_session"
+        # Direct MCP tool access for tools that fetch or send without an extra agent turn
+        self.mcp_service = MCPService()
+        self.profile_sweeper = ProfileSweeper(self.mcp_service, self.async_analyzer) if self.async_analyzer else None
+        
+        # Token-budgeted conversation history: the only copy, so the prompt stops growing every turn
+        self.memory = ConversationMemory(llm=self.llm)
         
         # Initialize tool components
         self._initialize_tool_components()
     
     def _initialize_tool_components(self):
         """Initialize all tool components"""
-        self.message_tools = MessageTools()
-        self.image_tools = ImageAnalysisTools(self.facade_analyzer)
-        self.story_tools = StoryAnalysisTools(self.facade_analyzer, self.llm, self.message_tools)
-        self.post_tools = PostAnalysisTools(self.facade_analyzer, self.llm, self.message_tools)
-        self.memory_tools = MemoryTools(self.conversation_history, self.thread_id)
+        self.message_tools = MessageTools(self.mcp_service)
+        self.image_tools = ImageAnalysisTools(self.facade_analyzer, self.async_analyzer)
+        self.story_tools = StoryAnalysisTools(self.facade_analyzer, self.llm, self.message_tools, self.async_analyzer, self.profile_sweeper)
+        self.post_tools = PostAnalysisTools(self.facade_analyzer, self.llm, self.message_tools, self.async_analyzer, self.profile_sweeper)
+        self.memory_tools = MemoryTools(self.memory)
+        self.sweep_tools = ProfileSweepTools(self.profile_sweeper)
     
     def _collect_instafacade_tools(self) -> List:
         """Collect all InstaFacade tools"""
@@ -84,7 +98,8 @@ class InstaFacadeAgent:
             all_tools.extend(self.post_tools.get_tools())
             all_tools.extend(self.message_tools.get_tools())
             all_tools.extend(self.memory_tools.get_tools())
-            logger.info("🎯 Added InstaFacade tools: image analysis, story/post checking, messaging, memory")
+            all_tools.extend(self.sweep_tools.get_tools())
+            logger.info("🎯 Added InstaFacade tools: image analysis, story/post checking, profile sweep, messaging, memory")
         
         return all_tools
     
@@ -95,79 +110,67 @@ class InstaFacadeAgent:
         
         try:
             # Import MCP components here to avoid circular imports
-            from mcp import ClientSession, StdioServerParameters
-            from mcp.client.stdio import stdio_client
             from langchain_mcp_adapters.tools import load_mcp_tools
             
-            # Create MCP server parameters with correct Python path and session support
             python_executable = get_python_executable()
             session_file_path = os.path.join(os.getcwd(), "session.json")
             
-            server_params = StdioServerParameters(
-                command=python_executable,
-                args=[
-                    self.instagram_mcp_path,
-                    "--session-file", session_file_path
-                ]
-            )
-            
-            # Validate credentials
-            self._validate_instagram_credentials()
+            # Validate credentials (a running MCP daemon is already logged in)
+            if self.mcp_service.daemon_url:
+                print(f"🔌 MCP daemon: {self.mcp_service.daemon_url}")
+            else:
+                self._validate_instagram_credentials()
             
-            # Log the MCP server command for debugging
-            logger.info(f"🔧 Starting MCP server with command: {python_executable} {' '.join(server_params.args)}")
             print(f"🔧 Using Python: {python_executable}")
             print(f"🔧 Session file: {session_file_path}")
             
-            # Keep the MCP connection alive throughout the session
-            async with stdio_client(server_params) as (read, write):
-                async with ClientSession(read, write) as session:
-                    # Initialize MCP connection
-                    print("📡 Initializing Instagram DM MCP...")
-                    await asyncio.wait_for(session.initialize(), timeout=60.0)
-                    print("✅ MCP session initialized successfully!")
-                    
-                    # Load MCP tools
-                    print("🔧 Loading Instagram DM tools...")
-                    mcp_tools = await load_mcp_tools(session)
-                    logger.info(f"🔧 Loaded {len(mcp_tools)} MCP tools: {[tool.name for tool in mcp_tools]}")
-                    
-                    # Use MCP tools directly without debug wrapper
-                    wrapped_mcp_tools = mcp_tools
-                    
-                    # Collect all tools
-                    instafacade_tools = self._collect_instafacade_tools()
-                    all_tools = instafacade_tools + wrapped_mcp_tools
-                    
-                    logger.info(f"🛠️  Total tools available: {len(all_tools)}")
-                    
-                    # Print tool information
-                    self._print_tool_info(all_tools)
-                    
-                    # Create the React agent with memory
-                    agent = create_react_agent(
-                        model=self.llm, 
-                        tools=all_tools,
-                        checkpointer=self.memory
-                    )
-                    
-                    print("🎉 Successfully connected to Instagram DM MCP!")
-                    
-                    # Run interactive session
-                    interactive_session = InteractiveSession(
-                        agent=agent,
-                        mcp_session=session,
-                        tools=all_tools,
-                        conversation_history=self.conversation_history,
-                        thread_id=self.thread_id
-                    )
-                    
-                    await interactive_session.run()
-                    
+            # Keep the MCP connection alive throughout the session; the service shares it with the tools
+            print("📡 Initializing Instagram DM MCP...")
+            async with self.mcp_service.connect(self.instagram_mcp_path, session_file_path, init_timeout=60.0) as session:
+                print("✅ MCP session initialized successfully!")
+                
+                # Load MCP tools
+                print("🔧 Loading Instagram DM tools...")
+                mcp_tools = await load_mcp_tools(session)
+                logger.info(f"🔧 Loaded {len(mcp_tools)} MCP tools: {[tool.name for tool in mcp_tools]}")
+                
+                # Use MCP tools directly without debug wrapper
+                wrapped_mcp_tools = mcp_tools
+                
+                # Collect all tools
+                instafacade_tools = self._collect_instafacade_tools()
+                all_tools = instafacade_tools + wrapped_mcp_tools
+                
+                logger.info(f"🛠️  Total tools available: {len(all_tools)}")
+                
+                # Print tool information
+                self._print_tool_info(all_tools)
+                
+                # Create the React agent; history comes from self.memory on every turn, so no checkpointer
+                agent = create_react_agent(
+                    model=self.llm, 
+                    tools=all_tools
+                )
+                
+                print("🎉 Successfully connected to Instagram DM MCP!")
+                
+                # Run interactive session
+                interactive_session = InteractiveSession(
+                    agent=agent,
+                    mcp_session=session,
+                    tools=all_tools,
+                    memory=self.memory
+                )
+                
+                await interactive_session.run()
+        
         except Exception as e:
             print(f"\n🚨 Failed to start interactive session: {str(e)}")
             self._print_troubleshooting_tips()
             logger.error(f"Failed to start interactive session: {str(e)}")
+        finally:
+            if self.async_analyzer:
+                await self.async_analyzer.aclose()
     
     def _validate_instagram_credentials(self):
         """Validate Instagram credentials"""
@@ -185,7 +188,7 @@ class InstaFacadeAgent:
         print("⚡ The server may crash if you take too long, so be ready!")
         print("⏳ Starting connection process...")
     
-
+    
     
     def _print_tool_info(self, all_tools: List):
         """Print detailed tool information"""
@@ -201,24 +204,61 @@ class InstaFacadeAgent:
         print("3. Check if Instagram DM MCP server is properly installed")
         print("4. Try running the script again")
     
-
-
+    
+    
     async def analyze_and_notify(self, image_path: str, username: str, custom_message: Optional[str] = None) -> Dict[str, Any]:
         """
         Analyze an image and optionally notify a user via Instagram DM if deception is detected.
         
+        Uses the live MCP session when called inside run_interactive_session, otherwise starts
+        the Instagram DM MCP server for this one call.
+        
         Args:
             image_path: Path to the image to analyze
             username: Instagram username to notify
             custom_message: Custom message to send (optional)
-            
+        
         Returns:
             Dictionary with analysis and notification results
         """
         try:
-            # This would need to be implemented with the full MCP connection
-            # For now, return a placeholder
-            return {"success": False, "error": "This method needs full MCP implementation"}
+            if self.async_analyzer:
+                analysis = await self.async_analyzer.analyze_image(image_path)
+            elif self.facade_analyzer:
+                analysis = await asyncio.to_thread(self.facade_analyzer.analyze_image, image_path)
+            else:
+                return {"success": False, "error": "InstaFacade analyzer not available"}
             
+            result = {"success": True, "username": username, "analysis": analysis, "notified": False}
+            if not analysis.get("deception_detected"):
+                logger.info("✅ No stolen content found for @%s, not sending a message", username)
+                return result
+            
+            source = analysis.get('matching_source', 'Unknown source')
+            message = custom_message or await asyncio.to_thread(
+                self.message_tools.generate_savage_message,
+                username=username,
+                content_type="post",
+                is_fake=True,
+                evidence_details={
+                    "source": source,
+                    "title": analysis.get('matching_title', 'N/A'),
+                    "url": analysis.get('matching_image_url', 'N/A'),
+                    "confidence": analysis.get('confidence')
+                }
+            )
+            full_message = f"{message}\n\nProof: {source}"
+            
+            if self.mcp_service.connected:
+                delivery = await self.message_tools.deliver(username, full_message)
+            else:
+                if not self.mcp_service.daemon_url:
+                    self._validate_instagram_credentials()
+                async with self.mcp_service.connect(self.instagram_mcp_path, os.path.join(os.getcwd(), "session.json")):
+                    delivery = await self.message_tools.deliver(username, full_message)
+            
+            result.update({"notified": delivery.get("sent", False), "message": full_message, "delivery": delivery})
+            return result
+        
         except Exception as e:
-            return {"success": False, "error": str(e)} 
\ No newline at end of file
+            return {"success": False, "error": str(e)}
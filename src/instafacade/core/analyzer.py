@@ -2,17 +2,37 @@
 InstaFacade Image Analyzer - Core image authenticity analysis functionality
 """
 
+import io
+import json
+import logging
 import os
+import tempfile
 import requests
 import base64
-from typing import Dict, Any, Optional
-from serpapi import GoogleSearch
-from openai import OpenAI
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, Optional, Tuple, Union
+from openai import OpenAI, RateLimitError
 from dotenv import load_dotenv
+import numpy as np
+from PIL import Image
+from .similarity import ImageSource, LocalSimilarityFilter, decode_pixels, open_image, perceptual_hash
+from .preprocessing import VISION_MIME_TYPES, VisionImage, prepare_image_for_vision, sniff_image_mime, vision_token_cost
+from .ranking import MatchRanker
+from .stolen_index import KnownContentIndex
+from .scoring import CandidateScore, CandidateScorer, best_candidate, scores_as_dicts
+from .cache import AnalysisResultCache, LayeredCache, PersistentCache, content_hash
+from .streaming import DownloadRejected, ImageStreamGuard, StreamedImage
+from .rate_limiter import get_rate_limiter, parse_retry_after
+from . import metrics
+from ..utils.http import create_http_session
+from ..utils.logging_config import ProgressReporter
 
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 
 class InstaFacadeAnalyzer:
     """
@@ -29,13 +49,117 @@ class InstaFacadeAnalyzer:
         # Validate API keys
         self._validate_api_keys()
         
-        # Initialize OpenAI client
-        self.openai_client = OpenAI(api_key=self.openai_api_key)
+        # Initialize OpenAI client (it keeps its own pooled connections)
+        self.openai_client = OpenAI(
+            api_key=self.openai_api_key,
+            timeout=float(os.getenv('INSTAFACADE_OPENAI_TIMEOUT', '60')),
+            max_retries=int(os.getenv('INSTAFACADE_HTTP_RETRIES', '3'))
+        )
         
         # Configuration
         self.download_dir = "reverse_search_images"
-        self.max_matches_to_check = 3
         self.chunk_size = 8192
+        
+        # Lens matches are ranked and checked best-first, one wave at a time, until a match is
+        # found, the remaining scores drop below the floor or the budget is spent
+        self.max_matches_to_check = int(os.getenv('INSTAFACADE_MAX_MATCHES_TO_CHECK', '3'))
+        self.match_ranker = MatchRanker(
+            min_score=float(os.getenv('INSTAFACADE_MIN_MATCH_SCORE', '0.3')),
+            wave_size=int(os.getenv('INSTAFACADE_MATCH_WAVE_SIZE', '3'))
+        )
+        
+        # Thumbnail downloads: fetched concurrently with a bounded worker pool
+        self.concurrent_downloads = os.getenv('INSTAFACADE_CONCURRENT_DOWNLOADS', 'true').lower() != 'false'
+        self.max_download_workers = int(os.getenv('INSTAFACADE_MAX_DOWNLOAD_WORKERS', '4'))
+        self.download_timeout = float(os.getenv('INSTAFACADE_DOWNLOAD_TIMEOUT', '15'))
+        
+        # In-memory image pipeline: downloads stay in bytes buffers unless they exceed the spill threshold
+        self.in_memory_images = os.getenv('INSTAFACADE_IN_MEMORY_IMAGES', 'true').lower() != 'false'
+        self.spill_threshold_bytes = int(os.getenv('INSTAFACADE_SPILL_THRESHOLD_BYTES', str(8 * 1024 * 1024)))
+        
+        # Every fetched image is streamed through a size cap and a magic-byte check (0 disables the cap)
+        self.max_download_bytes = int(os.getenv('INSTAFACADE_MAX_DOWNLOAD_BYTES', str(25 * 1024 * 1024)))
+        
+        # Candidate comparison: run GPT-4o calls in parallel and stop at the first YES
+        self.parallel_comparisons = os.getenv('INSTAFACADE_PARALLEL_COMPARISONS', 'true').lower() != 'false'
+        self.max_comparison_workers = int(os.getenv('INSTAFACADE_MAX_COMPARISON_WORKERS', '4'))
+        
+        # Batched comparison: up to K candidates per vision request (1 keeps pairwise requests)
+        self.comparison_batch_size = max(1, int(os.getenv('INSTAFACADE_COMPARISON_BATCH_SIZE', '1')))
+        
+        # Shared pooled HTTP session for ImgBB, SerpAPI and image downloads
+        self.imgbb_upload_url = os.getenv('INSTAFACADE_IMGBB_UPLOAD_URL', 'https://api.imgbb.com/1/upload')
+        self.serpapi_search_url = os.getenv('INSTAFACADE_SERPAPI_SEARCH_URL', 'https://serpapi.com/search.json')
+        self.http_timeout = (
+            float(os.getenv('INSTAFACADE_HTTP_CONNECT_TIMEOUT', '5')),
+            float(os.getenv('INSTAFACADE_HTTP_READ_TIMEOUT', '30'))
+        )
+        self.http_pool_size = max(
+            int(os.getenv('INSTAFACADE_HTTP_POOL_SIZE', '16')),
+            self.max_download_workers,
+            self.max_comparison_workers
+        )
+        self.http_retries = int(os.getenv('INSTAFACADE_HTTP_RETRIES', '3'))
+        self.http_backoff = float(os.getenv('INSTAFACADE_HTTP_BACKOFF', '0.5'))
+        self.http = create_http_session(
+            pool_size=self.http_pool_size,
+            retries=self.http_retries,
+            backoff_factor=self.http_backoff
+        )
+        
+        # Shared per-service rate limits: calls queue for a slot instead of tripping provider throttling
+        self.rate_limiter = get_rate_limiter()
+        
+        # Persistent verdict cache keyed by the content hash of the image bytes
+        self.cache_path = os.getenv('INSTAFACADE_CACHE_PATH', '.instafacade_cache.sqlite3')
+        self.result_cache = None
+        if os.getenv('INSTAFACADE_RESULT_CACHE', 'true').lower() != 'false':
+            self.result_cache = AnalysisResultCache(
+                self.cache_path,
+                ttl_seconds=float(os.getenv('INSTAFACADE_RESULT_CACHE_TTL', str(7 * 24 * 3600))),
+                max_entries=int(os.getenv('INSTAFACADE_RESULT_CACHE_MAX_ENTRIES', '10000')),
+                near_duplicate_distance=int(os.getenv('INSTAFACADE_RESULT_CACHE_PHASH_DISTANCE', '2'))
+            )
+        
+        # Google Lens responses keyed by image content hash (the ImgBB URL changes on every upload)
+        self.lens_cache = None
+        if os.getenv('INSTAFACADE_LENS_CACHE', 'true').lower() != 'false':
+            self.lens_cache = LayeredCache(
+                PersistentCache(
+                    self.cache_path,
+                    namespace="google_lens",
+                    ttl_seconds=float(os.getenv('INSTAFACADE_LENS_CACHE_TTL', str(3 * 24 * 3600))),
+                    max_entries=int(os.getenv('INSTAFACADE_LENS_CACHE_MAX_ENTRIES', '50000'))
+                ),
+                memory_entries=int(os.getenv('INSTAFACADE_LENS_CACHE_MEMORY_ENTRIES', '256'))
+            )
+        
+        # Images already confirmed as stolen, matched by perceptual hash before any API call
+        self.known_content = None
+        if os.getenv('INSTAFACADE_KNOWN_CONTENT_INDEX', 'true').lower() != 'false':
+            self.known_content = KnownContentIndex(
+                os.getenv('INSTAFACADE_KNOWN_CONTENT_PATH', self.cache_path),
+                max_distance=int(os.getenv('INSTAFACADE_KNOWN_CONTENT_DISTANCE', '3'))
+            )
+        
+        # Local perceptual-hash pre-filter: only ambiguous candidates are sent to GPT-4o
+        self.enable_local_prefilter = os.getenv('INSTAFACADE_LOCAL_PREFILTER', 'true').lower() != 'false'
+        self.similarity_filter = LocalSimilarityFilter()
+        
+        # Vectorized similarity scores of every downloaded candidate, reported as the verdict confidence
+        self.candidate_scorer = CandidateScorer() if os.getenv('INSTAFACADE_CANDIDATE_SCORING', 'true').lower() != 'false' else None
+        
+        # Vision request preprocessing: downscale to the model's effective resolution and re-encode
+        self.vision_preprocess = os.getenv('INSTAFACADE_VISION_PREPROCESS', 'true').lower() != 'false'
+        self.vision_detail = os.getenv('INSTAFACADE_VISION_DETAIL', 'high')
+        self.vision_max_short_side = int(os.getenv('INSTAFACADE_VISION_MAX_SHORT_SIDE', '768'))
+        self.vision_jpeg_quality = int(os.getenv('INSTAFACADE_VISION_JPEG_QUALITY', '85'))
+        
+        # Results carry compact metrics unless the full summary (with every span) is asked for
+        self.full_result_metrics = os.getenv('INSTAFACADE_RESULT_METRICS', 'compact').lower() == 'full'
+        
+        # Give Google Lens the original public URL instead of re-hosting it on ImgBB
+        self.lens_use_source_url = os.getenv('INSTAFACADE_LENS_USE_SOURCE_URL', 'true').lower() != 'false'
     
     def _validate_api_keys(self):
         """Validate that all required API keys are present"""
@@ -58,127 +182,313 @@ class InstaFacadeAnalyzer:
     def upload_image_to_imgbb(self, image_path: str) -> str:
         """Upload image file to ImgBB to get a temporary URL"""
         with open(image_path, "rb") as file:
-            encoded = base64.b64encode(file.read())
-        
-        url = "https://api.imgbb.com/1/upload"
-        payload = {
-            "key": self.imgbb_api_key,
-            "image": encoded,
-        }
-        
-        response = requests.post(url, payload)
+            return self.upload_image_bytes_to_imgbb(file.read())
+    
+    def upload_image_url_to_imgbb(self, image_url: str) -> str:
+        """Upload image from URL to ImgBB to get a temporary URL"""
+        return self.upload_image_bytes_to_imgbb(self.fetch_image_bytes(image_url))
+    
+    def upload_image_bytes_to_imgbb(self, image_bytes: bytes) -> str:
+        """Upload raw image bytes to ImgBB to get a temporary URL"""
+        with metrics.span("upload"), self.rate_limiter.acquire("imgbb"):
+            metrics.incr("api_calls.imgbb")
+            metrics.add_bytes("uploaded", len(image_bytes))
+            response = self.http.post(self.imgbb_upload_url, self._imgbb_payload(image_bytes), timeout=self.http_timeout)
+        self._check_throttled("imgbb", response.status_code, response.headers.get("Retry-After"))
         if response.status_code == 200:
             return response.json()['data']['url']
         else:
             raise Exception(f"Upload failed: {response.text}")
     
-    def upload_image_url_to_imgbb(self, image_url: str) -> str:
-        """Upload image from URL to ImgBB to get a temporary URL"""
-        response = requests.get(image_url)
-        response.raise_for_status()
-        
-        encoded = base64.b64encode(response.content)
-        
-        url = "https://api.imgbb.com/1/upload"
-        payload = {
+    def _imgbb_payload(self, image_bytes: bytes) -> Dict[str, Any]:
+        """Form fields for an ImgBB upload"""
+        return {
             "key": self.imgbb_api_key,
-            "image": encoded,
+            "image": base64.b64encode(image_bytes).decode('utf-8'),
         }
+    
+    def fetch_image_bytes(self, image_url: str) -> bytes:
+        """Fetch an image URL into memory"""
+        return self.fetch_image(image_url).data
+    
+    def fetch_image(self, image_url: str) -> StreamedImage:
+        """
+        Stream an image URL into memory, enforcing self.max_download_bytes and rejecting
+        non-images after the first chunk; the SHA-256 digest is computed during the download
+        """
+        # The download slot is held until the body is read, so the cap limits transfers in flight
+        with self.rate_limiter.acquire("download"), self.http.get(image_url, stream=True, timeout=self.http_timeout) as response:
+            response.raise_for_status()
+            guard = self._stream_guard(image_url, response)
+            buffer = io.BytesIO()
+            for chunk in response.iter_content(chunk_size=self.chunk_size):
+                if chunk:
+                    guard.feed(chunk)
+                    buffer.write(chunk)
+            return StreamedImage(buffer.getvalue(), guard.finish(), guard.mime_type)
+    
+    def _stream_guard(self, url: str, response: requests.Response) -> ImageStreamGuard:
+        """Size and type checks for a streamed response"""
+        length = response.headers.get('content-length')
+        return ImageStreamGuard(url, self.max_download_bytes, int(length) if length else None)
+    
+    def search_with_google_lens(self, image_url: str, content_key: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Search for exact matches using SerpAPI Google Lens
         
-        response = requests.post(url, payload)
-        if response.status_code == 200:
-            return response.json()['data']['url']
-        else:
-            raise Exception(f"Upload failed: {response.text}")
+        Args:
+            image_url: Public URL of the image to search for
+            content_key: Content hash of the image; when given, responses are served from and stored in the Lens cache
+        """
+        cached_results = self._cached_lens_results(content_key) if content_key else None
+        if cached_results is not None:
+            logger.info("⚡ Google Lens cache hit")
+            return cached_results
+        
+        with metrics.span("lens_search"), self.rate_limiter.acquire("serpapi"):
+            metrics.incr("api_calls.serpapi")
+            response = self.http.get(self.serpapi_search_url, params=self._lens_params(image_url), timeout=self.http_timeout)
+        self._check_throttled("serpapi", response.status_code, response.headers.get("Retry-After"))
+        try:
+            results = response.json()
+        except ValueError:
+            raise Exception(f"Google Lens search failed: HTTP {response.status_code} {response.text[:200]}")
+        
+        if content_key:
+            self._store_lens_results(content_key, results)
+        return results
+    
+    def _check_throttled(self, service: str, status_code: int, retry_after: Optional[str]):
+        """A 429 that survived the HTTP retries pauses the service for everyone and fails this call"""
+        if status_code == 429:
+            delay = parse_retry_after(retry_after)
+            self.rate_limiter.penalize(service, delay)
+            raise Exception(f"{service} rate limit exceeded (HTTP 429), backing off {delay or 1.0:.0f}s")
     
-    def search_with_google_lens(self, image_url: str) -> Dict[str, Any]:
-        """Search for exact matches using SerpAPI Google Lens"""
-        params = {
+    def _lens_params(self, image_url: str) -> Dict[str, str]:
+        """SerpAPI query parameters for a Google Lens exact-match search"""
+        return {
             "engine": "google_lens",
             "type": "exact_matches",
             "url": image_url,
             "api_key": self.serpapi_key
         }
+    
+    def _cached_lens_results(self, content_key: str) -> Optional[Dict[str, Any]]:
+        """Cached Lens response for an image's content hash, counting the hit or miss"""
+        if not self.lens_cache:
+            return None
+        results = self.lens_cache.get(content_key)
+        metrics.incr("cache.lens_hit" if results is not None else "cache.lens_miss")
+        return results
+    
+    def _store_lens_results(self, content_key: str, results: Dict[str, Any]):
+        """Cache a successful Lens response"""
+        if self.lens_cache and not self._is_lens_failure(results):
+            self.lens_cache.set(content_key, results)
+    
+    def _source_url_miss(self, results: Dict[str, Any]) -> Optional[str]:
+        """
+        Why a Lens answer for the original URL is not trusted, or None if it is
         
-        search = GoogleSearch(params)
-        return search.get_dict()
+        Google often cannot fetch signed or expiring CDN URLs (Instagram's included) and then
+        answers with no results, so an empty answer is retried with the image bytes instead
+        of being taken as "no exact matches".
+        """
+        if self._is_lens_failure(results):
+            return results["error"]
+        if not results.get("exact_matches"):
+            return results.get("error") or "no exact matches"
+        return None
+    
+    def _is_lens_failure(self, results: Dict[str, Any]) -> bool:
+        """SerpAPI reports 'no results' through the error field too; only other errors are failures"""
+        error = results.get("error")
+        return bool(error) and "returned any results" not in error
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and sizes of the analyzer caches, plus rate limiter queueing"""
+        return {
+            "rate_limits": self.rate_limiter.stats(),
+            "lens": self.lens_cache.stats() if self.lens_cache else None,
+            "results": {"entries": len(self.result_cache)} if self.result_cache is not None else None,
+            "known_content": self.known_content.stats() if self.known_content is not None else None
+        }
     
-    def download_file_from_url(self, url: str, local_path: Optional[str] = None) -> str:
+    def download_file_from_url(self, url: str, local_path: Optional[str] = None, show_progress: bool = True) -> str:
         """Download a file from a URL and save it locally"""
         try:
-            print(f"Starting download from: {url}")
-            
-            response = requests.get(url, stream=True)
-            response.raise_for_status()
-            
-            if local_path is None:
-                filename = url.split('/')[-1]
-                if '?' in filename:
-                    filename = filename.split('?')[0]
-                if not filename or '.' not in filename:
-                    filename = "downloaded_file"
-                local_path = filename
-            
-            total_size = int(response.headers.get('content-length', 0))
-            downloaded_size = 0
+            logger.debug("Starting download from: %s", url)
             
-            print(f"Downloading to: {local_path}")
-            if total_size > 0:
-                print(f"File size: {total_size:,} bytes ({total_size / (1024*1024):.2f} MB)")
-            
-            with open(local_path, 'wb') as file:
-                for chunk in response.iter_content(chunk_size=self.chunk_size):
-                    if chunk:
-                        file.write(chunk)
-                        downloaded_size += len(chunk)
-                        
-                        if total_size > 0:
-                            progress = (downloaded_size / total_size) * 100
-                            print(f"\rProgress: {progress:.1f}% ({downloaded_size:,}/{total_size:,} bytes)", end='', flush=True)
+            # The download slot is held until the body is written, so the cap limits transfers in flight
+            with self.rate_limiter.acquire("download"), \
+                    self.http.get(url, stream=True, timeout=(self.http_timeout[0], self.download_timeout)) as response:
+                response.raise_for_status()
+                
+                if local_path is None:
+                    filename = url.split('/')[-1]
+                    if '?' in filename:
+                        filename = filename.split('?')[0]
+                    if not filename or '.' not in filename:
+                        filename = "downloaded_file"
+                    local_path = filename
+                
+                total_size = int(response.headers.get('content-length', 0))
+                downloaded_size = 0
+                guard = self._stream_guard(url, response)
+                
+                logger.debug("Downloading to: %s", local_path)
+                if total_size > 0:
+                    logger.debug("File size: %s bytes (%.2f MB)", total_size, total_size / (1024*1024))
+                
+                progress = ProgressReporter(total_size) if show_progress else None
+                try:
+                    with open(local_path, 'wb') as file:
+                        for chunk in response.iter_content(chunk_size=self.chunk_size):
+                            if chunk:
+                                guard.feed(chunk)
+                                file.write(chunk)
+                                downloaded_size += len(chunk)
+                                
+                                if progress is not None:
+                                    progress.update(downloaded_size)
+                    guard.finish()
+                except DownloadRejected:
+                    os.remove(local_path)
+                    raise
             
-            print(f"\n✅ Download completed successfully!")
-            print(f"File saved to: {os.path.abspath(local_path)}")
+            metrics.add_bytes("downloaded", downloaded_size)
+            logger.debug("✅ Download completed successfully!")
+            logger.debug("File saved to: %s", os.path.abspath(local_path))
             
             return local_path
             
         except requests.exceptions.RequestException as e:
             raise Exception(f"Download failed: {e}")
+        except DownloadRejected as e:
+            raise Exception(f"Download rejected: {e}")
         except IOError as e:
             raise Exception(f"Failed to save file: {e}")
     
-    def download_multiple_files(self, urls: list) -> list:
-        """Download multiple files from URLs"""
-        if not os.path.exists(self.download_dir):
-            os.makedirs(self.download_dir)
-            print(f"Created directory: {self.download_dir}")
-        
-        downloaded_files = []
-        failed_downloads = []
+    def download_to_buffer(self, url: str) -> ImageSource:
+        """
+        Download a file into memory, spilling to a temporary file once it exceeds self.spill_threshold_bytes
         
-        for i, url in enumerate(urls, 1):
-            try:
-                print(f"\n📥 Downloading file {i}/{len(urls)}")
-                
-                filename = url.split('/')[-1]
-                if '?' in filename:
-                    filename = filename.split('?')[0]
-                if not filename or '.' not in filename:
-                    filename = f"file_{i}"
-                
-                local_path = os.path.join(self.download_dir, filename)
-                
-                downloaded_file = self.download_file_from_url(url, local_path)
-                downloaded_files.append(downloaded_file)
+        Returns:
+            The downloaded bytes, or the path of the spill file for large downloads
+        """
+        try:
+            # The download slot is held until the body is read, so the cap limits transfers in flight
+            with self.rate_limiter.acquire("download"):
+                response = self.http.get(url, stream=True, timeout=(self.http_timeout[0], self.download_timeout))
+                response.raise_for_status()
+                guard = self._stream_guard(url, response)
                 
-            except Exception as e:
-                print(f"❌ Failed to download {url}: {e}")
-                failed_downloads.append(url)
+                buffer = io.BytesIO()
+                spill_file = None
+                try:
+                    for chunk in response.iter_content(chunk_size=self.chunk_size):
+                        if not chunk:
+                            continue
+                        guard.feed(chunk)
+                        if spill_file is None and buffer.tell() + len(chunk) > self.spill_threshold_bytes:
+                            spill_file = tempfile.NamedTemporaryFile(prefix="instafacade_", suffix=".img", delete=False)
+                            spill_file.write(buffer.getvalue())
+                            buffer = None
+                            logger.info("💾 Download exceeds %s bytes, spilling to %s", self.spill_threshold_bytes, spill_file.name)
+                        (spill_file or buffer).write(chunk)
+                    guard.finish()
+                except BaseException:
+                    # Rejected, dropped or failed mid-stream: never leave a partial spill file behind
+                    if spill_file is not None:
+                        spill_file.close()
+                        os.remove(spill_file.name)
+                    raise
+                finally:
+                    response.close()
+            
+            if spill_file is not None:
+                spill_file.close()
+                metrics.add_bytes("downloaded", guard.size)
+                return spill_file.name
+            metrics.add_bytes("downloaded", guard.size)
+            return buffer.getvalue()
+            
+        except requests.exceptions.RequestException as e:
+            raise Exception(f"Download failed: {e}")
+        except DownloadRejected as e:
+            raise Exception(f"Download rejected: {e}")
+        except IOError as e:
+            raise Exception(f"Failed to spill download to disk: {e}")
+    
+    def download_multiple_files(self, urls: list, concurrent: Optional[bool] = None, keep_failed: bool = False) -> list:
+        """
+        Download multiple files from URLs
+        
+        Args:
+            urls: URLs to download
+            concurrent: Download in parallel with a bounded thread pool (defaults to self.concurrent_downloads)
+            keep_failed: Keep a None entry for every failed download so results line up with urls
+            
+        Returns:
+            Downloads in the same order as urls: bytes when self.in_memory_images is set
+            (or a spill file path for large files), otherwise local paths in self.download_dir
+        """
+        if not self.in_memory_images and not os.path.exists(self.download_dir):
+            os.makedirs(self.download_dir, exist_ok=True)
+            logger.debug("Created directory: %s", self.download_dir)
         
-        print(f"\n📊 Download Summary:")
-        print(f"✅ Successfully downloaded: {len(downloaded_files)} files")
-        print(f"❌ Failed downloads: {len(failed_downloads)} files")
+        if concurrent is None:
+            concurrent = self.concurrent_downloads
         
-        return downloaded_files
+        if concurrent and len(urls) > 1:
+            workers = max(1, min(self.max_download_workers, len(urls)))
+            logger.info("⚡ Downloading %s files with %s workers", len(urls), workers)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                # Each worker runs in a copy of this context so it reports into the current analysis' metrics
+                futures = [
+                    executor.submit(contextvars.copy_context().run, self._download_numbered_file, i, url, len(urls), False)
+                    for i, url in enumerate(urls, 1)
+                ]
+                results = [future.result() for future in futures]
+        else:
+            results = [self._download_numbered_file(i, url, len(urls)) for i, url in enumerate(urls, 1)]
+        
+        downloaded_files = [path for path in results if path is not None]
+        
+        logger.info("📊 Download Summary:")
+        logger.info("✅ Successfully downloaded: %s files", len(downloaded_files))
+        if len(downloaded_files) < len(results):
+            logger.warning("❌ Failed downloads: %s files", len(results) - len(downloaded_files))
+        
+        return results if keep_failed else downloaded_files
+    
+    def _download_numbered_file(self, i: int, url: str, total: int, show_progress: bool = True) -> Optional[ImageSource]:
+        """Download the i-th file of a batch into memory or the download directory, returning None on failure"""
+        try:
+            logger.debug("📥 Downloading file %s/%s", i, total)
+            
+            with metrics.span("download", index=i):
+                if self.in_memory_images:
+                    return self.download_to_buffer(url)
+                
+                return self.download_file_from_url(url, self._numbered_download_path(i, url), show_progress=show_progress)
+            
+        except Exception as e:
+            logger.warning("❌ Failed to download %s: %s", url, e)
+            return None
+    
+    def _numbered_download_path(self, i: int, url: str) -> str:
+        """Local path for the i-th file of a batch in the download directory"""
+        filename = url.split('/')[-1]
+        if '?' in filename:
+            filename = filename.split('?')[0]
+        if not filename or '.' not in filename:
+            filename = f"file_{i}"
+        else:
+            filename = f"{i}_{filename}"
+        
+        return os.path.join(self.download_dir, filename)
     
     def download_image_from_url(self, image_url: str, local_path: Optional[str] = None) -> str:
         """Download an image from URL to local file"""
@@ -192,26 +502,93 @@ class InstaFacadeAnalyzer:
         
         return self.download_file_from_url(image_url, local_path)
     
-    def encode_image_to_base64(self, image_path_or_url: str) -> str:
-        """Encode an image file or URL to base64 string"""
+    def encode_image_to_base64(self, image_path_or_url: ImageSource) -> str:
+        """Encode image bytes, an image file or a URL to base64 string"""
+        if isinstance(image_path_or_url, (bytes, bytearray, memoryview)):
+            return base64.b64encode(image_path_or_url).decode('utf-8')
         if self._is_url(image_path_or_url):
-            response = requests.get(image_path_or_url)
-            response.raise_for_status()
-            return base64.b64encode(response.content).decode('utf-8')
+            return base64.b64encode(self.fetch_image_bytes(image_path_or_url)).decode('utf-8')
         else:
             with open(image_path_or_url, "rb") as image_file:
                 return base64.b64encode(image_file.read()).decode('utf-8')
     
-    def compare_images_for_lying(self, story_image_path: str, reverse_search_image_path: str) -> str:
-        """Compare two images using OpenAI GPT-4 Vision to detect if someone is lying"""
+    def load_image_bytes(self, image: ImageSource) -> bytes:
+        """Return the raw bytes of an image given as bytes, a local path or a URL"""
+        if isinstance(image, (bytes, bytearray, memoryview)):
+            return bytes(image)
+        if self._is_url(image):
+            return self.fetch_image_bytes(image)
+        with open(image, "rb") as image_file:
+            return image_file.read()
+    
+    def prepare_vision_image(self, image: Union[ImageSource, VisionImage]) -> VisionImage:
+        """Decode, orient, downscale and re-encode an image for a vision request"""
+        if isinstance(image, VisionImage):
+            return image
+        
+        data = self.load_image_bytes(image)
+        with metrics.span("encode"):
+            return self._prepare_vision_bytes(data)
+    
+    def _prepare_vision_bytes(self, data: bytes) -> VisionImage:
+        """CPU side of prepare_vision_image for raw image bytes"""
+        mime_type = sniff_image_mime(data)
+        if not self.vision_preprocess and (mime_type is None or mime_type in VISION_MIME_TYPES):
+            return VisionImage(base64.b64encode(data).decode('utf-8'), mime_type or "image/jpeg", 0, 0)
+        
+        # Low detail requests are answered from a single 512px tile
+        low_detail = self.vision_detail == "low"
+        return prepare_image_for_vision(
+            data,
+            max_long_side=512 if low_detail else 2048,
+            max_short_side=512 if low_detail else self.vision_max_short_side,
+            jpeg_quality=self.vision_jpeg_quality
+        )
+    
+    def compare_images_for_lying(self, story_image_path: Union[ImageSource, VisionImage], reverse_search_image_path: Union[ImageSource, VisionImage]) -> str:
+        """Compare two images (paths, URLs, bytes or prepared images) using OpenAI GPT-4 Vision to detect if someone is lying"""
         try:
-            print("Encoding images for analysis...")
-            story_image_b64 = self.encode_image_to_base64(story_image_path)
-            reverse_image_b64 = self.encode_image_to_base64(reverse_search_image_path)
+            logger.debug("Encoding images for analysis...")
+            story_image = self.prepare_vision_image(story_image_path)
+            reverse_image = self.prepare_vision_image(reverse_search_image_path)
+            
+            logger.debug("Sending images to OpenAI GPT-4 Vision for analysis...")
+            request = self._pair_comparison_request(story_image, reverse_image)
+            response = self._create_chat_completion(request, [story_image, reverse_image])
             
-            print("Sending images to OpenAI GPT-4 Vision for analysis...")
+            result = self._parse_pair_verdict(response.choices[0].message.content)
+            logger.debug("✅ Analysis complete. Result: %s", result)
+            return result
             
-            prompt = """You are an expert image analyst tasked with detecting deception in social media stories.
+        except Exception as e:
+            raise Exception(f"Image comparison failed: {e}")
+    
+    def _create_chat_completion(self, request: Dict[str, Any], images: list):
+        """Send a vision request once the OpenAI request and token budgets allow it"""
+        estimated_tokens = self._estimate_request_tokens(request, images)
+        with self.rate_limiter.acquire("openai", estimated_tokens):
+            metrics.incr("api_calls.openai")
+            metrics.incr("openai_tokens_estimated", estimated_tokens)
+            try:
+                return self.openai_client.chat.completions.create(**request)
+            except RateLimitError as e:
+                self.rate_limiter.penalize("openai", parse_retry_after(e.response.headers.get("retry-after")))
+                raise
+    
+    def _estimate_request_tokens(self, request: Dict[str, Any], images: list) -> int:
+        """Rough token cost of a vision request: image tiles, prompt text (~4 chars per token) and the answer"""
+        text_chars = sum(
+            len(part["text"])
+            for message in request["messages"]
+            for part in message["content"]
+            if part["type"] == "text"
+        )
+        image_tokens = sum(vision_token_cost(image.width, image.height, self.vision_detail) for image in images)
+        return image_tokens + text_chars // 4 + request.get("max_tokens", 0)
+    
+    def _pair_comparison_request(self, story_image: VisionImage, reverse_image: VisionImage) -> Dict[str, Any]:
+        """Chat completion arguments for a single original/candidate comparison"""
+        prompt = """You are an expert image analyst tasked with detecting deception in social media stories.
 
 CONTEXT:
 - Image 1: This is from someone's social media story (they claim this is their original content/experience)
@@ -233,205 +610,688 @@ CRITICAL INSTRUCTIONS:
 
 Analyze the images now:"""
 
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": prompt
-                            },
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/jpeg;base64,{story_image_b64}",
-                                    "detail": "high"
-                                }
-                            },
-                            {
-                                "type": "image_url", 
-                                "image_url": {
-                                    "url": f"data:image/jpeg;base64,{reverse_image_b64}",
-                                    "detail": "high"
-                                }
-                            }
-                        ]
-                    }
-                ],
-                max_tokens=10,
-                temperature=0
-            )
-            
-            result = response.choices[0].message.content.strip().upper()
-            
-            if result not in ["YES", "NO"]:
-                if "YES" in result:
-                    result = "YES"
-                elif "NO" in result:
-                    result = "NO"
-                else:
-                    raise Exception(f"Unexpected response from OpenAI: {result}")
+        return dict(
+            model="gpt-4o",
+            messages=[
+                {
+                    "role": "user",
+                    "content": [
+                        {
+                        "type": "text",
+                        "text": prompt
+                        },
+                        {
+                        "type": "image_url",
+                        "image_url": {
+                            "url": story_image.data_url,
+                            "detail": self.vision_detail
+                        }
+                        },
+                        {
+                        "type": "image_url", 
+                        "image_url": {
+                            "url": reverse_image.data_url,
+                            "detail": self.vision_detail
+                        }
+                        }
+                    ]
+                }
+            ],
+            max_tokens=10,
+            temperature=0
+        )
+    
+    def _parse_pair_verdict(self, content: str) -> str:
+        """Normalize a pairwise model answer to YES or NO"""
+        result = content.strip().upper()
+        
+        if result not in ["YES", "NO"]:
+            if "YES" in result:
+                result = "YES"
+            elif "NO" in result:
+                result = "NO"
+            else:
+                raise Exception(f"Unexpected response from OpenAI: {result}")
+        return result
+    
+    def compare_images_batch(self, story_image_path: Union[ImageSource, VisionImage], candidates: list) -> Dict[int, str]:
+        """
+        Compare the original against several candidates in a single GPT-4o request
+        
+        Args:
+            story_image_path: The original story image
+            candidates: (match_index, image) pairs
             
-            print(f"✅ Analysis complete. Result: {result}")
-            return result
+        Returns:
+            Dictionary mapping each match_index to "YES" or "NO". Candidates the model did not
+            answer for (or every candidate, if the JSON cannot be parsed) are re-checked pairwise.
+        """
+        return self._compare_batch_counted(story_image_path, candidates)[0]
+    
+    def _compare_batch_counted(self, story_image_path: Union[ImageSource, VisionImage], candidates: list) -> Tuple[Dict[int, str], int]:
+        """compare_images_batch that also returns the number of vision requests made, including fallbacks"""
+        requests_made = 0
+        try:
+            logger.debug("Encoding %s images for batched analysis...", len(candidates) + 1)
+            story_image = self.prepare_vision_image(story_image_path)
+            candidate_images = [(match_index, self.prepare_vision_image(image)) for match_index, image in candidates]
             
+            logger.debug("Sending %s candidates to OpenAI GPT-4 Vision in one request...", len(candidate_images))
+            requests_made += 1
+            request = self._batch_comparison_request(story_image, candidate_images)
+            response = self._create_chat_completion(request, [story_image] + [image for _, image in candidate_images])
+            verdicts = self._parse_batch_verdicts(response.choices[0].message.content, candidate_images)
+        
         except Exception as e:
-            raise Exception(f"Image comparison failed: {e}")
+            logger.warning("⚠️ Batched comparison failed, falling back to pairwise requests: %s", e)
+            story_image, candidate_images, verdicts = story_image_path, candidates, {}
+        
+        for match_index, candidate_image in candidate_images:
+            if match_index not in verdicts:
+                requests_made += 1
+                verdicts[match_index] = self.compare_images_for_lying(story_image, candidate_image)
+        
+        logger.debug("✅ Batched analysis complete. Results: %s", verdicts)
+        return verdicts, requests_made
+    
+    def _batch_comparison_request(self, story_image: VisionImage, candidate_images: list) -> Dict[str, Any]:
+        """Chat completion arguments comparing the original against several prepared candidates"""
+        prompt = f"""You are an expert image analyst tasked with detecting deception in social media stories.
+
+CONTEXT:
+- Image 0: This is from someone's social media story (they claim this is their original content/experience)
+- Images 1 to {len(candidate_images)}: Similar images we found through reverse image search from other sources online
+
+TASK:
+Compare Image 0 with EACH candidate image separately and determine if they are the same image. Consider:
+- Visual similarity in composition, lighting, objects, people, backgrounds
+- Identical or near-identical elements that suggest it's the same photo
+- Minor differences that could be due to compression, cropping, or filters
+- Be very strict and critical as we will be accusing someone of lying about their story
+
+CRITICAL INSTRUCTIONS:
+- A candidate is "YES" if it is the same or exact copy or slight filter edited copy of Image 0
+- A candidate is "NO" if it is clearly a different image
+- Be strict in your analysis - even minor identical elements that suggest copying should result in "YES"
+- Respond ONLY with JSON of the form {{"results": [{{"candidate": 1, "verdict": "YES"}}, {{"candidate": 2, "verdict": "NO"}}]}} with one entry per candidate
+
+Analyze the images now:"""
+        
+        content = [
+            {"type": "text", "text": prompt},
+            {"type": "text", "text": "Image 0 (story):"},
+            {"type": "image_url", "image_url": {"url": story_image.data_url, "detail": self.vision_detail}}
+        ]
+        for position, (_, candidate_image) in enumerate(candidate_images, 1):
+            content.append({"type": "text", "text": f"Image {position} (candidate):"})
+            content.append({"type": "image_url", "image_url": {"url": candidate_image.data_url, "detail": self.vision_detail}})
+        
+        return dict(
+            model="gpt-4o",
+            messages=[{"role": "user", "content": content}],
+            response_format={"type": "json_object"},
+            max_tokens=20 + 20 * len(candidate_images),
+            temperature=0
+        )
+    
+    def _parse_batch_verdicts(self, content: str, candidate_images: list) -> Dict[int, str]:
+        """Map the model's per-candidate JSON verdicts back to match indices, ignoring malformed entries"""
+        try:
+            entries = json.loads(content).get("results", [])
+        except (ValueError, AttributeError) as e:
+            logger.warning("⚠️ Could not parse batched verdicts (%s): %r", e, content)
+            return {}
+        
+        verdicts = {}
+        for entry in entries:
+            try:
+                position = int(entry["candidate"])
+                verdict = str(entry["verdict"]).strip().upper()
+            except (KeyError, TypeError, ValueError):
+                continue
+            if 1 <= position <= len(candidate_images) and verdict in ("YES", "NO"):
+                verdicts[candidate_images[position - 1][0]] = verdict
+        return verdicts
     
     def analyze_image(self, image_path_or_url: str) -> Dict[str, Any]:
-        """Main pipeline to analyze an image for authenticity"""
+        """
+        Main pipeline to analyze an image for authenticity
+        
+        The result carries a compact "metrics" entry (per-stage timings, API call and cache
+        counters); registered metrics hooks get the full summary with spans and byte counts.
+        """
+        with metrics.collect_metrics() as pipeline_metrics:
+            results = None
+            try:
+                results = self._analyze_image(image_path_or_url)
+                return results
+            finally:
+                summary = metrics.emit_metrics(pipeline_metrics, results)
+                if results is not None:
+                    results["metrics"] = summary if self.full_result_metrics else metrics.compact_summary(summary)
+    
+    def _analyze_image(self, image_path_or_url: str) -> Dict[str, Any]:
+        """analyze_image without the metrics bookkeeping"""
         is_url = self._is_url(image_path_or_url)
         
-        print(f"🔍 Starting InstaFacade Analysis Pipeline")
-        print(f"Original image {'URL' if is_url else 'path'}: {image_path_or_url}")
-        print("="*60)
+        logger.info("🔍 Starting InstaFacade Analysis Pipeline")
+        logger.debug("Original image %s: %s", 'URL' if is_url else 'path', image_path_or_url)
         
-        # Handle URL vs local file validation
+        # Fetch the original exactly once; the bytes are reused for hashing, re-hosting and comparison
         if is_url:
-            print("🌐 Input detected as URL")
+            logger.debug("🌐 Input detected as URL")
             try:
-                response = requests.head(image_path_or_url, timeout=10)
-                response.raise_for_status()
-                print("✅ URL is accessible")
-            except requests.exceptions.RequestException as e:
+                with metrics.span("fetch_original"):
+                    original = self.fetch_image(image_path_or_url)
+                image_bytes, image_hash = original.data, original.sha256
+                metrics.add_bytes("original", len(image_bytes))
+                logger.debug("✅ URL is accessible (%s bytes fetched)", len(image_bytes))
+            except (requests.exceptions.RequestException, DownloadRejected) as e:
                 raise Exception(f"Cannot access image URL: {e}")
         else:
-            print("📁 Input detected as local file path")
+            logger.debug("📁 Input detected as local file path")
             if not os.path.exists(image_path_or_url):
                 raise FileNotFoundError(f"Image file not found at {image_path_or_url}")
-            print("✅ Local file exists")
+            logger.debug("✅ Local file exists")
+            with open(image_path_or_url, "rb") as image_file:
+                image_bytes = image_file.read()
+            image_hash = content_hash(image_bytes)
+            metrics.add_bytes("original", len(image_bytes))
+        
+        # The comparison source is the in-memory bytes, or a per-analysis temp file in disk mode
+        comparison_source: ImageSource = image_bytes if self.in_memory_images else image_path_or_url
+        temp_path = None
         
         try:
-            # Step 1: Upload image to ImgBB
-            print("📤 Step 1: Uploading to ImgBB...")
-            if is_url:
-                image_url = self.upload_image_url_to_imgbb(image_path_or_url)
-                print(f"✅ Image URL uploaded to ImgBB: {image_url}")
-            else:
-                image_url = self.upload_image_to_imgbb(image_path_or_url)
-                print(f"✅ Image file uploaded to ImgBB: {image_url}")
-            
-            # For comparison purposes, we need a local file path
-            local_image_path = image_path_or_url
-            temp_download = False
+            if is_url and not self.in_memory_images:
+                fd, temp_path = tempfile.mkstemp(prefix="instafacade_original_", suffix=".img")
+                with os.fdopen(fd, "wb") as temp_file:
+                    temp_file.write(image_bytes)
+                comparison_source = temp_path
+                logger.debug("✅ Saved original for comparison: %s", temp_path)
             
-            if is_url:
-                print("📥 Downloading image from URL for comparison...")
-                local_image_path = self.download_image_from_url(image_path_or_url, "temp_original_image.jpg")
-                temp_download = True
-                print(f"✅ Downloaded to: {local_image_path}")
+            cached_result, cache_phash = self._lookup_cached_result(image_bytes, image_hash)
+            if cached_result is not None:
+                return cached_result
             
-            # Step 2: Search with Google Lens
-            print("\n🔎 Step 2: Searching for exact matches with Google Lens...")
-            results = self.search_with_google_lens(image_url)
+            results, cache_phash = self._lookup_known_content(image_bytes, image_hash, cache_phash)
+            if results is None:
+                results = self._run_pipeline(image_path_or_url, image_bytes, comparison_source, is_url, image_hash)
+                self._remember_known_content(image_hash, cache_phash, results)
             
-            # Step 3: Process search results
-            print("\n📊 Step 3: Processing search results...")
+            if self.result_cache is not None and self._is_cacheable(results):
+                self.result_cache.set(image_hash, results, cache_phash)
+            return results
+        
+        except Exception as e:
+            raise Exception(f"Pipeline Error: {e}")
+        finally:
+            self._cleanup_temp_file(temp_path is not None, temp_path)
+    
+    def _lookup_cached_result(self, image_bytes: bytes, image_hash: str) -> Tuple[Optional[Dict[str, Any]], Optional[int]]:
+        """
+        Content-addressed result cache: a hit skips ImgBB, SerpAPI and GPT-4o entirely
+        
+        Returns:
+            The cached result (or None) and the perceptual hash to store a new result under
+        """
+        if self.result_cache is None:
+            return None, None
+        
+        with metrics.span("cache_lookup"):
+            cache_phash = self._cache_perceptual_hash(image_bytes)
+            cached_result = self.result_cache.lookup(image_hash, cache_phash)
+        metrics.incr("cache.result_hit" if cached_result is not None else "cache.result_miss")
+        if cached_result is not None:
+            logger.info("⚡ Cache hit (%s) - reusing previous verdict", cached_result['cache_match'])
+        return cached_result, cache_phash
+    
+    def _lookup_known_content(self, image_bytes: bytes, image_hash: str, phash: Optional[int]) -> Tuple[Optional[Dict[str, Any]], Optional[int]]:
+        """
+        Known stolen content: a repost of an image already confirmed as stolen needs no API calls
+        
+        Returns:
+            A "deception detected" result (or None) and the perceptual hash of the image
+        """
+        if self.known_content is None:
+            return None, phash
+        
+        with metrics.span("known_content_lookup"):
+            if phash is None:
+                phash = self._perceptual_hash(image_bytes)
+            known = self.known_content.lookup(image_hash, phash)
+        metrics.incr("known_content_hit" if known is not None else "known_content_miss")
+        if known is None:
+            return None, phash
+        
+        logger.info("🚨 DECEPTION DETECTED! Image matches known stolen content (pHash distance %s)", known['distance'])
+        logger.info("Matching image source: %s", known.get('matching_source', 'Unknown'))
+        distance = known.pop("distance")
+        return {
+            "deception_detected": True,
+            **known,
+            "images_analyzed": 0,
+            "decided_by": "known_content_index",
+            "model_comparisons": 0,
+            "known_content_distance": distance
+        }, phash
+    
+    def _remember_known_content(self, image_hash: str, phash: Optional[int], results: Dict[str, Any]):
+        """Index an image the pipeline has just confirmed as stolen"""
+        if self.known_content is None or not results.get("deception_detected"):
+            return
+        verdict = {
+            key: results[key]
+            for key in ("matching_image_index", "matching_source", "matching_title", "total_matches_found", "confidence")
+            if key in results
+        }
+        self.known_content.add(image_hash, phash, verdict)
+    
+    def _run_pipeline(self, image_path_or_url: str, image_bytes: bytes, comparison_source: ImageSource, is_url: bool, image_hash: str) -> Dict[str, Any]:
+        """Run upload, reverse search, download and comparison for an image that is not cached"""
+        results = self._cached_lens_results(image_hash)
+        
+        if results is not None:
+            logger.info("⚡ Google Lens cache hit - skipping ImgBB upload and reverse search")
+        else:
+            if is_url and self.lens_use_source_url:
+                # Public URLs can be searched directly; only re-host if Lens cannot fetch them
+                logger.info("🔎 Step 2: Searching for exact matches with Google Lens (original URL)...")
+                results = self.search_with_google_lens(image_path_or_url)
+                miss = self._source_url_miss(results)
+                if miss:
+                    # Not cached: the uploaded bytes may well have matches
+                    logger.warning("⚠️ Google Lens could not use the original URL (%s) - retrying with the uploaded image", miss)
+                    results = None
             
-            if "exact_matches" in results and results["exact_matches"]:
-                exact_matches = results["exact_matches"]
-                print(f"Found {len(exact_matches)} total matches")
-                
-                first_5_matches = exact_matches[:self.max_matches_to_check]
-                print(f"Processing first {len(first_5_matches)} matches...")
-                
-                # Extract thumbnail URLs
-                thumbnail_urls = []
-                for i, match in enumerate(first_5_matches, 1):
-                    if 'thumbnail' in match:
-                        thumbnail_urls.append(match['thumbnail'])
-                        print(f"Match {i}: {match.get('title', 'N/A')} - {match.get('source', 'N/A')}")
-                    else:
-                        print(f"Match {i}: No thumbnail available")
-                
-                if not thumbnail_urls:
-                    self._cleanup_temp_file(temp_download, local_image_path)
-                    return {
-                        "deception_detected": False,
-                        "reason": "No thumbnail URLs found for comparison",
-                        "matches_found": len(exact_matches)
-                    }
-                
-                # Step 4: Download images
-                print(f"\n⬇️ Step 4: Downloading {len(thumbnail_urls)} images...")
-                downloaded_files = self.download_multiple_files(thumbnail_urls)
-                
-                if not downloaded_files:
-                    self._cleanup_temp_file(temp_download, local_image_path)
-                    return {
-                        "deception_detected": False,
-                        "reason": "No images were successfully downloaded",
-                        "matches_found": len(exact_matches)
-                    }
+            if results is None:
+                # Step 1: Upload image to ImgBB
+                logger.info("📤 Step 1: Uploading to ImgBB...")
+                image_url = self.upload_image_bytes_to_imgbb(image_bytes)
+                logger.info("✅ Image %s uploaded to ImgBB: %s", 'URL' if is_url else 'file', image_url)
                 
-                print(f"✅ Successfully downloaded {len(downloaded_files)} images")
+                # Step 2: Search with Google Lens
+                logger.info("🔎 Step 2: Searching for exact matches with Google Lens...")
+                results = self.search_with_google_lens(image_url)
+            
+            self._store_lens_results(image_hash, results)
+        
+        selection = self._select_matches(results, self._image_size(image_bytes))
+        if "deception_detected" in selection:
+            return selection
+        exact_matches = selection["exact_matches"]
+        
+        # Decoded once and shared by the pre-filter and the scorer in every wave
+        original_pixels = self._decode_pixels(comparison_source)
+        comparison = None
+        scores: Dict[int, CandidateScore] = {}
+        waves = selection["waves"]
+        for wave_number, wave in enumerate(waves, 1):
+            # Step 4: Download images
+            logger.info("⬇️ Step 4: Downloading %s images (wave %s/%s)...", len(wave), wave_number, len(waves))
+            downloads = self.download_multiple_files([ranked.match["thumbnail"] for ranked in wave], keep_failed=True)
+            candidates = [
+                (ranked.match_index, download)
+                for ranked, download in zip(wave, downloads)
+                if download is not None
+            ]
+            
+            try:
+                if not candidates:
+                    continue
+                logger.info("✅ Successfully downloaded %s images", len(candidates))
+                candidate_pixels = self._decode_candidates(candidates)
+                scores.update(self._score_candidates(original_pixels, candidate_pixels))
                 
                 # Step 5: Compare images
-                print(f"\n🤖 Step 5: AI Analysis - Comparing with original image...")
-                print("="*60)
-                
-                for i, downloaded_image in enumerate(downloaded_files, 1):
-                    print(f"\n🔍 Analyzing image {i}/{len(downloaded_files)}: {os.path.basename(downloaded_image)}")
-                    
-                    try:
-                        result = self.compare_images_for_lying(local_image_path, downloaded_image)
-                        print(f"📊 Comparison result: {result}")
-                        
-                        if result == "YES":
-                            print(f"\n🚨 DECEPTION DETECTED!")
-                            print(f"Image {i} matches the original - person is likely LYING about their story!")
-                            print(f"Matching image source: {first_5_matches[i-1].get('source', 'Unknown')}")
-                            print(f"Matching image title: {first_5_matches[i-1].get('title', 'N/A')}")
-                            
-                            self._cleanup_temp_file(temp_download, local_image_path)
-                            
-                            return {
-                                "deception_detected": True,
-                                "matching_image_index": i,
-                                "matching_source": first_5_matches[i-1].get('source', 'Unknown'),
-                                "matching_title": first_5_matches[i-1].get('title', 'N/A'),
-                                "total_matches_found": len(exact_matches),
-                                "images_analyzed": i
-                            }
-                        else:
-                            print(f"✅ Image {i} is different - continuing analysis...")
-                            
-                    except Exception as e:
-                        print(f"❌ Error analyzing image {i}: {e}")
-                        continue
-                
-                self._cleanup_temp_file(temp_download, local_image_path)
-                
-                return {
-                    "deception_detected": False,
-                    "reason": "No matching images found in analysis",
-                    "total_matches_found": len(exact_matches),
-                    "images_analyzed": len(downloaded_files)
-                }
-                
-            else:
-                print("✅ No exact matches found in reverse search")
-                self._cleanup_temp_file(temp_download, local_image_path)
+                logger.info("🤖 Step 5: AI Analysis - Comparing with original image...")
+                comparison = self._merge_comparisons(
+                    comparison, self._compare_candidates(comparison_source, candidates, original_pixels, candidate_pixels), wave_number
+                )
+            finally:
+                if self.in_memory_images:
+                    # Downloads only touch the disk when they were spilled to a temporary file
+                    for download in downloads:
+                        if isinstance(download, str):
+                            self._cleanup_temp_file(True, download)
+            
+            if comparison["match_index"] is not None:
+                break
+        
+        if comparison is None:
+            return {
+                "deception_detected": False,
+                "reason": "No images were successfully downloaded",
+                "matches_found": len(exact_matches)
+            }
+        return self._build_report(comparison, exact_matches, len(exact_matches), scores)
+    
+    def _image_size(self, image_bytes: bytes) -> Optional[Tuple[int, int]]:
+        """Width and height of the original from its header, for ranking Lens matches"""
+        try:
+            with Image.open(io.BytesIO(image_bytes)) as image:
+                return image.size
+        except Exception:
+            return None
+    
+    def _select_matches(self, results: Dict[str, Any], original_size: Optional[Tuple[int, int]] = None) -> Dict[str, Any]:
+        """
+        Step 3: rank the matches and plan which ones to check
+        
+        Returns:
+            A final "no deception" result when there is nothing to compare, otherwise
+            exact_matches and waves (lists of RankedMatch, best first)
+        """
+        logger.info("📊 Step 3: Processing search results...")
+        
+        if not results.get("exact_matches"):
+            logger.info("✅ No exact matches found in reverse search")
+            return {
+                "deception_detected": False,
+                "reason": "No exact matches found in reverse search",
+                "total_matches_found": 0
+            }
+        
+        exact_matches = results["exact_matches"]
+        logger.debug("Found %s total matches", len(exact_matches))
+        
+        with metrics.span("rank", matches=len(exact_matches)):
+            ranked = self.match_ranker.rank(exact_matches, original_size)
+        if not ranked:
+            return {
+                "deception_detected": False,
+                "reason": "No thumbnail URLs found for comparison",
+                "matches_found": len(exact_matches)
+            }
+        
+        waves = self.match_ranker.plan(ranked, self.max_matches_to_check)
+        for ranked_match in (ranked_match for wave in waves for ranked_match in wave):
+            logger.debug("Match %s (score %.2f): %s - %s", ranked_match.match_index, ranked_match.score,
+                         ranked_match.match.get('title', 'N/A'), ranked_match.match.get('source', 'N/A'))
+        logger.info("🎯 Checking up to %s of %s matches, best first", sum(len(wave) for wave in waves), len(exact_matches))
+        
+        return {"exact_matches": exact_matches, "waves": waves}
+    
+    def _merge_comparisons(self, total: Optional[Dict[str, Any]], comparison: Dict[str, Any], waves: int) -> Dict[str, Any]:
+        """Add one wave's comparison outcome to the running total"""
+        if total is None:
+            total = dict(comparison)
+        else:
+            for key in ("images_analyzed", "model_comparisons", "errors"):
+                total[key] += comparison[key]
+            total.update(match_index=comparison["match_index"], decided_by=comparison["decided_by"])
+        total["waves"] = waves
+        return total
+    
+    def _build_report(self, comparison: Dict[str, Any], exact_matches: list, total_matches: int, scores: Optional[Dict[int, CandidateScore]] = None) -> Dict[str, Any]:
+        """
+        Turn a comparison outcome into the final result dictionary
+        
+        With candidate scores, "confidence" is the similarity of the matching candidate for a
+        detection, or one minus the best candidate's similarity when nothing matched.
+        """
+        scores = scores or {}
+        scoring = {"candidate_scores": scores_as_dicts(scores)} if scores else {}
+        
+        if comparison["match_index"] is not None:
+            match_index = comparison["match_index"]
+            match = exact_matches[match_index - 1]
+            logger.info("🚨 DECEPTION DETECTED!")
+            logger.info("Image %s matches the original - person is likely LYING about their story!", match_index)
+            logger.info("Matching image source: %s", match.get('source', 'Unknown'))
+            logger.info("Matching image title: %s", match.get('title', 'N/A'))
+            if match_index in scores:
+                scoring["confidence"] = scores[match_index].confidence
+            
+            return {
+                "deception_detected": True,
+                "matching_image_index": match_index,
+                "matching_source": match.get('source', 'Unknown'),
+                "matching_title": match.get('title', 'N/A'),
+                "total_matches_found": total_matches,
+                "images_analyzed": comparison["images_analyzed"],
+                "decided_by": comparison["decided_by"],
+                "model_comparisons": comparison["model_comparisons"],
+                "match_waves": comparison["waves"],
+                **scoring
+            }
+        
+        best = best_candidate(scores)
+        if best is not None:
+            scoring["confidence"] = round(1 - best.confidence, 4)
+        return {
+            "deception_detected": False,
+            "reason": "No matching images found in analysis",
+            "total_matches_found": total_matches,
+            "images_analyzed": comparison["images_analyzed"],
+            "model_comparisons": comparison["model_comparisons"],
+            "comparison_errors": comparison["errors"],
+            "match_waves": comparison["waves"],
+            **scoring
+        }
+    
+    def _is_cacheable(self, results: Dict[str, Any]) -> bool:
+        """Only cache verdicts that were not affected by transient download or comparison failures"""
+        if results.get("reason") == "No images were successfully downloaded":
+            return False
+        return not results.get("comparison_errors")
+    
+    def _cache_perceptual_hash(self, image_source: ImageSource) -> Optional[int]:
+        """Perceptual hash for near-duplicate result cache lookups, if enabled"""
+        if self.result_cache.near_duplicate_distance <= 0:
+            return None
+        return self._perceptual_hash(image_source)
+    
+    def _perceptual_hash(self, image_source: ImageSource) -> Optional[int]:
+        """pHash of the original for near-duplicate lookups, or None if the image cannot be decoded"""
+        try:
+            return perceptual_hash(open_image(image_source))
+        except Exception as e:
+            logger.warning("⚠️ Could not compute perceptual hash for cache lookup: %s", e)
+            return None
+    
+    def _compare_candidates(self, original_image: ImageSource, candidates: list, original_pixels: Optional[np.ndarray] = None,
+                            candidate_pixels: Optional[Dict[int, np.ndarray]] = None) -> Dict[str, Any]:
+        """
+        Compare downloaded candidates against the original image
+        
+        Candidates are (match_index, image) pairs where image is bytes or a local path;
+        original_pixels and candidate_pixels are their decoded grids (see _decode_pixels). The local
+        pre-filter runs first; the ambiguous remainder goes to GPT-4o in groups of
+        self.comparison_batch_size, either one group after another or concurrently when
+        self.parallel_comparisons is set. Both modes stop at the first YES.
+        
+        Returns:
+            Dictionary with the matching match_index (or None), images_analyzed,
+            decided_by, model_comparisons (vision requests) and errors
+        """
+        with metrics.span("prefilter", candidates=len(candidates)):
+            outcome, ambiguous = self._prefilter_candidates(original_pixels, candidates, candidate_pixels)
+        metrics.incr("prefilter_decided", outcome["images_analyzed"])
+        if not ambiguous:
+            return outcome
+        
+        # Prepare the original once instead of re-encoding it for every comparison
+        try:
+            original_image = self.prepare_vision_image(original_image)
+        except Exception as e:
+            logger.warning("⚠️ Could not preprocess original image: %s", e)
+        
+        groups = self._comparison_groups(ambiguous)
+        
+        if self.parallel_comparisons and len(groups) > 1:
+            return self._compare_with_model_parallel(original_image, groups, outcome)
+        
+        for group in groups:
+            logger.debug("🔍 AI comparison for image(s) %s", [match_index for match_index, _ in group])
+            try:
+                verdicts, requests_made = self._compare_group(original_image, group)
+            except Exception as e:
+                self._record_group_error(outcome, group, e)
+                continue
+            
+            if self._record_group_verdicts(outcome, group, verdicts, requests_made):
+                return outcome
+        
+        return outcome
+    
+    def _prefilter_candidates(self, original_pixels: Optional[np.ndarray], candidates: list,
+                              candidate_pixels: Optional[Dict[int, np.ndarray]]) -> Tuple[Dict[str, Any], list]:
+        """
+        Run the local pre-filter over the candidates, using their decoded pixel grids
+        
+        Returns:
+            The comparison outcome so far and the ambiguous candidates still needing GPT-4o
+            (empty when the pre-filter already found a duplicate)
+        """
+        original_signature = self._compute_signature(original_pixels)
+        candidate_pixels = candidate_pixels or {}
+        outcome = {"match_index": None, "images_analyzed": 0, "decided_by": None, "model_comparisons": 0, "errors": 0}
+        ambiguous = []
+        
+        for i, (match_index, candidate) in enumerate(candidates, 1):
+            logger.debug("🔍 Pre-filtering image %s/%s: %s", i, len(candidates), self._describe_source(candidate))
+            local_verdict = self._local_prefilter_verdict(original_signature, candidate_pixels.get(match_index))
+            
+            if local_verdict == LocalSimilarityFilter.AMBIGUOUS:
+                ambiguous.append((match_index, candidate))
+                continue
+            
+            outcome["images_analyzed"] += 1
+            if local_verdict == LocalSimilarityFilter.DUPLICATE:
+                logger.debug("📊 Comparison result: YES (decided by local_prefilter)")
+                outcome.update(match_index=match_index, decided_by="local_prefilter")
+                return outcome, []
+            logger.info("✅ Image %s is clearly different - skipping AI comparison", match_index)
+        
+        return outcome, ambiguous
+    
+    def _comparison_groups(self, ambiguous: list) -> list:
+        """Split ambiguous candidates into groups of self.comparison_batch_size"""
+        size = self.comparison_batch_size
+        return [ambiguous[i:i + size] for i in range(0, len(ambiguous), size)]
+    
+    def _record_group_error(self, outcome: Dict[str, Any], group: list, error: Exception):
+        """Count a failed comparison group in the outcome"""
+        logger.warning("❌ Error analyzing image(s) %s: %s", [match_index for match_index, _ in group], error)
+        outcome["errors"] += len(group)
+        outcome["images_analyzed"] += len(group)
+    
+    def _compare_with_model_parallel(self, original_image: Union[ImageSource, VisionImage], groups: list, outcome: Dict[str, Any]) -> Dict[str, Any]:
+        """Run GPT-4o comparison groups concurrently, returning at the first YES and cancelling the rest"""
+        workers = max(1, min(self.max_comparison_workers, len(groups)))
+        logger.info("⚡ Running %s AI comparison requests with %s workers", len(groups), workers)
+        
+        executor = ThreadPoolExecutor(max_workers=workers)
+        try:
+            futures = {
+                executor.submit(contextvars.copy_context().run, self._compare_group, original_image, group): group
+                for group in groups
+            }
+            
+            for future in as_completed(futures):
+                group = futures[future]
+                try:
+                    verdicts, requests_made = future.result()
+                except Exception as e:
+                    self._record_group_error(outcome, group, e)
+                    continue
                 
-                return {
-                    "deception_detected": False,
-                    "reason": "No exact matches found in reverse search",
-                    "total_matches_found": 0
-                }
+                if self._record_group_verdicts(outcome, group, verdicts, requests_made):
+                    return outcome
+            
+            return outcome
+        finally:
+            # Drop queued comparisons; calls already in flight finish in the background and are ignored
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _compare_group(self, original_image: Union[ImageSource, VisionImage], group: list) -> Tuple[Dict[int, str], int]:
+        """Compare one group of candidates, returning verdicts by match index and the number of vision requests made"""
+        with metrics.span("compare", candidates=[match_index for match_index, _ in group]):
+            if len(group) == 1:
+                match_index, candidate = group[0]
+                return {match_index: self.compare_images_for_lying(original_image, candidate)}, 1
+            
+            return self._compare_batch_counted(original_image, group)
+    
+    def _record_group_verdicts(self, outcome: Dict[str, Any], group: list, verdicts: Dict[int, str], requests_made: int) -> bool:
+        """Fold one group's verdicts into the outcome; returns True when a YES was found"""
+        outcome["model_comparisons"] += requests_made
+        outcome["images_analyzed"] += len(group)
         
+        matches = sorted(match_index for match_index, _ in group if verdicts.get(match_index) == "YES")
+        for match_index, _ in group:
+            logger.debug("📊 Comparison result for image %s: %s (decided by gpt-4o)", match_index, verdicts.get(match_index))
+        
+        if matches:
+            outcome.update(match_index=matches[0], decided_by="gpt-4o")
+            return True
+        return False
+    
+    def _decode_pixels(self, image: ImageSource) -> Optional[np.ndarray]:
+        """Pixel grid shared by the pre-filter and the scorer, or None when both are off or the image cannot be decoded"""
+        if not self.enable_local_prefilter and self.candidate_scorer is None:
+            return None
+        pixels = decode_pixels(image)
+        if pixels is None:
+            logger.warning("⚠️ Local similarity checks unavailable for %s: image could not be decoded", self._describe_source(image))
+        return pixels
+    
+    def _decode_candidates(self, candidates: list) -> Dict[int, np.ndarray]:
+        """Decode every candidate once; the ones that fail are left out"""
+        with metrics.span("decode", candidates=len(candidates)):
+            decoded = {match_index: self._decode_pixels(image) for match_index, image in candidates}
+        return {match_index: pixels for match_index, pixels in decoded.items() if pixels is not None}
+    
+    def _score_candidates(self, original_pixels: Optional[np.ndarray], candidate_pixels: Dict[int, np.ndarray]) -> Dict[int, CandidateScore]:
+        """Similarity scores by match index from the vectorized scorer, or {} when scoring is off or fails"""
+        if self.candidate_scorer is None or original_pixels is None:
+            return {}
+        try:
+            with metrics.span("score", candidates=len(candidate_pixels)):
+                scores = self.candidate_scorer.score(original_pixels, candidate_pixels)
         except Exception as e:
-            if 'temp_download' in locals() and temp_download and 'local_image_path' in locals() and os.path.exists(local_image_path):
-                os.remove(local_image_path)
-                print(f"🧹 Cleaned up temporary file after error: {local_image_path}")
-            raise Exception(f"Pipeline Error: {e}")
+            logger.warning("⚠️ Candidate scoring failed: %s", e)
+            return {}
+        for score in scores.values():
+            logger.debug("📐 Image %s similarity %.2f (pHash %s, SSIM %.2f, NCC %.2f)",
+                         score.match_index, score.confidence, score.phash_distance, score.ssim, score.ncc)
+        return scores
+    
+    def _compute_signature(self, pixels: Optional[np.ndarray]) -> Optional[Dict[str, Any]]:
+        """Local similarity signature of a decoded image, or None if the pre-filter is off or there is no image"""
+        if not self.enable_local_prefilter or pixels is None:
+            return None
+        return self.similarity_filter.signature(pixels)
+    
+    def _local_prefilter_verdict(self, original_signature: Optional[Dict[str, Any]], candidate_pixels: Optional[np.ndarray]) -> str:
+        """Classify a candidate locally; anything that cannot be decided on-CPU is ambiguous"""
+        if original_signature is None:
+            return LocalSimilarityFilter.AMBIGUOUS
+        
+        candidate_signature = self._compute_signature(candidate_pixels)
+        if candidate_signature is None:
+            return LocalSimilarityFilter.AMBIGUOUS
+        
+        comparison = self.similarity_filter.compare(original_signature, candidate_signature)
+        logger.debug(
+            "🧮 Local pre-filter: %s (pHash %s, dHash %s, aHash %s, histogram %.2f)",
+            comparison['verdict'], comparison['phash_distance'], comparison['dhash_distance'],
+            comparison['ahash_distance'], comparison['histogram_similarity']
+        )
+        return comparison["verdict"]
+    
+    def _describe_source(self, source: ImageSource) -> str:
+        """Short label for an image source in progress output"""
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            return f"<{len(source):,} bytes in memory>"
+        return os.path.basename(source)
     
     def _cleanup_temp_file(self, temp_download: bool, local_image_path: str):
         """Clean up temporary file if needed"""
         if temp_download and os.path.exists(local_image_path):
             os.remove(local_image_path)
-            print(f"🧹 Cleaned up temporary file: {local_image_path}")
+            logger.debug("🧹 Cleaned up temporary file: %s", local_image_path)
     
     def print_final_verdict(self, results: Dict[str, Any]):
         """Print the final verdict based on analysis results"""
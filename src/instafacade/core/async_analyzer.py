@@ -0,0 +1,610 @@
+"""
+InstaFacade Async Image Analyzer - Non-blocking analysis pipeline for asyncio callers
+"""
+
+import asyncio
+import base64
+import io
+import json
+import logging
+import os
+from typing import Dict, Any, Optional, Tuple, Union
+import aiohttp
+import numpy as np
+from openai import AsyncOpenAI, RateLimitError
+from .analyzer import InstaFacadeAnalyzer
+from .similarity import ImageSource
+from .preprocessing import VisionImage
+from .cache import content_hash
+from .streaming import DownloadRejected, ImageStreamGuard, StreamedImage
+from .rate_limiter import parse_retry_after
+from . import metrics
+from ..utils.http import RETRY_STATUSES
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncInstaFacadeAnalyzer(InstaFacadeAnalyzer):
+    """
+    asyncio version of InstaFacadeAnalyzer for use inside the agent's event loop.
+    
+    Network calls go through aiohttp and AsyncOpenAI, and CPU work (hashing, resizing,
+    cache lookups) runs in worker threads, so an analysis never blocks the loop and
+    several analyses can run concurrently. Configuration, caches and the result schema
+    are shared with the synchronous analyzer. The original image is always compared
+    from memory.
+    """
+    
+    def __init__(self):
+        """Initialize the analyzer with API keys from environment variables"""
+        super().__init__()
+        
+        self.async_openai_client = AsyncOpenAI(
+            api_key=self.openai_api_key,
+            timeout=float(os.getenv('INSTAFACADE_OPENAI_TIMEOUT', '60')),
+            max_retries=self.http_retries
+        )
+        
+        # Created lazily so it binds to the event loop that first uses it
+        self._session: Optional[aiohttp.ClientSession] = None
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+    
+    async def aclose(self):
+        """Close the pooled HTTP session and the OpenAI client"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        await self.async_openai_client.close()
+    
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Shared aiohttp session with keep-alive connection pooling"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.http_pool_size),
+                timeout=aiohttp.ClientTimeout(sock_connect=self.http_timeout[0], sock_read=self.http_timeout[1])
+            )
+        return self._session
+    
+    async def _request(self, method: str, url: str, service: str, read_timeout: Optional[float] = None, stream_image: bool = False, **kwargs) -> Tuple[int, Any]:
+        """
+        Send a request with the same retry policy as the synchronous session:
+        connection errors and 429/5xx responses are retried with exponential backoff,
+        honouring Retry-After
+        
+        Args:
+            service: Rate limiter service consulted before every attempt
+            stream_image: Read a successful body through ImageStreamGuard (size cap, type
+                          sniffing, hashing) and return it as a StreamedImage
+        
+        Returns:
+            Final status code and response body
+        """
+        timeout = None
+        if read_timeout is not None:
+            timeout = aiohttp.ClientTimeout(sock_connect=self.http_timeout[0], sock_read=read_timeout)
+        
+        attempt = 0
+        while True:
+            retry_after = None
+            try:
+                async with self.rate_limiter.acquire_async(service), \
+                        self._get_session().request(method, url, timeout=timeout, **kwargs) as response:
+                    if stream_image and response.status < 400:
+                        return response.status, await self._read_image(url, response)
+                    body = await response.read()
+                    retry_after = response.headers.get("Retry-After")
+                    if response.status == 429:
+                        # Throttled despite the limits: pause the service for every caller
+                        self.rate_limiter.penalize(service, parse_retry_after(retry_after))
+                    if response.status not in RETRY_STATUSES or attempt >= self.http_retries:
+                        return response.status, body
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if attempt >= self.http_retries:
+                    raise
+            
+            await asyncio.sleep(self._retry_delay(attempt, retry_after))
+            attempt += 1
+    
+    def _check_throttled(self, service: str, status_code: int, retry_after: Optional[str]):
+        """A 429 that survived the retries fails this call; _request already paused the service with its Retry-After"""
+        if status_code == 429:
+            raise Exception(f"{service} rate limit exceeded (HTTP 429), backing off")
+    
+    def _retry_delay(self, attempt: int, retry_after: Optional[str]) -> float:
+        """Backoff before the next attempt, preferring a numeric Retry-After header"""
+        delay = parse_retry_after(retry_after)
+        return delay if delay is not None else self.http_backoff * (2 ** attempt)
+    
+    async def _read_image(self, url: str, response: aiohttp.ClientResponse) -> StreamedImage:
+        """Stream a response body through the size cap and type check, hashing as it arrives"""
+        guard = ImageStreamGuard(url, self.max_download_bytes, response.content_length)
+        buffer = io.BytesIO()
+        async for chunk in response.content.iter_chunked(self.chunk_size):
+            guard.feed(chunk)
+            buffer.write(chunk)
+        return StreamedImage(buffer.getvalue(), guard.finish(), guard.mime_type)
+    
+    async def _get_ok(self, url: str, read_timeout: Optional[float] = None, **kwargs) -> StreamedImage:
+        """GET an image URL through the stream checks, raising on HTTP errors"""
+        status, body = await self._request("GET", url, "download", read_timeout=read_timeout, stream_image=True, **kwargs)
+        if status >= 400:
+            raise Exception(f"HTTP {status} for {url}")
+        return body
+    
+    async def upload_image_to_imgbb(self, image_path: str) -> str:
+        """Upload image file to ImgBB to get a temporary URL"""
+        return await self.upload_image_bytes_to_imgbb(await asyncio.to_thread(self._read_file, image_path))
+    
+    async def upload_image_url_to_imgbb(self, image_url: str) -> str:
+        """Upload image from URL to ImgBB to get a temporary URL"""
+        return await self.upload_image_bytes_to_imgbb(await self.fetch_image_bytes(image_url))
+    
+    async def upload_image_bytes_to_imgbb(self, image_bytes: bytes) -> str:
+        """Upload raw image bytes to ImgBB to get a temporary URL"""
+        with metrics.span("upload"):
+            metrics.incr("api_calls.imgbb")
+            metrics.add_bytes("uploaded", len(image_bytes))
+            status, body = await self._request("POST", self.imgbb_upload_url, "imgbb", data=self._imgbb_payload(image_bytes))
+        self._check_throttled("imgbb", status, None)
+        if status == 200:
+            return self._parse_json(body)['data']['url']
+        else:
+            raise Exception(f"Upload failed: {body.decode('utf-8', 'replace')}")
+    
+    async def fetch_image_bytes(self, image_url: str) -> bytes:
+        """Fetch an image URL into memory"""
+        return (await self.fetch_image(image_url)).data
+    
+    async def fetch_image(self, image_url: str) -> StreamedImage:
+        """Stream an image URL into memory with the size cap and type check, hashing it on the way"""
+        return await self._get_ok(image_url)
+    
+    async def search_with_google_lens(self, image_url: str, content_key: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Search for exact matches using SerpAPI Google Lens
+        
+        Args:
+            image_url: Public URL of the image to search for
+            content_key: Content hash of the image; when given, responses are served from and stored in the Lens cache
+        """
+        cached_results = await asyncio.to_thread(self._cached_lens_results, content_key) if content_key else None
+        if cached_results is not None:
+            logger.info("⚡ Google Lens cache hit")
+            return cached_results
+        
+        with metrics.span("lens_search"):
+            metrics.incr("api_calls.serpapi")
+            status, body = await self._request("GET", self.serpapi_search_url, "serpapi", params=self._lens_params(image_url))
+        self._check_throttled("serpapi", status, None)
+        try:
+            results = self._parse_json(body)
+        except ValueError:
+            raise Exception(f"Google Lens search failed: HTTP {status} {body[:200].decode('utf-8', 'replace')}")
+        
+        if content_key:
+            await asyncio.to_thread(self._store_lens_results, content_key, results)
+        return results
+    
+    async def download_file_from_url(self, url: str, local_path: Optional[str] = None, show_progress: bool = True) -> str:
+        """Download a file from a URL and save it locally"""
+        try:
+            logger.debug("Starting download from: %s", url)
+            data = (await self._get_ok(url, read_timeout=self.download_timeout)).data
+            metrics.add_bytes("downloaded", len(data))
+            
+            if local_path is None:
+                filename = url.split('/')[-1]
+                if '?' in filename:
+                    filename = filename.split('?')[0]
+                if not filename or '.' not in filename:
+                    filename = "downloaded_file"
+                local_path = filename
+            
+            logger.debug("Downloading to: %s", local_path)
+            if show_progress:
+                logger.debug("File size: %s bytes (%.2f MB)", len(data), len(data) / (1024*1024))
+            await asyncio.to_thread(self._write_file, local_path, data)
+            
+            logger.debug("✅ Download completed successfully!")
+            logger.debug("File saved to: %s", os.path.abspath(local_path))
+            
+            return local_path
+        
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise Exception(f"Download failed: {e}")
+        except DownloadRejected as e:
+            raise Exception(f"Download rejected: {e}")
+        except IOError as e:
+            raise Exception(f"Failed to save file: {e}")
+    
+    async def download_to_buffer(self, url: str) -> bytes:
+        """Download a file into memory"""
+        try:
+            data = (await self._get_ok(url, read_timeout=self.download_timeout)).data
+            metrics.add_bytes("downloaded", len(data))
+            return data
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise Exception(f"Download failed: {e}")
+        except DownloadRejected as e:
+            raise Exception(f"Download rejected: {e}")
+    
+    async def download_multiple_files(self, urls: list, concurrent: Optional[bool] = None, keep_failed: bool = False) -> list:
+        """
+        Download multiple files from URLs
+        
+        Args:
+            urls: URLs to download
+            concurrent: Download in parallel, at most self.max_download_workers at a time (defaults to self.concurrent_downloads)
+            keep_failed: Keep a None entry for every failed download so results line up with urls
+        
+        Returns:
+            Downloads in the same order as urls: bytes when self.in_memory_images is set,
+            otherwise local paths in self.download_dir
+        """
+        if not self.in_memory_images and not os.path.exists(self.download_dir):
+            os.makedirs(self.download_dir, exist_ok=True)
+            logger.debug("Created directory: %s", self.download_dir)
+        
+        if concurrent is None:
+            concurrent = self.concurrent_downloads
+        
+        workers = max(1, min(self.max_download_workers, len(urls))) if concurrent else 1
+        if workers > 1:
+            logger.info("⚡ Downloading %s files with %s concurrent requests", len(urls), workers)
+        semaphore = asyncio.Semaphore(workers)
+        
+        async def download(i: int, url: str) -> Optional[ImageSource]:
+            async with semaphore:
+                return await self._download_numbered_file(i, url, len(urls), show_progress=workers == 1)
+        
+        results = await asyncio.gather(*(download(i, url) for i, url in enumerate(urls, 1)))
+        downloaded_files = [path for path in results if path is not None]
+        
+        logger.info("📊 Download Summary:")
+        logger.info("✅ Successfully downloaded: %s files", len(downloaded_files))
+        if len(downloaded_files) < len(results):
+            logger.warning("❌ Failed downloads: %s files", len(results) - len(downloaded_files))
+        
+        return list(results) if keep_failed else downloaded_files
+    
+    async def _download_numbered_file(self, i: int, url: str, total: int, show_progress: bool = True) -> Optional[ImageSource]:
+        """Download the i-th file of a batch into memory or the download directory, returning None on failure"""
+        try:
+            logger.debug("📥 Downloading file %s/%s", i, total)
+            
+            with metrics.span("download", index=i):
+                if self.in_memory_images:
+                    return await self.download_to_buffer(url)
+                
+                return await self.download_file_from_url(url, self._numbered_download_path(i, url), show_progress=show_progress)
+        
+        except Exception as e:
+            logger.warning("❌ Failed to download %s: %s", url, e)
+            return None
+    
+    async def download_image_from_url(self, image_url: str, local_path: Optional[str] = None) -> str:
+        """Download an image from URL to local file"""
+        if local_path is None:
+            filename = image_url.split('/')[-1]
+            if '?' in filename:
+                filename = filename.split('?')[0]
+            if not filename or '.' not in filename:
+                filename = f"downloaded_image_{hash(image_url) % 10000}.jpg"
+            local_path = filename
+        
+        return await self.download_file_from_url(image_url, local_path)
+    
+    async def encode_image_to_base64(self, image_path_or_url: ImageSource) -> str:
+        """Encode image bytes, an image file or a URL to base64 string"""
+        return base64.b64encode(await self.load_image_bytes(image_path_or_url)).decode('utf-8')
+    
+    async def load_image_bytes(self, image: ImageSource) -> bytes:
+        """Return the raw bytes of an image given as bytes, a local path or a URL"""
+        if isinstance(image, (bytes, bytearray, memoryview)):
+            return bytes(image)
+        if self._is_url(image):
+            return await self.fetch_image_bytes(image)
+        return await asyncio.to_thread(self._read_file, image)
+    
+    async def prepare_vision_image(self, image: Union[ImageSource, VisionImage]) -> VisionImage:
+        """Decode, orient, downscale and re-encode an image for a vision request"""
+        if isinstance(image, VisionImage):
+            return image
+        
+        data = await self.load_image_bytes(image)
+        with metrics.span("encode"):
+            return await asyncio.to_thread(self._prepare_vision_bytes, data)
+    
+    async def compare_images_for_lying(self, story_image_path: Union[ImageSource, VisionImage], reverse_search_image_path: Union[ImageSource, VisionImage]) -> str:
+        """Compare two images (paths, URLs, bytes or prepared images) using OpenAI GPT-4 Vision to detect if someone is lying"""
+        try:
+            logger.debug("Encoding images for analysis...")
+            story_image, reverse_image = await asyncio.gather(
+                self.prepare_vision_image(story_image_path),
+                self.prepare_vision_image(reverse_search_image_path)
+            )
+            
+            logger.debug("Sending images to OpenAI GPT-4 Vision for analysis...")
+            request = self._pair_comparison_request(story_image, reverse_image)
+            response = await self._create_chat_completion(request, [story_image, reverse_image])
+            
+            result = self._parse_pair_verdict(response.choices[0].message.content)
+            logger.debug("✅ Analysis complete. Result: %s", result)
+            return result
+        
+        except Exception as e:
+            raise Exception(f"Image comparison failed: {e}")
+    
+    async def _create_chat_completion(self, request: Dict[str, Any], images: list):
+        """Send a vision request once the OpenAI request and token budgets allow it"""
+        estimated_tokens = self._estimate_request_tokens(request, images)
+        async with self.rate_limiter.acquire_async("openai", estimated_tokens):
+            metrics.incr("api_calls.openai")
+            metrics.incr("openai_tokens_estimated", estimated_tokens)
+            try:
+                return await self.async_openai_client.chat.completions.create(**request)
+            except RateLimitError as e:
+                self.rate_limiter.penalize("openai", parse_retry_after(e.response.headers.get("retry-after")))
+                raise
+    
+    async def compare_images_batch(self, story_image_path: Union[ImageSource, VisionImage], candidates: list) -> Dict[int, str]:
+        """
+        Compare the original against several candidates in a single GPT-4o request
+        
+        Args:
+            story_image_path: The original story image
+            candidates: (match_index, image) pairs
+        
+        Returns:
+            Dictionary mapping each match_index to "YES" or "NO", re-checking unanswered candidates pairwise
+        """
+        return (await self._compare_batch_counted(story_image_path, candidates))[0]
+    
+    async def _compare_batch_counted(self, story_image_path: Union[ImageSource, VisionImage], candidates: list) -> Tuple[Dict[int, str], int]:
+        """compare_images_batch that also returns the number of vision requests made, including fallbacks"""
+        requests_made = 0
+        try:
+            logger.debug("Encoding %s images for batched analysis...", len(candidates) + 1)
+            story_image, *prepared = await asyncio.gather(
+                self.prepare_vision_image(story_image_path),
+                *(self.prepare_vision_image(image) for _, image in candidates)
+            )
+            candidate_images = [(match_index, image) for (match_index, _), image in zip(candidates, prepared)]
+            
+            logger.debug("Sending %s candidates to OpenAI GPT-4 Vision in one request...", len(candidate_images))
+            requests_made += 1
+            request = self._batch_comparison_request(story_image, candidate_images)
+            response = await self._create_chat_completion(request, [story_image] + [image for _, image in candidate_images])
+            verdicts = self._parse_batch_verdicts(response.choices[0].message.content, candidate_images)
+        
+        except Exception as e:
+            logger.warning("⚠️ Batched comparison failed, falling back to pairwise requests: %s", e)
+            story_image, candidate_images, verdicts = story_image_path, candidates, {}
+        
+        for match_index, candidate_image in candidate_images:
+            if match_index not in verdicts:
+                requests_made += 1
+                verdicts[match_index] = await self.compare_images_for_lying(story_image, candidate_image)
+        
+        logger.debug("✅ Batched analysis complete. Results: %s", verdicts)
+        return verdicts, requests_made
+    
+    async def analyze_image(self, image_path_or_url: str) -> Dict[str, Any]:
+        """Main pipeline to analyze an image for authenticity, with compact "metrics" in the result"""
+        with metrics.collect_metrics() as pipeline_metrics:
+            results = None
+            try:
+                results = await self._analyze_image(image_path_or_url)
+                return results
+            finally:
+                summary = metrics.emit_metrics(pipeline_metrics, results)
+                if results is not None:
+                    results["metrics"] = summary if self.full_result_metrics else metrics.compact_summary(summary)
+    
+    async def _analyze_image(self, image_path_or_url: str) -> Dict[str, Any]:
+        """analyze_image without the metrics bookkeeping"""
+        is_url = self._is_url(image_path_or_url)
+        
+        logger.info("🔍 Starting InstaFacade Analysis Pipeline")
+        logger.debug("Original image %s: %s", 'URL' if is_url else 'path', image_path_or_url)
+        
+        # Fetch the original exactly once; the bytes are reused for hashing, re-hosting and comparison
+        if is_url:
+            logger.debug("🌐 Input detected as URL")
+            try:
+                with metrics.span("fetch_original"):
+                    original = await self.fetch_image(image_path_or_url)
+                image_bytes, image_hash = original.data, original.sha256
+                metrics.add_bytes("original", len(image_bytes))
+                logger.debug("✅ URL is accessible (%s bytes fetched)", len(image_bytes))
+            except Exception as e:
+                raise Exception(f"Cannot access image URL: {e}")
+        else:
+            logger.debug("📁 Input detected as local file path")
+            if not os.path.exists(image_path_or_url):
+                raise FileNotFoundError(f"Image file not found at {image_path_or_url}")
+            logger.debug("✅ Local file exists")
+            image_bytes = await asyncio.to_thread(self._read_file, image_path_or_url)
+            image_hash = content_hash(image_bytes)
+            metrics.add_bytes("original", len(image_bytes))
+        
+        try:
+            cached_result, cache_phash = await asyncio.to_thread(self._lookup_cached_result, image_bytes, image_hash)
+            if cached_result is not None:
+                return cached_result
+            
+            results, cache_phash = await asyncio.to_thread(self._lookup_known_content, image_bytes, image_hash, cache_phash)
+            if results is None:
+                results = await self._run_pipeline(image_path_or_url, image_bytes, image_bytes, is_url, image_hash)
+                await asyncio.to_thread(self._remember_known_content, image_hash, cache_phash, results)
+            
+            if self.result_cache is not None and self._is_cacheable(results):
+                await asyncio.to_thread(self.result_cache.set, image_hash, results, cache_phash)
+            return results
+        
+        except Exception as e:
+            raise Exception(f"Pipeline Error: {e}")
+    
+    async def _run_pipeline(self, image_path_or_url: str, image_bytes: bytes, comparison_source: ImageSource, is_url: bool, image_hash: str) -> Dict[str, Any]:
+        """Run upload, reverse search, download and comparison for an image that is not cached"""
+        results = await asyncio.to_thread(self._cached_lens_results, image_hash)
+        
+        if results is not None:
+            logger.info("⚡ Google Lens cache hit - skipping ImgBB upload and reverse search")
+        else:
+            if is_url and self.lens_use_source_url:
+                # Public URLs can be searched directly; only re-host if Lens cannot fetch them
+                logger.info("🔎 Step 2: Searching for exact matches with Google Lens (original URL)...")
+                results = await self.search_with_google_lens(image_path_or_url)
+                miss = self._source_url_miss(results)
+                if miss:
+                    # Not cached: the uploaded bytes may well have matches
+                    logger.warning("⚠️ Google Lens could not use the original URL (%s) - retrying with the uploaded image", miss)
+                    results = None
+            
+            if results is None:
+                # Step 1: Upload image to ImgBB
+                logger.info("📤 Step 1: Uploading to ImgBB...")
+                image_url = await self.upload_image_bytes_to_imgbb(image_bytes)
+                logger.info("✅ Image %s uploaded to ImgBB: %s", 'URL' if is_url else 'file', image_url)
+                
+                # Step 2: Search with Google Lens
+                logger.info("🔎 Step 2: Searching for exact matches with Google Lens...")
+                results = await self.search_with_google_lens(image_url)
+            
+            await asyncio.to_thread(self._store_lens_results, image_hash, results)
+        
+        selection = self._select_matches(results, self._image_size(image_bytes))
+        if "deception_detected" in selection:
+            return selection
+        exact_matches = selection["exact_matches"]
+        
+        # Decoded once and shared by the pre-filter and the scorer in every wave
+        original_pixels = await asyncio.to_thread(self._decode_pixels, comparison_source)
+        comparison = None
+        scores = {}
+        waves = selection["waves"]
+        for wave_number, wave in enumerate(waves, 1):
+            # Step 4: Download images
+            logger.info("⬇️ Step 4: Downloading %s images (wave %s/%s)...", len(wave), wave_number, len(waves))
+            downloads = await self.download_multiple_files([ranked.match["thumbnail"] for ranked in wave], keep_failed=True)
+            candidates = [
+                (ranked.match_index, download)
+                for ranked, download in zip(wave, downloads)
+                if download is not None
+            ]
+            if not candidates:
+                continue
+            logger.info("✅ Successfully downloaded %s images", len(candidates))
+            candidate_pixels = await asyncio.to_thread(self._decode_candidates, candidates)
+            scores.update(await asyncio.to_thread(self._score_candidates, original_pixels, candidate_pixels))
+            
+            # Step 5: Compare images
+            logger.info("🤖 Step 5: AI Analysis - Comparing with original image...")
+            comparison = self._merge_comparisons(
+                comparison, await self._compare_candidates(comparison_source, candidates, original_pixels, candidate_pixels), wave_number
+            )
+            if comparison["match_index"] is not None:
+                break
+        
+        if comparison is None:
+            return {
+                "deception_detected": False,
+                "reason": "No images were successfully downloaded",
+                "matches_found": len(exact_matches)
+            }
+        return self._build_report(comparison, exact_matches, len(exact_matches), scores)
+    
+    async def _compare_candidates(self, original_image: ImageSource, candidates: list, original_pixels: Optional[np.ndarray] = None,
+                                  candidate_pixels: Optional[Dict[int, np.ndarray]] = None) -> Dict[str, Any]:
+        """
+        Compare downloaded candidates against the original image
+        
+        Runs the local pre-filter in a worker thread, then sends the ambiguous remainder to
+        GPT-4o in groups of self.comparison_batch_size, stopping at the first YES.
+        """
+        with metrics.span("prefilter", candidates=len(candidates)):
+            outcome, ambiguous = await asyncio.to_thread(self._prefilter_candidates, original_pixels, candidates, candidate_pixels)
+        metrics.incr("prefilter_decided", outcome["images_analyzed"])
+        if not ambiguous:
+            return outcome
+        
+        # Prepare the original once instead of re-encoding it for every comparison
+        try:
+            original_image = await self.prepare_vision_image(original_image)
+        except Exception as e:
+            logger.warning("⚠️ Could not preprocess original image: %s", e)
+        
+        groups = self._comparison_groups(ambiguous)
+        
+        if self.parallel_comparisons and len(groups) > 1:
+            return await self._compare_with_model_parallel(original_image, groups, outcome)
+        
+        for group in groups:
+            logger.debug("🔍 AI comparison for image(s) %s", [match_index for match_index, _ in group])
+            try:
+                verdicts, requests_made = await self._compare_group(original_image, group)
+            except Exception as e:
+                self._record_group_error(outcome, group, e)
+                continue
+            
+            if self._record_group_verdicts(outcome, group, verdicts, requests_made):
+                return outcome
+        
+        return outcome
+    
+    async def _compare_with_model_parallel(self, original_image: Union[ImageSource, VisionImage], groups: list, outcome: Dict[str, Any]) -> Dict[str, Any]:
+        """Run GPT-4o comparison groups concurrently, returning at the first YES and cancelling the rest"""
+        workers = max(1, min(self.max_comparison_workers, len(groups)))
+        logger.info("⚡ Running %s AI comparison requests with %s concurrent requests", len(groups), workers)
+        semaphore = asyncio.Semaphore(workers)
+        
+        async def compare(group: list):
+            async with semaphore:
+                try:
+                    return group, await self._compare_group(original_image, group), None
+                except Exception as e:
+                    return group, None, e
+        
+        tasks = [asyncio.ensure_future(compare(group)) for group in groups]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                group, result, error = await next_done
+                if error is not None:
+                    self._record_group_error(outcome, group, error)
+                    continue
+                
+                if self._record_group_verdicts(outcome, group, *result):
+                    return outcome
+            
+            return outcome
+        finally:
+            # Unlike worker threads, in-flight requests are actually cancelled here
+            for task in tasks:
+                task.cancel()
+    
+    async def _compare_group(self, original_image: Union[ImageSource, VisionImage], group: list) -> Tuple[Dict[int, str], int]:
+        """Compare one group of candidates, returning verdicts by match index and the number of vision requests made"""
+        with metrics.span("compare", candidates=[match_index for match_index, _ in group]):
+            if len(group) == 1:
+                match_index, candidate = group[0]
+                return {match_index: await self.compare_images_for_lying(original_image, candidate)}, 1
+            
+            return await self._compare_batch_counted(original_image, group)
+    
+    def _parse_json(self, body: bytes) -> Any:
+        """Decode a JSON response body, raising ValueError when it is not JSON"""
+        return json.loads(body)
+    
+    def _read_file(self, path: str) -> bytes:
+        with open(path, "rb") as file:
+            return file.read()
+    
+    def _write_file(self, path: str, data: bytes):
+        with open(path, "wb") as file:
+            file.write(data)
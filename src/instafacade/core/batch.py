@@ -0,0 +1,177 @@
+"""
+InstaFacade Batch Analysis - Analyze many images concurrently with a resumable JSON Lines log
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Set
+from .async_analyzer import AsyncInstaFacadeAnalyzer
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".gif", ".bmp", ".heic", ".avif", ".tif", ".tiff")
+
+
+def collect_inputs(source: str) -> List[str]:
+    """
+    Collect the images to analyze from a directory or a list file
+    
+    Args:
+        source: A directory (image files are taken in sorted order) or a text file with
+                one path or URL per line; blank lines and lines starting with # are skipped
+    
+    Returns:
+        Image paths and URLs, without duplicates, in input order
+    """
+    if os.path.isdir(source):
+        inputs = [
+            os.path.join(source, name)
+            for name in sorted(os.listdir(source))
+            if name.lower().endswith(IMAGE_EXTENSIONS) and os.path.isfile(os.path.join(source, name))
+        ]
+    elif os.path.isfile(source):
+        with open(source, "r", encoding="utf-8") as file:
+            inputs = [line.strip() for line in file if line.strip() and not line.lstrip().startswith("#")]
+    else:
+        raise FileNotFoundError(f"Batch input not found: {source}")
+    
+    return list(dict.fromkeys(inputs))
+
+
+def load_checkpoint(output_path: str, retry_errors: bool = True) -> Set[str]:
+    """
+    Read an existing results file and return the inputs that are already done
+    
+    The results file doubles as the checkpoint: the last record for an input wins, and
+    failed inputs are only counted as done when retry_errors is off. A line truncated by
+    an interrupted run is ignored.
+    """
+    if not os.path.exists(output_path):
+        return set()
+    
+    last_status: Dict[str, str] = {}
+    with open(output_path, "r", encoding="utf-8") as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+                last_status[record["input"]] = record["status"]
+            except (ValueError, KeyError, TypeError):
+                continue
+    
+    return {
+        image for image, status in last_status.items()
+        if status == "ok" or not retry_errors
+    }
+
+
+class BatchAnalyzer:
+    """
+    Runs analyze_image over many inputs with a fixed number of concurrent analyses and
+    streams one JSON record per input to the output file as soon as it completes
+    """
+    
+    def __init__(self, analyzer: AsyncInstaFacadeAnalyzer, concurrency: int = 8):
+        """
+        Args:
+            analyzer: Shared async analyzer; its per-service limits apply across all analyses
+            concurrency: Number of images analyzed at the same time
+        """
+        self.analyzer = analyzer
+        self.concurrency = max(1, concurrency)
+    
+    async def run(self, inputs: List[str], output_path: str, resume: bool = True, retry_errors: bool = True) -> Dict[str, Any]:
+        """
+        Analyze every input, appending results to output_path
+        
+        Args:
+            inputs: Image paths and URLs
+            output_path: JSON Lines file that receives one record per completed input
+            resume: Skip inputs that already have a record in output_path
+            retry_errors: When resuming, analyze inputs whose last record is an error again
+        
+        Returns:
+            Summary with counts of analyzed, skipped, failed and deceptive images
+        """
+        done = load_checkpoint(output_path, retry_errors) if resume else set()
+        pending = [image for image in inputs if image not in done]
+        summary = {
+            "total": len(inputs),
+            "skipped": len(inputs) - len(pending),
+            "analyzed": 0,
+            "errors": 0,
+            "deception_detected": 0,
+            "elapsed_seconds": 0.0
+        }
+        
+        logger.info("📦 Batch: %s inputs, %s already done, %s to analyze", len(inputs), summary['skipped'], len(pending))
+        if not pending:
+            return summary
+        
+        directory = os.path.dirname(os.path.abspath(output_path))
+        os.makedirs(directory, exist_ok=True)
+        
+        queue: asyncio.Queue = asyncio.Queue()
+        for image in pending:
+            queue.put_nowait(image)
+        
+        started = time.perf_counter()
+        mode = "a" if resume else "w"
+        with open(output_path, mode, encoding="utf-8") as output:
+            workers = [
+                asyncio.create_task(self._worker(queue, output, summary, len(pending)))
+                for _ in range(min(self.concurrency, len(pending)))
+            ]
+            try:
+                await asyncio.gather(*workers)
+            finally:
+                for worker in workers:
+                    worker.cancel()
+        
+        summary["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+        return summary
+    
+    async def _worker(self, queue: asyncio.Queue, output, summary: Dict[str, Any], total: int):
+        """Take inputs off the queue until it is empty"""
+        while True:
+            try:
+                image = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            
+            record = await self.analyze_one(image)
+            self._write_record(output, record)
+            
+            if record["status"] == "ok":
+                summary["analyzed"] += 1
+                if record["result"].get("deception_detected"):
+                    summary["deception_detected"] += 1
+            else:
+                summary["errors"] += 1
+            
+            completed = summary["analyzed"] + summary["errors"]
+            logger.info(
+                "📝 [%s/%s] %s %s (%.1fs)", completed, total, record['status'].upper(), image, record['elapsed_seconds'],
+                extra={"input": image, "status": record["status"], "elapsed_seconds": record["elapsed_seconds"]}
+            )
+    
+    async def analyze_one(self, image: str) -> Dict[str, Any]:
+        """Analyze a single input and wrap the outcome in a batch record"""
+        started = time.perf_counter()
+        try:
+            result = await self.analyzer.analyze_image(image)
+            record = {"input": image, "status": "ok", "result": result}
+        except Exception as e:
+            record = {"input": image, "status": "error", "error": str(e)}
+        
+        record["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+        record["completed_at"] = datetime.now(timezone.utc).isoformat()
+        return record
+    
+    def _write_record(self, output, record: Dict[str, Any]):
+        """Append one JSON line and flush it so an interrupted run loses at most the line being written"""
+        output.write(json.dumps(record, default=str) + "\n")
+        output.flush()
@@ -0,0 +1,281 @@
+"""
+InstaFacade Cache - Persistent, content-addressed caches for analysis and search results
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+from .similarity import PHASH_BANDS, band_variants, hamming_distance, phash_bands
+
+
+def content_hash(data: bytes) -> str:
+    """SHA-256 hex digest of raw image bytes, used as the cache key"""
+    return hashlib.sha256(data).hexdigest()
+
+
+class PersistentCache:
+    """
+    SQLite-backed JSON cache with a TTL and size-bounded least-recently-used eviction.
+    Several caches can share one database file by using different namespaces.
+    """
+
+    def __init__(self, db_path: str, namespace: str, ttl_seconds: float, max_entries: int):
+        """
+        Args:
+            db_path: Path of the SQLite database file
+            namespace: Logical cache name inside the database
+            ttl_seconds: Entries older than this are treated as missing
+            max_entries: Least recently used entries beyond this count are evicted
+        """
+        self.db_path = db_path
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS cache_entries (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    phash TEXT,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_cache_accessed ON cache_entries (namespace, accessed_at)"
+            )
+            self._add_band_columns()
+
+    def _add_band_columns(self):
+        """
+        Index the pHash as four 16-bit bands so near-duplicate lookups are index seeks
+        (see similarity.phash_bands); databases from before the bands are migrated once.
+        Call with the lock held.
+        """
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(cache_entries)")}
+        missing = [band for band in range(PHASH_BANDS) if f"band{band}" not in columns]
+        for band in missing:
+            self._conn.execute(f"ALTER TABLE cache_entries ADD COLUMN band{band} INTEGER")
+        for band in range(PHASH_BANDS):
+            self._conn.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_cache_band{band} ON cache_entries (namespace, band{band})"
+            )
+        if missing:
+            rows = self._conn.execute(
+                "SELECT namespace, key, phash FROM cache_entries WHERE phash IS NOT NULL"
+            ).fetchall()
+            self._conn.executemany(
+                "UPDATE cache_entries SET band0 = ?, band1 = ?, band2 = ?, band3 = ? WHERE namespace = ? AND key = ?",
+                [(*phash_bands(int(phash, 16)), namespace, key) for namespace, key, phash in rows]
+            )
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for key, or None if missing or expired"""
+        entry = self.get_entry(key)
+        return entry[0] if entry is not None else None
+
+    def get_entry(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Return (value, created_at) for key, or None if missing or expired"""
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, key)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl_seconds:
+                self._conn.execute(
+                    "DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (self.namespace, key)
+                )
+                return None
+            self._conn.execute(
+                "UPDATE cache_entries SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                (now, self.namespace, key)
+            )
+        return json.loads(row[0]), row[1]
+
+    def find_similar(self, phash: int, max_distance: int) -> Optional[Any]:
+        """Return the value of the closest unexpired entry whose perceptual hash is within max_distance"""
+        cutoff = time.time() - self.ttl_seconds
+        radius = max_distance // PHASH_BANDS
+        best = None
+        seen = set()
+        with self._lock:
+            # Only entries sharing a band (within radius bits) can be within max_distance
+            for band, value in enumerate(phash_bands(phash)):
+                variants = band_variants(value, radius)
+                rows = self._conn.execute(
+                    f"SELECT key, phash FROM cache_entries WHERE namespace = ? AND band{band} IN "
+                    f"({', '.join('?' * len(variants))}) AND created_at >= ?",
+                    (self.namespace, *variants, cutoff)
+                )
+                for key, stored_phash in rows:
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    distance = hamming_distance(phash, int(stored_phash, 16))
+                    if distance <= max_distance and (best is None or distance < best[0]):
+                        best = (distance, key)
+
+            if best is None:
+                return None
+            with self._conn:
+                self._conn.execute(
+                    "UPDATE cache_entries SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                    (time.time(), self.namespace, best[1])
+                )
+                row = self._conn.execute(
+                    "SELECT value FROM cache_entries WHERE namespace = ? AND key = ?", (self.namespace, best[1])
+                ).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def set(self, key: str, value: Any, phash: Optional[int] = None):
+        """Store a JSON-serializable value, evicting the least recently used entries over the limit"""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache_entries "
+                "(namespace, key, value, phash, band0, band1, band2, band3, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    self.namespace, key, json.dumps(value), f"{phash:016x}" if phash is not None else None,
+                    *(phash_bands(phash) if phash is not None else [None] * PHASH_BANDS), now, now
+                )
+            )
+            self._conn.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND created_at < ?",
+                (self.namespace, now - self.ttl_seconds)
+            )
+            self._conn.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND key IN ("
+                "SELECT key FROM cache_entries WHERE namespace = ? "
+                "ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.namespace, self.namespace, self.max_entries)
+            )
+
+    def clear(self):
+        """Remove every entry in this namespace"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM cache_entries WHERE namespace = ?", (self.namespace,)
+            ).fetchone()[0]
+
+
+class AnalysisResultCache(PersistentCache):
+    """Caches final analyze_image verdicts keyed by the SHA-256 of the image bytes"""
+
+    def __init__(self, db_path: str, ttl_seconds: float, max_entries: int, near_duplicate_distance: int = 0):
+        """
+        Args:
+            near_duplicate_distance: Maximum pHash distance for a near-duplicate hit (0 disables it)
+        """
+        super().__init__(db_path, "analysis_results", ttl_seconds, max_entries)
+        self.near_duplicate_distance = near_duplicate_distance
+
+    def lookup(self, key: str, phash: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Look up a verdict by content hash, falling back to a perceptual-hash near-duplicate"""
+        result = self.get(key)
+        if result is not None:
+            return {**result, "cached": True, "cache_match": "exact"}
+
+        if phash is not None and self.near_duplicate_distance > 0:
+            result = self.find_similar(phash, self.near_duplicate_distance)
+            if result is not None:
+                return {**result, "cached": True, "cache_match": "perceptual"}
+
+        return None
+
+
+class LayeredCache:
+    """
+    Two-level cache: a bounded in-memory LRU in front of a PersistentCache on disk.
+    Tracks memory hits, disk hits and misses.
+    """
+
+    def __init__(self, backend: PersistentCache, memory_entries: int = 256):
+        """
+        Args:
+            backend: Persistent store used on memory misses; its TTL applies to both levels
+            memory_entries: Maximum number of entries kept in memory
+        """
+        self.backend = backend
+        self.memory_entries = memory_entries
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, promoting disk hits into memory"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if now - entry[1] <= self.backend.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return entry[0]
+                del self._memory[key]
+
+        entry = self.backend.get_entry(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            value, created_at = entry
+            self.disk_hits += 1
+            self._remember(key, value, created_at)
+        return value
+
+    def set(self, key: str, value: Any):
+        """Store a value in both levels"""
+        self.backend.set(key, value)
+        with self._lock:
+            self._remember(key, value, time.time())
+
+    def clear(self):
+        """Remove every entry from both levels"""
+        self.backend.clear()
+        with self._lock:
+            self._memory.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current sizes"""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_entries": len(self.backend)
+            }
+
+    def _remember(self, key: str, value: Any, stored_at: float):
+        self._memory[key] = (value, stored_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
@@ -0,0 +1,201 @@
+"""
+InstaFacade Conversation Memory - Token-budgeted chat history with a running summary
+"""
+
+import json
+import logging
+import os
+from typing import Dict, Any, List, Optional
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage
+
+logger = logging.getLogger(__name__)
+
+# Result fields worth remembering from a tool output; everything else (full analysis dicts,
+# candidate scores, per-image metrics, media listings) is dropped from the history
+TOOL_RESULT_KEYS = (
+    "success", "error", "status", "username", "is_fake", "deception_detected", "matching_source",
+    "matching_title", "matching_image_url", "confidence", "decided_by", "reason", "sent", "message",
+    "snarky_message", "proof_source", "fakes_found", "images_analyzed", "stories_found", "post_images_found"
+)
+
+SUMMARY_PROMPT = """You maintain the running summary of a chat between a user and InstaFacade, an assistant that checks Instagram images for stolen content and sends DMs.
+Merge the new turns into the existing summary. Keep every username, verdict (fake or authentic), proof source and message that was sent, plus open requests and user preferences. Drop pleasantries and raw tool data.
+Answer with the updated summary only, at most 200 words."""
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token for English text and JSON)"""
+    return len(text) // 4 + 1
+
+
+def message_tokens(message: BaseMessage) -> int:
+    """Estimated prompt tokens of one message, including its tool calls"""
+    tokens = 4 + estimate_tokens(_text(message.content))
+    for call in getattr(message, "tool_calls", None) or []:
+        tokens += estimate_tokens(call.get("name", "")) + estimate_tokens(json.dumps(call.get("args", {}), default=str))
+    return tokens
+
+
+def _text(content) -> str:
+    """Message content as plain text (content may be a list of blocks)"""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "\n".join(block.get("text", "") if isinstance(block, dict) else str(block) for block in content)
+    return str(content)
+
+
+def compact_tool_output(content, max_chars: int = 600) -> str:
+    """
+    Shrink a tool result for the history: JSON results keep only TOOL_RESULT_KEYS (also
+    inside a nested "analysis"), anything still too long is cut to max_chars
+    """
+    text = _text(content)
+    if len(text) <= max_chars:
+        return text
+    
+    try:
+        data = json.loads(text)
+    except ValueError:
+        data = None
+    if isinstance(data, dict):
+        kept = {key: data[key] for key in TOOL_RESULT_KEYS if key in data}
+        analysis = data.get("analysis")
+        if isinstance(analysis, dict):
+            kept.update({key: analysis[key] for key in TOOL_RESULT_KEYS if key in analysis and key not in kept})
+        if isinstance(data.get("items"), list):
+            kept["items"] = len(data["items"])
+        text = json.dumps(kept, default=str)
+    
+    return text if len(text) <= max_chars else text[:max_chars] + " …[truncated]"
+
+
+class ConversationMemory:
+    """
+    History for the interactive agent that stays within a token budget.
+    
+    The prompt of every turn is the system message (with the running summary appended),
+    the most recent turns verbatim, and the new user message. Tool outputs are compacted
+    when a turn is stored. When the history goes over the budget, the oldest turns are
+    folded into the running summary by the LLM (or, without one, a plain extract), always
+    keeping the last keep_recent_turns turns as they were.
+    """
+    
+    def __init__(self, system_prompt: str = "", llm=None, token_budget: Optional[int] = None,
+                 keep_recent_turns: Optional[int] = None, max_tool_chars: Optional[int] = None):
+        """
+        Args:
+            system_prompt: Instructions sent first on every turn
+            llm: Chat model used to write the summary; None uses an extractive summary
+            token_budget: Prompt tokens for history (INSTAFACADE_MEMORY_TOKEN_BUDGET, default 6000)
+            keep_recent_turns: Turns never summarized (INSTAFACADE_MEMORY_RECENT_TURNS, default 4)
+            max_tool_chars: Characters kept per tool output (INSTAFACADE_MEMORY_TOOL_CHARS, default 600)
+        """
+        self.system_prompt = system_prompt
+        self.llm = llm
+        self.token_budget = token_budget or int(os.getenv('INSTAFACADE_MEMORY_TOKEN_BUDGET', '6000'))
+        self.keep_recent_turns = max(1, keep_recent_turns or int(os.getenv('INSTAFACADE_MEMORY_RECENT_TURNS', '4')))
+        self.max_tool_chars = max_tool_chars or int(os.getenv('INSTAFACADE_MEMORY_TOOL_CHARS', '600'))
+        self.summary = ""
+        self.turns: List[List[BaseMessage]] = []
+        self.summarized_turns = 0
+    
+    def system_message(self) -> SystemMessage:
+        content = self.system_prompt
+        if self.summary:
+            content += f"\n\nSummary of the earlier conversation:\n{self.summary}"
+        return SystemMessage(content=content)
+    
+    def messages(self) -> List[BaseMessage]:
+        """The history as it is sent to the agent"""
+        return [self.system_message()] + [message for turn in self.turns for message in turn]
+    
+    def prompt(self, user_input: str) -> List[BaseMessage]:
+        """Messages for the next agent call: the history plus the new user message"""
+        return self.messages() + [HumanMessage(content=user_input)]
+    
+    def add_turn(self, user_input: str, new_messages: List[BaseMessage]):
+        """Store a finished turn: the user message and everything the agent added, tool outputs compacted"""
+        turn: List[BaseMessage] = [HumanMessage(content=user_input)]
+        for message in new_messages:
+            if isinstance(message, ToolMessage):
+                message = message.model_copy(update={"content": compact_tool_output(message.content, self.max_tool_chars)})
+            turn.append(message)
+        self.turns.append(turn)
+    
+    def token_count(self) -> int:
+        return sum(message_tokens(message) for message in self.messages())
+    
+    async def enforce_budget(self) -> int:
+        """Fold the oldest turns into the summary while over budget; returns the number of turns folded"""
+        if self.token_count() <= self.token_budget:
+            return 0
+        
+        folded = []
+        while len(self.turns) > self.keep_recent_turns and self.token_count() > self.token_budget:
+            folded.append(self.turns.pop(0))
+        if folded:
+            await self._fold(folded)
+        return len(folded)
+    
+    async def compact(self) -> Dict[str, Any]:
+        """Fold everything except the most recent turns into the summary, regardless of the budget"""
+        before = self.token_count()
+        folded = self.turns[:-self.keep_recent_turns]
+        del self.turns[:-self.keep_recent_turns]
+        if folded:
+            await self._fold(folded)
+        return {"turns_summarized": len(folded), "tokens_before": before, "tokens_after": self.token_count()}
+    
+    async def _fold(self, turns: List[List[BaseMessage]]):
+        transcript = self._transcript(turns)
+        summary = None
+        if self.llm is not None:
+            try:
+                response = await self.llm.ainvoke([
+                    SystemMessage(content=SUMMARY_PROMPT),
+                    HumanMessage(content=f"Existing summary:\n{self.summary or '(none)'}\n\nNew turns:\n{transcript}")
+                ])
+                summary = _text(response.content).strip()
+            except Exception as e:
+                logger.warning("⚠️ Could not summarize the conversation, keeping an extract: %s", e)
+        
+        if not summary:
+            # Extract fallback: the latest lines, capped at half the budget
+            summary = "\n".join(part for part in (self.summary, transcript) if part)
+            if len(summary) > self.token_budget * 2:
+                summary = summary[-self.token_budget * 2:].split("\n", 1)[-1]
+        self.summary = summary
+        self.summarized_turns += len(turns)
+        logger.info("🗜️ Folded %s turns into the conversation summary (%s tokens now)", len(turns), self.token_count())
+    
+    @staticmethod
+    def _transcript(turns: List[List[BaseMessage]], max_chars: int = 300) -> str:
+        """One line per user and assistant message; tool traffic is left out"""
+        lines = []
+        for turn in turns:
+            for message in turn:
+                text = _text(message.content).strip()
+                if isinstance(message, HumanMessage):
+                    lines.append(f"User: {text[:max_chars]}")
+                elif isinstance(message, AIMessage) and text:
+                    lines.append(f"Assistant: {text[:max_chars]}")
+        return "\n".join(lines)
+    
+    def clear(self) -> int:
+        """Forget the history and the summary; returns the number of messages removed"""
+        removed = sum(len(turn) for turn in self.turns)
+        self.turns.clear()
+        self.summary = ""
+        self.summarized_turns = 0
+        return removed
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "turns": len(self.turns),
+            "message_count": sum(len(turn) for turn in self.turns),
+            "summarized_turns": self.summarized_turns,
+            "has_summary": bool(self.summary),
+            "tokens": self.token_count(),
+            "token_budget": self.token_budget
+        }
@@ -0,0 +1,246 @@
+"""
+InstaFacade Metrics - Per-analysis stage timings, counters and byte counts with pluggable exporters
+"""
+
+import contextlib
+import contextvars
+import logging
+import os
+import threading
+import time
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PipelineMetrics:
+    """
+    Collects timing spans, counters and byte counts for one analyze_image call.
+    Safe to update from worker threads and concurrent tasks.
+    """
+    
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans: List[Dict[str, Any]] = []
+        self.counters: Dict[str, float] = {}
+        self.bytes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+    
+    @contextlib.contextmanager
+    def span(self, name: str, **attributes: Any):
+        """Time the enclosed block as a stage span; a raised exception marks the span as failed"""
+        start = time.perf_counter()
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            end = time.perf_counter()
+            record = {
+                "name": name,
+                "start_ms": round((start - self.started) * 1000, 3),
+                "duration_ms": round((end - start) * 1000, 3),
+                **attributes
+            }
+            if error:
+                record["error"] = error
+            with self._lock:
+                self.spans.append(record)
+            for hook in list(_hooks):
+                _call_hook(hook.on_span, record)
+    
+    def incr(self, name: str, amount: float = 1):
+        """Add to a counter"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+    
+    def add_bytes(self, name: str, amount: int):
+        """Add to a byte count"""
+        with self._lock:
+            self.bytes[name] = self.bytes.get(name, 0) + amount
+    
+    def summary(self) -> Dict[str, Any]:
+        """Totals per stage plus the raw spans, counters and byte counts"""
+        with self._lock:
+            spans = sorted(self.spans, key=lambda record: record["start_ms"])
+            counters = dict(self.counters)
+            byte_counts = dict(self.bytes)
+        
+        stages: Dict[str, Dict[str, Any]] = {}
+        for record in spans:
+            stage = stages.setdefault(record["name"], {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            stage["count"] += 1
+            stage["total_ms"] = round(stage["total_ms"] + record["duration_ms"], 3)
+            stage["max_ms"] = max(stage["max_ms"], record["duration_ms"])
+        
+        return {
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 3),
+            "stages": stages,
+            "counters": counters,
+            "bytes": byte_counts,
+            "spans": spans
+        }
+
+
+class MetricsHook:
+    """
+    Base class for metrics consumers. on_span fires as each stage finishes (suitable for
+    forwarding to an OpenTelemetry tracer); on_analysis fires once per analyze_image call.
+    """
+    
+    def on_span(self, span: Dict[str, Any]):
+        pass
+    
+    def on_analysis(self, summary: Dict[str, Any], results: Optional[Dict[str, Any]]):
+        pass
+
+
+class PrometheusTextExporter(MetricsHook):
+    """Aggregates analyses into Prometheus text exposition format"""
+    
+    def __init__(self, prefix: str = "instafacade"):
+        self.prefix = prefix
+        self.analyses = {"ok": 0, "error": 0}
+        self.deceptions = 0
+        self.analysis_seconds = 0.0
+        self.stage_seconds: Dict[str, float] = {}
+        self.stage_count: Dict[str, int] = {}
+        self.counters: Dict[str, float] = {}
+        self.bytes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+    
+    def on_analysis(self, summary: Dict[str, Any], results: Optional[Dict[str, Any]]):
+        with self._lock:
+            self.analyses["ok" if results is not None else "error"] += 1
+            if results and results.get("deception_detected"):
+                self.deceptions += 1
+            self.analysis_seconds += summary["total_ms"] / 1000
+            for name, stage in summary["stages"].items():
+                self.stage_seconds[name] = self.stage_seconds.get(name, 0.0) + stage["total_ms"] / 1000
+                self.stage_count[name] = self.stage_count.get(name, 0) + stage["count"]
+            for name, value in summary["counters"].items():
+                self.counters[name] = self.counters.get(name, 0) + value
+            for name, value in summary["bytes"].items():
+                self.bytes[name] = self.bytes.get(name, 0) + value
+    
+    def render(self) -> str:
+        """Current totals in Prometheus text format"""
+        p = self.prefix
+        with self._lock:
+            lines = [
+                f"# TYPE {p}_analyses_total counter",
+                *(f'{p}_analyses_total{{status="{status}"}} {count}' for status, count in self.analyses.items()),
+                f"# TYPE {p}_deceptions_total counter",
+                f"{p}_deceptions_total {self.deceptions}",
+                f"# TYPE {p}_analysis_seconds_total counter",
+                f"{p}_analysis_seconds_total {self.analysis_seconds:.6f}",
+                f"# TYPE {p}_stage_seconds_total counter",
+                *(f'{p}_stage_seconds_total{{stage="{name}"}} {value:.6f}' for name, value in sorted(self.stage_seconds.items())),
+                f"# TYPE {p}_stage_spans_total counter",
+                *(f'{p}_stage_spans_total{{stage="{name}"}} {value}' for name, value in sorted(self.stage_count.items())),
+                f"# TYPE {p}_bytes_total counter",
+                *(f'{p}_bytes_total{{kind="{name}"}} {value}' for name, value in sorted(self.bytes.items()))
+            ]
+            
+            # Counters named "family.label" become one family with a label per entry
+            families: Dict[str, List[str]] = {}
+            for name, value in sorted(self.counters.items()):
+                family, _, label = name.partition(".")
+                sample = f'{p}_{family}_total{{kind="{label}"}} {value:g}' if label else f"{p}_{family}_total {value:g}"
+                families.setdefault(family, []).append(sample)
+            for family, samples in families.items():
+                lines.append(f"# TYPE {p}_{family}_total counter")
+                lines.extend(samples)
+        
+        return "\n".join(lines) + "\n"
+    
+    def write(self, path: str):
+        """Write the current totals to a file, e.g. for the node_exporter textfile collector"""
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            file.write(self.render())
+        os.replace(temp_path, path)
+
+
+_current: contextvars.ContextVar[Optional[PipelineMetrics]] = contextvars.ContextVar("instafacade_metrics", default=None)
+_hooks: List[MetricsHook] = []
+
+
+def add_metrics_hook(hook: MetricsHook):
+    """Register a hook that receives spans and per-analysis summaries"""
+    _hooks.append(hook)
+
+
+def remove_metrics_hook(hook: MetricsHook):
+    """Unregister a hook"""
+    if hook in _hooks:
+        _hooks.remove(hook)
+
+
+@contextlib.contextmanager
+def collect_metrics():
+    """Make a fresh PipelineMetrics current for the enclosed block (and threads/tasks started from it)"""
+    metrics = PipelineMetrics()
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current.reset(token)
+
+
+def current_metrics() -> Optional[PipelineMetrics]:
+    """Metrics of the analysis running in this context, if any"""
+    return _current.get()
+
+
+def span(name: str, **attributes: Any):
+    """Time a stage of the current analysis; a no-op outside collect_metrics"""
+    metrics = _current.get()
+    return metrics.span(name, **attributes) if metrics is not None else contextlib.nullcontext()
+
+
+def incr(name: str, amount: float = 1):
+    """Add to a counter of the current analysis"""
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.incr(name, amount)
+
+
+def add_bytes(name: str, amount: int):
+    """Add to a byte count of the current analysis"""
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.add_bytes(name, amount)
+
+
+def emit_metrics(metrics: PipelineMetrics, results: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Pass an analysis summary to every hook and return it"""
+    summary = metrics.summary()
+    for hook in list(_hooks):
+        _call_hook(hook.on_analysis, summary, results)
+    return summary
+
+
+def compact_summary(summary: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The part of a summary worth returning with a result: total and per-stage milliseconds
+    plus API call and cache counters. Spans and byte counts stay with the hooks.
+    """
+    return {
+        "total_ms": summary["total_ms"],
+        "stages": {name: stage["total_ms"] for name, stage in summary["stages"].items()},
+        "counters": {
+            name: value for name, value in summary["counters"].items()
+            if name.startswith(("api_calls.", "cache."))
+        }
+    }
+
+
+def _call_hook(callback, *args):
+    # A broken exporter must never fail an analysis
+    try:
+        callback(*args)
+    except Exception as e:
+        logger.warning("⚠️ Metrics hook %s failed: %s", callback.__qualname__, e)
@@ -0,0 +1,125 @@
+"""
+InstaFacade Image Preprocessing - Prepare images for GPT-4o vision requests
+"""
+
+import base64
+import io
+import math
+from typing import NamedTuple, Optional
+from PIL import Image, ImageOps
+
+try:
+    # HEIC decoding (iPhone photos); Pillow itself decodes AVIF since 11.3
+    from pillow_heif import register_heif_opener
+    register_heif_opener()
+except ImportError:
+    pass
+
+# Formats the OpenAI vision endpoint accepts as-is
+VISION_MIME_TYPES = {"image/jpeg", "image/png", "image/webp", "image/gif"}
+
+EXIF_ORIENTATION = 0x0112
+
+
+class VisionImage(NamedTuple):
+    """An image ready to be embedded in a vision request as a data URL"""
+    base64: str
+    mime_type: str
+    width: int
+    height: int
+
+    @property
+    def data_url(self) -> str:
+        return f"data:{self.mime_type};base64,{self.base64}"
+
+
+def sniff_image_mime(data: bytes) -> Optional[str]:
+    """Detect the image MIME type from its magic bytes"""
+    if data.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if data.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if data.startswith((b"GIF87a", b"GIF89a")):
+        return "image/gif"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    if data.startswith(b"BM"):
+        return "image/bmp"
+    if data[4:12] in (b"ftypheic", b"ftypheix", b"ftypmif1", b"ftypmsf1"):
+        return "image/heic"
+    if data[4:12] == b"ftypavif":
+        return "image/avif"
+    if data.startswith((b"II*\x00", b"MM\x00*")):
+        return "image/tiff"
+    return None
+
+
+def target_size(width: int, height: int, max_long_side: int, max_short_side: int) -> tuple:
+    """
+    Scale dimensions the way the vision model does before tiling: fit the long side
+    within max_long_side, then the short side within max_short_side. Never upscales.
+    """
+    scale = min(1.0, max_long_side / max(width, height), max_short_side / min(width, height))
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def vision_token_cost(width: int, height: int, detail: str = "high") -> int:
+    """
+    Approximate GPT-4o input tokens for one image: 85 base tokens plus 170 per 512px tile
+    at high detail. Unknown dimensions (0) are charged as the largest possible image.
+    """
+    if detail == "low":
+        return 85
+    if not width or not height:
+        width, height = 768, 2048
+    width, height = target_size(width, height, 2048, 768)
+    return 85 + 170 * math.ceil(width / 512) * math.ceil(height / 512)
+
+
+def prepare_image_for_vision(
+    data: bytes,
+    max_long_side: int = 2048,
+    max_short_side: int = 768,
+    jpeg_quality: int = 85
+) -> VisionImage:
+    """
+    Decode an image, normalize orientation, downscale it to the model's effective
+    resolution and re-encode it as JPEG. The original bytes are kept when they are
+    already a supported format at the target size and smaller than the re-encode.
+    Undecodable images are passed through with their sniffed MIME type when the
+    vision endpoint accepts it; any other format (e.g. HEIC without pillow-heif)
+    raises instead of being sent as a type the API rejects.
+    """
+    mime_type = sniff_image_mime(data)
+
+    try:
+        image = Image.open(io.BytesIO(data))
+        image.load()
+    except Exception as e:
+        if mime_type is not None and mime_type not in VISION_MIME_TYPES:
+            raise Exception(f"Cannot decode {mime_type} image for vision analysis (install pillow-heif for HEIC): {e}")
+        return VisionImage(base64.b64encode(data).decode("utf-8"), mime_type or "image/jpeg", 0, 0)
+
+    rotated = image.getexif().get(EXIF_ORIENTATION, 1) != 1
+    image = ImageOps.exif_transpose(image)
+
+    width, height = target_size(image.width, image.height, max_long_side, max_short_side)
+    resized = (width, height) != (image.width, image.height)
+    if resized:
+        image = image.resize((width, height), Image.LANCZOS)
+
+    if image.mode not in ("RGB", "L"):
+        # Flatten transparency onto white so it does not turn black in JPEG
+        rgba = image.convert("RGBA")
+        background = Image.new("RGB", rgba.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.getchannel("A"))
+        image = background
+
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=jpeg_quality, optimize=True)
+    encoded = buffer.getvalue()
+
+    if not resized and not rotated and mime_type in VISION_MIME_TYPES and len(data) <= len(encoded):
+        return VisionImage(base64.b64encode(data).decode("utf-8"), mime_type, width, height)
+
+    return VisionImage(base64.b64encode(encoded).decode("utf-8"), "image/jpeg", width, height)
@@ -0,0 +1,152 @@
+"""
+InstaFacade Profile Sweep - Analyze every current story and recent post of an Instagram user in one job
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Dict, Any, List, Optional
+from .async_analyzer import AsyncInstaFacadeAnalyzer
+from .batch import BatchAnalyzer
+from ..services.mcp_service import MCPService
+
+logger = logging.getLogger(__name__)
+
+# Instagram media_type values
+PHOTO, VIDEO, ALBUM = 1, 2, 8
+
+# Keys the Instagram MCP server may use for an image URL, most specific first. For videos
+# media_url is the .mp4, so the cover frame keys come first
+IMAGE_URL_KEYS = ("media_url", "thumbnail_url", "image_url", "display_url", "url")
+VIDEO_IMAGE_URL_KEYS = ("thumbnail_url", "image_url", "display_url", "media_url", "url")
+CAROUSEL_KEYS = ("resources", "carousel_media", "carousel_items")
+
+
+def media_images(item: Dict[str, Any], kind: str) -> List[Dict[str, Any]]:
+    """
+    The analyzable images of one story or post: every carousel item, and the cover frame of videos
+    
+    Returns:
+        [{"kind", "media_id", "carousel_index", "url", "is_video", "taken_at"}]
+    """
+    media_id = str(item.get("id") or item.get("pk") or item.get("code") or "")
+    children = next((item[key] for key in CAROUSEL_KEYS if isinstance(item.get(key), list) and item[key]), None)
+    parts = children if children else [item]
+    
+    images = []
+    for index, part in enumerate(parts, 1):
+        is_video = part.get("media_type") == VIDEO or bool(part.get("is_video") or part.get("video_url"))
+        keys = VIDEO_IMAGE_URL_KEYS if is_video else IMAGE_URL_KEYS
+        url = next((part[key] for key in keys if isinstance(part.get(key), str) and part[key].startswith("http")), None)
+        if url is None:
+            continue
+        images.append({
+            "kind": kind,
+            "media_id": media_id,
+            "carousel_index": index if children else None,
+            "url": url,
+            "is_video": is_video,
+            "taken_at": item.get("taken_at")
+        })
+    return images
+
+
+class ProfileSweeper:
+    """
+    Pulls a user's current stories and last N posts straight from the Instagram MCP tools
+    and analyzes every image as one concurrent batch, instead of the agent fetching and
+    analyzing media one LLM turn at a time.
+    """
+    
+    def __init__(self, mcp_service: MCPService, analyzer: AsyncInstaFacadeAnalyzer, concurrency: Optional[int] = None):
+        """
+        Args:
+            mcp_service: Connected Instagram MCP service
+            analyzer: Shared async analyzer; its per-service rate limits apply to the sweep
+            concurrency: Images analyzed at the same time (INSTAFACADE_SWEEP_CONCURRENCY, default 4)
+        """
+        self.mcp_service = mcp_service
+        self.batch = BatchAnalyzer(analyzer)
+        self.concurrency = max(1, concurrency or int(os.getenv('INSTAFACADE_SWEEP_CONCURRENCY', '4')))
+    
+    async def sweep(self, username: str, max_posts: int = 12, include_stories: bool = True, include_posts: bool = True) -> Dict[str, Any]:
+        """
+        Analyze a user's stories and posts and return one aggregated report
+        
+        Args:
+            username: Instagram username
+            max_posts: Number of most recent posts to include
+            include_stories: Include current stories
+            include_posts: Include recent posts (every carousel item counts as an image)
+        
+        Returns:
+            Report with per-image verdicts, counts and is_fake (true if any image was stolen)
+        """
+        started = time.perf_counter()
+        logger.info("🧹 Sweeping @%s (stories: %s, posts: %s)", username, include_stories, max_posts if include_posts else 0)
+        
+        images, fetch_errors = await self._collect_images(username, max_posts, include_stories, include_posts)
+        logger.info("📸 Found %s images to analyze for @%s", len(images), username)
+        
+        semaphore = asyncio.Semaphore(self.concurrency)
+        
+        async def analyze(image: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                record = await self.batch.analyze_one(image["url"])
+            return self._item_report(image, record)
+        
+        items = await asyncio.gather(*(analyze(image) for image in images))
+        fakes = [item for item in items if item.get("is_fake")]
+        for item in fakes:
+            logger.info("🚨 Stolen %s image found for @%s: %s", item['kind'], username, item.get('matching_source', 'Unknown'))
+        
+        return {
+            "username": username,
+            "is_fake": bool(fakes),
+            "stories_found": sum(1 for image in images if image["kind"] == "story"),
+            "post_images_found": sum(1 for image in images if image["kind"] == "post"),
+            "images_analyzed": sum(1 for item in items if item["status"] == "ok"),
+            "fakes_found": len(fakes),
+            "errors": sum(1 for item in items if item["status"] == "error") + len(fetch_errors),
+            "fetch_errors": fetch_errors,
+            "items": items,
+            "elapsed_seconds": round(time.perf_counter() - started, 3)
+        }
+    
+    async def _collect_images(self, username: str, max_posts: int, include_stories: bool, include_posts: bool) -> tuple:
+        """Fetch stories and posts concurrently; a failed fetch is reported instead of failing the sweep"""
+        fetches = {}
+        if include_stories:
+            fetches["story"] = self.mcp_service.get_user_stories(username)
+        if include_posts and max_posts > 0:
+            fetches["post"] = self.mcp_service.get_user_posts(username, max_posts)
+        
+        results = await asyncio.gather(*fetches.values(), return_exceptions=True)
+        images, errors, seen = [], [], set()
+        for kind, result in zip(fetches, results):
+            if isinstance(result, Exception):
+                logger.warning("❌ Could not fetch %s for @%s: %s", "stories" if kind == "story" else "posts", username, result)
+                errors.append({"kind": kind, "error": str(result)})
+                continue
+            for item in result:
+                for image in media_images(item, kind):
+                    if image["url"] not in seen:
+                        seen.add(image["url"])
+                        images.append(image)
+        return images, errors
+    
+    @staticmethod
+    def _item_report(image: Dict[str, Any], record: Dict[str, Any]) -> Dict[str, Any]:
+        """Compact per-image entry: the media it came from plus the verdict fields that matter"""
+        item = {**image, "status": record["status"], "elapsed_seconds": record["elapsed_seconds"]}
+        if record["status"] != "ok":
+            item["error"] = record["error"]
+            return item
+        
+        result = record["result"]
+        item["is_fake"] = bool(result.get("deception_detected"))
+        for key in ("matching_source", "matching_title", "confidence", "decided_by", "reason"):
+            if key in result:
+                item[key] = result[key]
+        return item
@@ -0,0 +1,135 @@
+"""
+InstaFacade Match Ranking - Orders Google Lens matches by how likely they are to be the original
+"""
+
+from typing import Dict, Any, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlparse
+
+# Sites where reposted stock and "aesthetic" photos usually come from
+STOCK_DOMAINS = (
+    "shutterstock", "istockphoto", "gettyimages", "adobe", "alamy", "dreamstime", "depositphotos",
+    "123rf", "unsplash", "pexels", "pixabay", "freepik", "stocksy", "canva", "wallpaper", "wallhaven"
+)
+
+# Aggregators and social sites where the same photo circulates widely
+REPOST_DOMAINS = (
+    "pinterest", "pin.it", "reddit", "tumblr", "weheartit", "flickr", "vsco", "twitter", "x.com",
+    "facebook", "tiktok", "imgur", "deviantart", "500px"
+)
+
+TITLE_HINTS = ("stock", "wallpaper", "royalty", "free download", "aesthetic", "4k", "hd photo", "background")
+
+
+class RankedMatch(NamedTuple):
+    """A Lens match with its 1-based position in exact_matches and its ranking score"""
+    match_index: int
+    score: float
+    match: Dict[str, Any]
+
+
+class MatchRanker:
+    """
+    Scores Lens exact matches so the most promising ones are downloaded and compared first.
+    
+    The score (0-1) starts from a prior that decays with the Lens position and is adjusted
+    for the source domain, the title and how well the full-size image dimensions fit the
+    original. It is a ranking heuristic, not a calibrated probability.
+    """
+    
+    def __init__(self, min_score: float = 0.3, wave_size: int = 3):
+        """
+        Args:
+            min_score: Matches scoring below this are not worth a download (the best match is always checked)
+            wave_size: Matches downloaded and compared per round before deciding whether to go on
+        """
+        self.min_score = min_score
+        self.wave_size = max(1, wave_size)
+    
+    def score(self, match: Dict[str, Any], position: int, original_size: Optional[Tuple[int, int]] = None) -> float:
+        """Score one match found at the given 1-based position"""
+        score = 0.6 / (1 + 0.25 * (position - 1))
+        score *= self._domain_factor(match)
+        score *= self._title_factor(match.get("title") or "")
+        score *= self._dimension_factor(match, original_size)
+        return round(min(score, 1.0), 4)
+    
+    def rank(self, exact_matches: List[Dict[str, Any]], original_size: Optional[Tuple[int, int]] = None) -> List[RankedMatch]:
+        """
+        Score the matches that have a thumbnail, best first
+        
+        Matches sharing a thumbnail URL are only kept once. Ties keep the Lens order.
+        """
+        ranked = []
+        seen_thumbnails = set()
+        for position, match in enumerate(exact_matches, 1):
+            thumbnail = match.get("thumbnail")
+            if not thumbnail or thumbnail in seen_thumbnails:
+                continue
+            seen_thumbnails.add(thumbnail)
+            ranked.append(RankedMatch(position, self.score(match, position, original_size), match))
+        ranked.sort(key=lambda ranked_match: -ranked_match.score)
+        return ranked
+    
+    def plan(self, ranked: List[RankedMatch], budget: int) -> List[List[RankedMatch]]:
+        """
+        Split the matches worth checking into waves
+        
+        Args:
+            ranked: Output of rank()
+            budget: Maximum number of matches to download and compare in total
+        
+        Returns:
+            Waves of at most wave_size matches; the caller stops after the wave that finds a match
+        """
+        eligible = [ranked_match for ranked_match in ranked if ranked_match.score >= self.min_score]
+        eligible = eligible[:max(1, budget)] or ranked[:1]
+        return [eligible[i:i + self.wave_size] for i in range(0, len(eligible), self.wave_size)]
+    
+    @staticmethod
+    def _domain_factor(match: Dict[str, Any]) -> float:
+        host = (urlparse(match.get("link") or "").hostname or "").lower()
+        source = (match.get("source") or "").lower()
+        
+        def known(domain: str) -> bool:
+            # Full domains must match the host exactly; bare names ("reddit") may appear anywhere
+            if "." in domain:
+                return host == domain or host.endswith("." + domain)
+            return domain in host or domain in source
+        
+        if any(known(domain) for domain in STOCK_DOMAINS):
+            return 1.5
+        if any(known(domain) for domain in REPOST_DOMAINS):
+            return 1.25
+        return 1.0
+    
+    @staticmethod
+    def _title_factor(title: str) -> float:
+        title = title.lower()
+        if any(hint in title for hint in TITLE_HINTS):
+            return 1.2
+        return 1.0 if title else 0.9
+    
+    @staticmethod
+    def _dimension_factor(match: Dict[str, Any], original_size: Optional[Tuple[int, int]]) -> float:
+        """Copies keep the aspect ratio (give or take a small crop) and are rarely tiny"""
+        try:
+            width = int(match.get("actual_image_width") or 0)
+            height = int(match.get("actual_image_height") or 0)
+        except (TypeError, ValueError):
+            return 1.0
+        if width <= 0 or height <= 0:
+            return 1.0
+        
+        factor = 0.8 if max(width, height) < 200 else 1.0
+        if original_size and original_size[0] > 0 and original_size[1] > 0:
+            ratio_difference = abs(width / height - original_size[0] / original_size[1]) / (original_size[0] / original_size[1])
+            if ratio_difference <= 0.03:
+                factor *= 1.3
+            elif ratio_difference <= 0.1:
+                factor *= 1.1
+            else:
+                factor *= 0.7
+            if width >= original_size[0] and height >= original_size[1]:
+                # A larger copy elsewhere is more likely the source than a downscaled repost of the story
+                factor *= 1.1
+        return factor
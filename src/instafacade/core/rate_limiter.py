@@ -0,0 +1,222 @@
+"""
+InstaFacade Rate Limiter - Per-service token buckets and concurrency caps for external APIs
+"""
+
+import asyncio
+import contextlib
+import os
+import threading
+import time
+import weakref
+from typing import Dict, Any, Optional
+from . import metrics
+
+SERVICES = ("imgbb", "serpapi", "openai", "download")
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. Callers reserve tokens up front and are told how long to
+    wait, so waiters are served in arrival order and a bucket can be shared by threads
+    and event loops alike.
+    """
+    
+    def __init__(self, rate: float, capacity: float):
+        """
+        Args:
+            rate: Tokens added per second (0 disables the bucket)
+            capacity: Maximum burst size
+        """
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def reserve(self, amount: float = 1.0) -> float:
+        """Take amount tokens, returning the seconds to wait before they are available"""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = self._refill()
+            self._tokens -= amount
+            if self._tokens >= 0:
+                return 0.0
+            # A deficit is paid back at the refill rate; requests larger than the burst just wait longer
+            return -self._tokens / self.rate
+    
+    def pause(self, seconds: float):
+        """Empty the bucket so nothing is granted for the next seconds (e.g. after a 429)"""
+        if self.rate <= 0:
+            return
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens, -seconds * self.rate)
+    
+    def _refill(self) -> float:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        return now
+
+
+class RateLimiter:
+    """
+    Governs calls to ImgBB, SerpAPI, OpenAI and image hosts: a requests-per-second bucket
+    and a concurrency cap per service, plus a tokens-per-minute bucket for OpenAI.
+    Callers queue until they are allowed through instead of failing.
+    """
+    
+    def __init__(self, limits: Dict[str, Dict[str, float]]):
+        """
+        Args:
+            limits: Per service: rps, burst, concurrency and (optionally) tpm; 0 disables a limit
+        """
+        self.limits = {service: dict(limit) for service, limit in limits.items()}
+        self._request_buckets: Dict[str, TokenBucket] = {}
+        self._token_buckets: Dict[str, TokenBucket] = {}
+        self._thread_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._loop_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self.waits: Dict[str, float] = {service: 0.0 for service in self.limits}
+        
+        for service in self.limits:
+            self._build(service)
+    
+    @classmethod
+    def from_env(cls) -> "RateLimiter":
+        """
+        Build limits from INSTAFACADE_<SERVICE>_RPS, _BURST and _CONCURRENCY, plus
+        INSTAFACADE_OPENAI_TPM for the OpenAI tokens-per-minute budget
+        """
+        defaults = {
+            "imgbb": {"rps": 2, "concurrency": 4},
+            "serpapi": {"rps": 5, "concurrency": 4},
+            "openai": {"rps": 8, "concurrency": 8, "tpm": 0},
+            "download": {"rps": 0, "concurrency": 16}
+        }
+        limits = {}
+        for service, default in defaults.items():
+            prefix = f"INSTAFACADE_{service.upper()}_"
+            rps = float(os.getenv(prefix + 'RPS', str(default["rps"])))
+            limits[service] = {
+                "rps": rps,
+                "burst": float(os.getenv(prefix + 'BURST', str(max(1.0, rps)))),
+                "concurrency": int(os.getenv(prefix + 'CONCURRENCY', str(default["concurrency"])))
+            }
+            if "tpm" in default:
+                limits[service]["tpm"] = float(os.getenv(prefix + 'TPM', str(default["tpm"])))
+        return cls(limits)
+    
+    def configure(self, service: str, **limit: float):
+        """Change a service's limits; call before the limiter is in use"""
+        self.limits.setdefault(service, {}).update(limit)
+        self.waits.setdefault(service, 0.0)
+        self._build(service)
+    
+    def _build(self, service: str):
+        limit = self.limits[service]
+        rps = limit.get("rps", 0)
+        self._request_buckets[service] = TokenBucket(rps, limit.get("burst", max(1.0, rps)))
+        tpm = limit.get("tpm", 0)
+        self._token_buckets[service] = TokenBucket(tpm / 60.0, tpm)
+        concurrency = int(limit.get("concurrency", 0))
+        self._thread_semaphores.pop(service, None)
+        if concurrency > 0:
+            self._thread_semaphores[service] = threading.BoundedSemaphore(concurrency)
+        for semaphores in self._loop_semaphores.values():
+            semaphores.pop(service, None)
+    
+    def _reserve(self, service: str, tokens: float) -> float:
+        """Reserve a request (and tokens) on the service's buckets, returning the wait in seconds"""
+        if service not in self._request_buckets:
+            return 0.0
+        delay = self._request_buckets[service].reserve(1.0)
+        if tokens:
+            delay = max(delay, self._token_buckets[service].reserve(tokens))
+        if delay > 0:
+            with self._lock:
+                self.waits[service] += delay
+            metrics.incr(f"rate_limit_wait_ms.{service}", round(delay * 1000, 3))
+        return delay
+    
+    @contextlib.contextmanager
+    def acquire(self, service: str, tokens: float = 0):
+        """Block the calling thread until the service allows another call, holding a concurrency slot"""
+        semaphore = self._thread_semaphores.get(service)
+        if semaphore is not None:
+            semaphore.acquire()
+        try:
+            delay = self._reserve(service, tokens)
+            if delay > 0:
+                time.sleep(delay)
+            yield
+        finally:
+            if semaphore is not None:
+                semaphore.release()
+    
+    @contextlib.asynccontextmanager
+    async def acquire_async(self, service: str, tokens: float = 0):
+        """Wait without blocking the event loop until the service allows another call"""
+        semaphore = self._loop_semaphore(service)
+        if semaphore is None:
+            delay = self._reserve(service, tokens)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            yield
+            return
+        
+        async with semaphore:
+            delay = self._reserve(service, tokens)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            yield
+    
+    def _loop_semaphore(self, service: str) -> Optional[asyncio.Semaphore]:
+        """Concurrency cap for the running event loop (asyncio primitives cannot cross loops)"""
+        concurrency = int(self.limits.get(service, {}).get("concurrency", 0))
+        if concurrency <= 0:
+            return None
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            semaphores = self._loop_semaphores.setdefault(loop, {})
+            if service not in semaphores:
+                semaphores[service] = asyncio.Semaphore(concurrency)
+            return semaphores[service]
+    
+    def penalize(self, service: str, retry_after: Optional[float] = None):
+        """Back off a service that answered 429 despite the limits, for Retry-After seconds (default 1s)"""
+        bucket = self._request_buckets.get(service)
+        if bucket is not None:
+            bucket.pause(retry_after if retry_after is not None else 1.0)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Configured limits and total seconds spent queueing per service"""
+        with self._lock:
+            return {
+                service: {**self.limits[service], "queued_seconds": round(self.waits[service], 3)}
+                for service in self.limits
+            }
+
+
+_shared_limiter: Optional[RateLimiter] = None
+_shared_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Process-wide limiter built from the environment, shared by every analyzer"""
+    global _shared_limiter
+    with _shared_lock:
+        if _shared_limiter is None:
+            _shared_limiter = RateLimiter.from_env()
+        return _shared_limiter
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds from a numeric Retry-After header, or None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
@@ -0,0 +1,129 @@
+"""
+InstaFacade Candidate Scoring - Vectorized NumPy similarity of every candidate against the original
+"""
+
+from typing import Dict, List, NamedTuple, Optional
+import numpy as np
+from .similarity import average_hash_bits, color_histograms, greyscale, perceptual_hash_bits
+
+# SSIM stabilisers for 8-bit images
+_SSIM_C1 = (0.01 * 255) ** 2
+_SSIM_C2 = (0.03 * 255) ** 2
+
+
+class CandidateScore(NamedTuple):
+    """Similarity of one candidate to the original; confidence is 0 (unrelated) to 1 (same image)"""
+    match_index: int
+    confidence: float
+    phash_distance: int
+    ahash_distance: int
+    ssim: float
+    ncc: float
+    histogram_similarity: float
+
+
+class CandidateScorer:
+    """
+    Scores all candidates of an analysis in one pass: the decoded pixel grids (see
+    similarity.decode_pixels) are stacked into one array, and the hash distances, block
+    SSIM, normalized cross-correlation and colour-histogram intersection against the
+    original are each computed as a single NumPy operation over the whole stack.
+    """
+    
+    def __init__(self, block: int = 8, histogram_bins: int = 16):
+        """
+        Args:
+            block: SSIM window side; the grid is split into non-overlapping blocks
+            histogram_bins: Bins per RGB channel for the histogram intersection
+        """
+        self.block = block
+        self.histogram_bins = histogram_bins
+    
+    def score(self, original: np.ndarray, candidates: Dict[int, np.ndarray]) -> Dict[int, CandidateScore]:
+        """Score decoded candidate grids, keyed by match index, against the original's grid"""
+        if not candidates:
+            return {}
+        
+        # Row 0 is the original, rows 1.. the candidates
+        order = list(candidates)
+        rgb = np.stack([original] + [candidates[match_index] for match_index in order])
+        grey = greyscale(rgb)
+        
+        phash = self._hash_distances(perceptual_hash_bits(grey))
+        ahash = self._hash_distances(average_hash_bits(grey))
+        ssim = self._ssim(grey)
+        ncc = self._ncc(grey)
+        histogram = self._histogram_similarity(rgb)
+        confidence = self._confidence(phash, ssim, ncc, histogram)
+        
+        return {
+            match_index: CandidateScore(
+                match_index=match_index,
+                confidence=round(float(confidence[i]), 4),
+                phash_distance=int(phash[i]),
+                ahash_distance=int(ahash[i]),
+                ssim=round(float(ssim[i]), 4),
+                ncc=round(float(ncc[i]), 4),
+                histogram_similarity=round(float(histogram[i]), 4)
+            )
+            for i, match_index in enumerate(order)
+        }
+    
+    @staticmethod
+    def _hash_distances(bits: np.ndarray) -> np.ndarray:
+        return np.count_nonzero(bits[1:] != bits[0], axis=1)
+    
+    def _ssim(self, grey: np.ndarray) -> np.ndarray:
+        """Mean SSIM over non-overlapping blocks"""
+        count = len(grey)
+        per_side = grey.shape[1] // self.block
+        blocks = grey.reshape(count, per_side, self.block, per_side, self.block).transpose(0, 1, 3, 2, 4)
+        blocks = blocks.reshape(count, per_side * per_side, self.block * self.block)
+        
+        means = blocks.mean(axis=2)
+        centred = blocks - means[..., None]
+        variances = (centred ** 2).mean(axis=2)
+        covariances = (centred[1:] * centred[0]).mean(axis=2)
+        
+        original_mean, original_variance = means[0], variances[0]
+        ssim = ((2 * original_mean * means[1:] + _SSIM_C1) * (2 * covariances + _SSIM_C2)) / (
+            (original_mean ** 2 + means[1:] ** 2 + _SSIM_C1) * (original_variance + variances[1:] + _SSIM_C2)
+        )
+        return ssim.mean(axis=1)
+    
+    @staticmethod
+    def _ncc(grey: np.ndarray) -> np.ndarray:
+        """Zero-mean normalized cross-correlation of the whole grid"""
+        flat = grey.reshape(len(grey), -1)
+        centred = flat - flat.mean(axis=1, keepdims=True)
+        norms = np.linalg.norm(centred, axis=1)
+        norms[norms == 0] = 1.0
+        normalized = centred / norms[:, None]
+        return normalized[1:] @ normalized[0]
+    
+    def _histogram_similarity(self, rgb: np.ndarray) -> np.ndarray:
+        """RGB histogram intersection averaged over the channels (1.0 = identical)"""
+        histograms = color_histograms(rgb, self.histogram_bins)
+        return np.minimum(histograms[1:], histograms[0]).sum(axis=1) / 3.0
+    
+    @staticmethod
+    def _confidence(phash: np.ndarray, ssim: np.ndarray, ncc: np.ndarray, histogram: np.ndarray) -> np.ndarray:
+        """
+        Blend the measures into 0-1. Unrelated photos sit around pHash 32, SSIM/NCC near 0 and
+        histogram 0.3-0.6; resized or recompressed copies are within a few pHash bits with
+        SSIM and NCC close to 1.
+        """
+        phash_score = np.clip(1 - phash / 24.0, 0, 1)
+        histogram_score = np.clip((histogram - 0.5) / 0.5, 0, 1)
+        blended = 0.4 * phash_score + 0.25 * np.clip(ssim, 0, 1) + 0.2 * np.clip(ncc, 0, 1) + 0.15 * histogram_score
+        return np.clip(blended, 0, 1)
+
+
+def best_candidate(scores: Dict[int, CandidateScore]) -> Optional[CandidateScore]:
+    """The most similar candidate, if any were scored"""
+    return max(scores.values(), key=lambda score: score.confidence, default=None)
+
+
+def scores_as_dicts(scores: Dict[int, CandidateScore]) -> List[dict]:
+    """Candidate scores in match order, ready for a JSON result"""
+    return [scores[match_index]._asdict() for match_index in sorted(scores)]
@@ -0,0 +1,234 @@
+"""
+InstaFacade Local Similarity - On-CPU perceptual hashing used to pre-filter image comparisons
+"""
+
+import io
+from functools import lru_cache
+from itertools import combinations
+from typing import Dict, Any, List, Optional, Union
+import numpy as np
+from PIL import Image, ImageOps
+
+# An image can be referenced by a local file path or by its raw bytes
+ImageSource = Union[str, bytes, bytearray, memoryview]
+
+# Side of the square RGB grid images are decoded to; every hash, histogram and score is
+# computed from this grid, so each image only has to be decoded once
+PIXEL_GRID = 64
+
+# Luma weights for the greyscale grid (ITU-R BT.601, as used by PIL's "L" mode)
+_LUMA = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+
+def open_image(source: ImageSource) -> Image.Image:
+    """Open an image from a file path or raw bytes with EXIF orientation applied"""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        image = Image.open(io.BytesIO(bytes(source)))
+    else:
+        image = Image.open(source)
+    image.load()
+    return ImageOps.exif_transpose(image)
+
+
+def image_pixels(image: Image.Image, grid: int = PIXEL_GRID) -> np.ndarray:
+    """An image resized to a grid x grid x 3 uint8 RGB array"""
+    return np.asarray(image.convert("RGB").resize((grid, grid), Image.BILINEAR), dtype=np.uint8)
+
+
+def decode_pixels(source: ImageSource, grid: int = PIXEL_GRID) -> Optional[np.ndarray]:
+    """Decode an image source straight to its pixel grid, or None if it cannot be decoded"""
+    try:
+        return image_pixels(open_image(source), grid)
+    except Exception:
+        return None
+
+
+def greyscale(rgb: np.ndarray) -> np.ndarray:
+    """Luma of one pixel grid or a stack of them, as float32"""
+    return rgb.astype(np.float32) @ _LUMA
+
+
+def average_hash_bits(grey: np.ndarray, hash_size: int = 8) -> np.ndarray:
+    """aHash bits per image of a greyscale stack: block means brighter than their overall mean"""
+    small = _resample(grey, hash_size, hash_size).reshape(len(grey), -1)
+    return small > small.mean(axis=1, keepdims=True)
+
+
+def difference_hash_bits(grey: np.ndarray, hash_size: int = 8) -> np.ndarray:
+    """dHash bits per image of a greyscale stack: block means brighter than their right neighbour"""
+    small = _resample(grey, hash_size, hash_size + 1)
+    return (small[:, :, :-1] > small[:, :, 1:]).reshape(len(grey), -1)
+
+
+def perceptual_hash_bits(grey: np.ndarray, hash_size: int = 8, highfreq_factor: int = 4) -> np.ndarray:
+    """pHash bits per image of a greyscale stack: low-frequency DCT coefficients vs their median"""
+    size = hash_size * highfreq_factor
+    small = _resample(grey, size, size)
+    dct = _dct_matrix(size, hash_size)
+    # Separable DCT-II, only computing the hash_size x hash_size low-frequency block
+    coefficients = (dct @ small @ dct.T).reshape(len(grey), -1)
+    return coefficients > np.median(coefficients, axis=1, keepdims=True)
+
+
+def color_histograms(rgb: np.ndarray, bins: int = 16) -> np.ndarray:
+    """Normalized per-channel RGB histograms of a pixel grid stack, shape (images, 3 * bins)"""
+    count = len(rgb)
+    channel_bins = (rgb.reshape(count, -1, 3).astype(np.int64) * bins) // 256 + np.arange(3) * bins
+    offsets = (np.arange(count) * 3 * bins)[:, None, None]
+    histograms = np.bincount((channel_bins + offsets).ravel(), minlength=count * 3 * bins)
+    return histograms.reshape(count, 3 * bins) / (rgb.shape[1] * rgb.shape[2])
+
+
+def bits_to_int(bits: np.ndarray) -> int:
+    """Pack one image's hash bits into an integer, first bit most significant"""
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def average_hash(image: Image.Image, hash_size: int = 8) -> int:
+    """Average hash: each bit says whether a block is brighter than the mean"""
+    return bits_to_int(average_hash_bits(greyscale(image_pixels(image))[None], hash_size)[0])
+
+
+def difference_hash(image: Image.Image, hash_size: int = 8) -> int:
+    """Difference hash: each bit says whether a block is brighter than its right neighbour"""
+    return bits_to_int(difference_hash_bits(greyscale(image_pixels(image))[None], hash_size)[0])
+
+
+def perceptual_hash(image: Image.Image, hash_size: int = 8, highfreq_factor: int = 4) -> int:
+    """Perceptual hash: low-frequency DCT coefficients compared against their median"""
+    return bits_to_int(perceptual_hash_bits(greyscale(image_pixels(image))[None], hash_size, highfreq_factor)[0])
+
+
+def color_histogram(image: Image.Image, bins: int = 16) -> List[float]:
+    """Normalized per-channel RGB histogram with the given number of bins per channel"""
+    return color_histograms(image_pixels(image)[None], bins)[0].tolist()
+
+
+def hamming_distance(hash_a: int, hash_b: int) -> int:
+    """Number of differing bits between two integer hashes"""
+    return bin(hash_a ^ hash_b).count("1")
+
+
+# Multi-index hashing: a 64-bit hash split into four 16-bit bands. Two hashes within
+# distance d agree to within d // 4 bits on at least one band, so indexed band lookups
+# find every near-duplicate candidate without comparing against every stored hash.
+PHASH_BANDS = 4
+PHASH_BAND_BITS = 16
+_BAND_MASK = (1 << PHASH_BAND_BITS) - 1
+
+
+def phash_bands(phash: int) -> List[int]:
+    """The 16-bit bands of a 64-bit hash, lowest first"""
+    return [(phash >> (band * PHASH_BAND_BITS)) & _BAND_MASK for band in range(PHASH_BANDS)]
+
+
+def band_variants(value: int, radius: int) -> List[int]:
+    """Every band value within `radius` bit flips of value"""
+    variants = [value]
+    for flips in range(1, radius + 1):
+        for bits in combinations(range(PHASH_BAND_BITS), flips):
+            variant = value
+            for bit in bits:
+                variant ^= 1 << bit
+            variants.append(variant)
+    return variants
+
+
+def histogram_similarity(hist_a, hist_b) -> float:
+    """Histogram intersection averaged over the three colour channels (1.0 = identical)"""
+    return float(np.minimum(hist_a, hist_b).sum()) / 3.0
+
+
+@lru_cache(maxsize=None)
+def _box_matrix(size: int, target: int) -> np.ndarray:
+    """Area-averaging weights that resample size pixels down to target"""
+    edges = np.linspace(0, size, target + 1)
+    starts = np.arange(size)
+    overlap = np.clip(np.minimum(starts + 1, edges[1:, None]) - np.maximum(starts, edges[:-1, None]), 0, None)
+    return (overlap / overlap.sum(axis=1, keepdims=True)).astype(np.float32)
+
+
+def _resample(grey: np.ndarray, rows: int, cols: int) -> np.ndarray:
+    """Area-average a greyscale stack down to rows x cols per image"""
+    return _box_matrix(grey.shape[1], rows) @ grey @ _box_matrix(grey.shape[2], cols).T
+
+
+@lru_cache(maxsize=None)
+def _dct_matrix(size: int, coefficients: int) -> np.ndarray:
+    k = np.arange(coefficients)[:, None]
+    n = np.arange(size)[None, :]
+    return np.cos(np.pi * k * (2 * n + 1) / (2 * size)).astype(np.float32)
+
+
+class LocalSimilarityFilter:
+    """
+    Classifies image pairs as clear duplicates, clear non-matches or ambiguous using
+    aHash/dHash/pHash Hamming distances plus a colour histogram check, so that only
+    the ambiguous middle band needs to be escalated to the vision model
+    """
+
+    DUPLICATE = "duplicate"
+    DIFFERENT = "different"
+    AMBIGUOUS = "ambiguous"
+
+    def __init__(
+        self,
+        duplicate_max_distance: int = 4,
+        duplicate_min_histogram: float = 0.85,
+        different_min_distance: int = 24,
+        different_max_histogram: float = 0.7
+    ):
+        """
+        Args:
+            duplicate_max_distance: All three hash distances must be at or below this for a duplicate
+            duplicate_min_histogram: Minimum histogram similarity for a duplicate
+            different_min_distance: pHash and dHash distances must both reach this for a non-match
+            different_max_histogram: Histogram similarity must stay below this for a non-match
+        """
+        self.duplicate_max_distance = duplicate_max_distance
+        self.duplicate_min_histogram = duplicate_min_histogram
+        self.different_min_distance = different_min_distance
+        self.different_max_histogram = different_max_histogram
+
+    def compute_signature(self, source: ImageSource) -> Dict[str, Any]:
+        """Compute the hashes and histogram for an image"""
+        return self.signature(image_pixels(open_image(source)))
+
+    def signature(self, pixels: np.ndarray) -> Dict[str, Any]:
+        """Hashes and histogram of an already decoded pixel grid"""
+        grey = greyscale(pixels)[None]
+        return {
+            "ahash": bits_to_int(average_hash_bits(grey)[0]),
+            "dhash": bits_to_int(difference_hash_bits(grey)[0]),
+            "phash": bits_to_int(perceptual_hash_bits(grey)[0]),
+            "histogram": color_histograms(pixels[None])[0]
+        }
+
+    def compare(self, original: Dict[str, Any], candidate: Dict[str, Any]) -> Dict[str, Any]:
+        """Compare two signatures and classify the pair"""
+        distances = {
+            "ahash_distance": hamming_distance(original["ahash"], candidate["ahash"]),
+            "dhash_distance": hamming_distance(original["dhash"], candidate["dhash"]),
+            "phash_distance": hamming_distance(original["phash"], candidate["phash"])
+        }
+        hist_similarity = histogram_similarity(original["histogram"], candidate["histogram"])
+
+        if (max(distances.values()) <= self.duplicate_max_distance
+                and hist_similarity >= self.duplicate_min_histogram):
+            verdict = self.DUPLICATE
+        elif (distances["phash_distance"] >= self.different_min_distance
+                and distances["dhash_distance"] >= self.different_min_distance
+                and hist_similarity < self.different_max_histogram):
+            verdict = self.DIFFERENT
+        else:
+            verdict = self.AMBIGUOUS
+
+        return {
+            "verdict": verdict,
+            "histogram_similarity": round(hist_similarity, 4),
+            **distances
+        }
+
+    def classify(self, original: ImageSource, candidate: ImageSource) -> Dict[str, Any]:
+        """Classify an original/candidate image pair"""
+        return self.compare(self.compute_signature(original), self.compute_signature(candidate))
@@ -0,0 +1,147 @@
+"""
+InstaFacade Known Content Index - Persistent near-duplicate lookup of images already confirmed as stolen
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, Optional
+from .similarity import PHASH_BANDS, band_variants, hamming_distance, phash_bands
+
+def _to_signed(value: int) -> int:
+    """SQLite integers are signed 64-bit"""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def _to_unsigned(value: int) -> int:
+    return value + (1 << 64) if value < 0 else value
+
+
+class KnownContentIndex:
+    """
+    Perceptual hashes of every image analyze_image has confirmed as stolen, with the
+    verdict that confirmed it, so reposts of the same viral image are caught before any
+    ImgBB, SerpAPI or OpenAI call.
+    
+    Lookups use multi-index hashing: the 64-bit pHash is split into four 16-bit bands,
+    each stored in its own indexed SQLite column. Two hashes within distance d agree to
+    within d // 4 bits on at least one band, so querying each band for its few nearby
+    values finds every candidate with a handful of index seeks, and only those candidates
+    are compared bit by bit. Entries live on disk; memory use is SQLite's page cache no
+    matter how many millions of images are indexed.
+    """
+    
+    def __init__(self, db_path: str, max_distance: int = 3, cache_kib: int = 8192):
+        """
+        Args:
+            db_path: Path of the SQLite database file (may be shared with the analyzer caches)
+            max_distance: Maximum pHash Hamming distance for a match (0-11); up to 3 every band
+                          lookup is an exact index seek, above that each band probes 17+ values
+            cache_kib: SQLite page cache size for this connection
+        """
+        if not 0 <= max_distance <= 11:
+            raise ValueError(f"max_distance must be between 0 and 11, got {max_distance}")
+        self.db_path = db_path
+        self.max_distance = max_distance
+        self._band_radius = max_distance // PHASH_BANDS
+        self._lock = threading.Lock()
+        
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(f"PRAGMA cache_size=-{int(cache_kib)}")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS known_content (
+                    id INTEGER PRIMARY KEY,
+                    sha256 TEXT NOT NULL UNIQUE,
+                    phash INTEGER,
+                    band0 INTEGER,
+                    band1 INTEGER,
+                    band2 INTEGER,
+                    band3 INTEGER,
+                    verdict TEXT NOT NULL,
+                    added_at REAL NOT NULL,
+                    hits INTEGER NOT NULL DEFAULT 0
+                )
+                """
+            )
+            for band in range(PHASH_BANDS):
+                self._conn.execute(
+                    # Covering (band, phash) indexes: candidate scans never touch the table rows
+                    f"CREATE INDEX IF NOT EXISTS idx_known_content_band{band} ON known_content (band{band}, phash)"
+                )
+    
+    def add(self, sha256: str, phash: Optional[int], verdict: Dict[str, Any]):
+        """Index a confirmed stolen image; without a pHash it can still be matched byte for byte"""
+        bands = phash_bands(phash) if phash is not None else [None] * PHASH_BANDS
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO known_content "
+                "(sha256, phash, band0, band1, band2, band3, verdict, added_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (sha256, _to_signed(phash) if phash is not None else None, *bands, json.dumps(verdict), time.time())
+            )
+    
+    def lookup(self, sha256: str, phash: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Find a known stolen image by content hash, then by nearest pHash within max_distance
+        
+        Returns:
+            The stored verdict plus "distance" (0 for an exact content match), or None
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT id FROM known_content WHERE sha256 = ?", (sha256,)).fetchone()
+            if row is not None:
+                best = (0, row[0])
+            elif phash is not None:
+                best = self._nearest(phash)
+            else:
+                best = None
+            
+            if best is None:
+                return None
+            with self._conn:
+                self._conn.execute("UPDATE known_content SET hits = hits + 1 WHERE id = ?", (best[1],))
+                verdict = self._conn.execute("SELECT verdict FROM known_content WHERE id = ?", (best[1],)).fetchone()[0]
+        return {**json.loads(verdict), "distance": best[0]}
+    
+    def _nearest(self, phash: int) -> Optional[tuple]:
+        """Closest entry within max_distance; call with the lock held"""
+        best = None
+        seen = set()
+        for band, value in enumerate(phash_bands(phash)):
+            variants = band_variants(value, self._band_radius)
+            placeholders = ", ".join("?" * len(variants))
+            rows = self._conn.execute(
+                f"SELECT id, phash FROM known_content WHERE band{band} IN ({placeholders})", variants
+            )
+            for entry_id, stored_phash in rows:
+                if entry_id in seen:
+                    continue
+                seen.add(entry_id)
+                distance = hamming_distance(phash, _to_unsigned(stored_phash))
+                if distance <= self.max_distance and (best is None or distance < best[0]):
+                    best = (distance, entry_id)
+                    if distance == 0:
+                        return best
+        return best
+    
+    def stats(self) -> Dict[str, Any]:
+        """Entry count and total lookups answered"""
+        with self._lock:
+            entries, hits = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(hits), 0) FROM known_content").fetchone()
+        return {"entries": entries, "hits": hits, "max_distance": self.max_distance}
+    
+    def clear(self):
+        """Forget every indexed image"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM known_content")
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM known_content").fetchone()[0]
@@ -0,0 +1,75 @@
+"""
+InstaFacade Streaming Downloads - Size caps, type sniffing and hashing applied chunk by chunk
+"""
+
+import hashlib
+from typing import NamedTuple, Optional
+from .preprocessing import sniff_image_mime
+from . import metrics
+
+# Enough for every signature sniff_image_mime knows (HEIC/AVIF brands end at byte 12)
+SNIFF_BYTES = 16
+
+
+class DownloadRejected(Exception):
+    """A download was aborted because it is too large or is not an image"""
+
+
+class StreamedImage(NamedTuple):
+    """An image fetched through ImageStreamGuard, with its digest computed during the download"""
+    data: bytes
+    sha256: str
+    mime_type: str
+
+
+class ImageStreamGuard:
+    """
+    Checks a download as it arrives: aborts once it exceeds max_bytes (or up front when
+    Content-Length already does), rejects anything that is not an image as soon as the
+    first bytes are in, and hashes the stream so the caller never re-reads the bytes.
+    """
+    
+    def __init__(self, url: str, max_bytes: int = 0, declared_length: Optional[int] = None):
+        """
+        Args:
+            url: Source of the download, for error messages
+            max_bytes: Size limit in bytes (0 disables it)
+            declared_length: Content-Length of the response, if the server sent one
+        """
+        self.url = url
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.mime_type: Optional[str] = None
+        self._head = b""
+        self._hasher = hashlib.sha256()
+        
+        if max_bytes and declared_length is not None and declared_length > max_bytes:
+            self._reject(f"{url} is {declared_length:,} bytes, over the {max_bytes:,} byte limit")
+    
+    def feed(self, chunk: bytes):
+        """Account for the next chunk, raising DownloadRejected as soon as a check fails"""
+        self.size += len(chunk)
+        if self.max_bytes and self.size > self.max_bytes:
+            self._reject(f"{self.url} exceeded the {self.max_bytes:,} byte limit")
+        
+        if self.mime_type is None:
+            self._head += chunk[:SNIFF_BYTES - len(self._head)]
+            if len(self._head) >= SNIFF_BYTES:
+                self._sniff()
+        
+        self._hasher.update(chunk)
+    
+    def finish(self) -> str:
+        """Run the type check for downloads shorter than the sniff window and return the SHA-256 hex digest"""
+        if self.mime_type is None:
+            self._sniff()
+        return self._hasher.hexdigest()
+    
+    def _sniff(self):
+        self.mime_type = sniff_image_mime(self._head)
+        if self.mime_type is None:
+            self._reject(f"{self.url} is not a supported image (starts with {self._head[:8]!r})")
+    
+    def _reject(self, reason: str):
+        metrics.incr("downloads_rejected")
+        raise DownloadRejected(reason)
@@ -2,6 +2,7 @@
 Services module for InstaFacade - External service integrations
 """
 
-from .mcp_service import MCPService
+from .mcp_service import MCPService, DaemonSession
+from .mcp_daemon import MCPDaemon
 
-__all__ = ["MCPService"] 
\ No newline at end of file
+__all__ = ["MCPService", "DaemonSession", "MCPDaemon"] 
\ No newline at end of file
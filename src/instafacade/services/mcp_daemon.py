@@ -0,0 +1,284 @@
+"""
+MCP Daemon for InstaFacade - One long-lived, logged-in Instagram DM MCP server shared over SSE
+"""
+
+import asyncio
+import logging
+import os
+import shutil
+import sys
+import time
+from typing import Dict, Any, List, Optional
+import anyio
+
+logger = logging.getLogger(__name__)
+
+
+class UpstreamUnavailable(Exception):
+    """An upstream server went away before a call was sent to it, so the call can go to another"""
+
+
+class UpstreamServer:
+    """
+    One Instagram DM MCP server process run over stdio by the daemon. It is pinged every
+    health_interval seconds and restarted with backoff when it dies or stops answering;
+    restarts reuse the session file, so they don't need a new login.
+    
+    A server with a seed_file gets its own session file, copied from the seed whenever the
+    seed is newer, so no two processes ever write the same file.
+    """
+    
+    def __init__(self, index: int, server_path: str, session_file: str, init_timeout: float = 120.0, health_interval: float = 30.0,
+                 seed_file: Optional[str] = None):
+        self.index = index
+        self.server_path = server_path
+        self.session_file = session_file
+        self.seed_file = seed_file
+        self.init_timeout = init_timeout
+        self.health_interval = health_interval
+        self.session = None
+        self.ready = asyncio.Event()
+        self.in_flight = 0
+        self.calls = 0
+        self.restarts = 0
+        self.last_error: Optional[str] = None
+        self.connected_at: Optional[float] = None
+        self._broken = asyncio.Event()
+    
+    async def run(self):
+        """Keep the server running until cancelled"""
+        from mcp import ClientSession, StdioServerParameters
+        from mcp.client.stdio import stdio_client
+        
+        params = StdioServerParameters(command=sys.executable, args=[self.server_path, "--session-file", self.session_file])
+        delay = 1.0
+        while True:
+            logger.info("🔧 Starting Instagram MCP server #%s", self.index)
+            try:
+                self._seed_session()
+                async with stdio_client(params) as (read, write):
+                    async with ClientSession(read, write) as session:
+                        await asyncio.wait_for(session.initialize(), timeout=self.init_timeout)
+                        self.session = session
+                        self.connected_at = time.time()
+                        self._broken.clear()
+                        self.ready.set()
+                        logger.info("✅ Instagram MCP server #%s ready", self.index)
+                        delay = 1.0
+                        await self._watch(session)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = str(e)
+                logger.warning("💔 Instagram MCP server #%s failed: %s", self.index, e)
+            finally:
+                self.ready.clear()
+                self.session = None
+                self.connected_at = None
+            
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 60.0)
+            self.restarts += 1
+    
+    def _seed_session(self):
+        """Copy the seed session over this server's own file when the seed is newer"""
+        if not self.seed_file or not os.path.exists(self.seed_file):
+            return
+        if os.path.exists(self.session_file) and os.path.getmtime(self.session_file) >= os.path.getmtime(self.seed_file):
+            return
+        shutil.copy2(self.seed_file, self.session_file)
+        logger.info("📋 Instagram MCP server #%s uses a copy of %s", self.index, self.seed_file)
+    
+    async def _watch(self, session):
+        while True:
+            try:
+                await asyncio.wait_for(self._broken.wait(), timeout=self.health_interval)
+                return
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await asyncio.wait_for(session.send_ping(), timeout=10.0)
+            except Exception as e:
+                self.last_error = f"health check failed: {str(e) or type(e).__name__}"
+                logger.warning("💔 Instagram MCP server #%s health check failed: %s", self.index, str(e) or type(e).__name__)
+                return
+    
+    async def request(self, call):
+        """Run call(session) on this server; a broken connection triggers a restart"""
+        session = self.session
+        if session is None:
+            self.ready.clear()
+            raise UpstreamUnavailable(f"Instagram MCP server #{self.index} is restarting")
+        self.in_flight += 1
+        self.calls += 1
+        try:
+            return await call(session)
+        except (anyio.ClosedResourceError, anyio.BrokenResourceError) as e:
+            self._broken.set()
+            self.ready.clear()
+            raise UpstreamUnavailable(f"Instagram MCP server #{self.index} is restarting: {e}")
+        finally:
+            self.in_flight -= 1
+    
+    def status(self) -> Dict[str, Any]:
+        return {
+            "index": self.index,
+            "ready": self.ready.is_set(),
+            "in_flight": self.in_flight,
+            "calls": self.calls,
+            "restarts": self.restarts,
+            "uptime_seconds": round(time.time() - self.connected_at, 1) if self.connected_at else None,
+            "last_error": self.last_error
+        }
+
+
+class MCPDaemon:
+    """
+    Runs a pool of logged-in Instagram DM MCP servers once and serves their tools over
+    SSE, so every agent, sweep or script process attaches in milliseconds instead of
+    starting a server and logging in (MCPService.connect uses it when
+    INSTAFACADE_MCP_DAEMON_URL is set). Each call goes to the ready server with the
+    fewest calls in flight. GET /health reports the pool.
+    
+    Server #0 owns session_file. The others only start once it is ready and each run on
+    their own copy of it (session.1.json, ...), so the pool logs in once and instagrapi
+    processes never rewrite the same file.
+    """
+    
+    def __init__(self, server_path: str, session_file: Optional[str] = None, host: str = "127.0.0.1", port: int = 8765,
+                 pool_size: int = 1, init_timeout: float = 120.0, health_interval: float = 30.0, call_timeout: float = 60.0):
+        """
+        Args:
+            server_path: Path of instagram_dm_mcp/src/mcp_server.py
+            session_file: Instagram session file of server #0 and seed of the others (default ./session.json)
+            host: Interface to listen on; anything reachable can send DMs as you, keep it local
+            port: Port to listen on
+            pool_size: Number of server processes
+            init_timeout: Seconds a server may take to log in and initialize
+            health_interval: Seconds between health pings of each server
+            call_timeout: Seconds a client call waits for a ready server
+        """
+        self.host = host
+        self.port = port
+        self.call_timeout = call_timeout
+        self.started_at = time.time()
+        session_file = session_file or os.path.join(os.getcwd(), "session.json")
+        root, extension = os.path.splitext(session_file)
+        self.upstreams = [UpstreamServer(0, server_path, session_file, init_timeout, health_interval)] + [
+            UpstreamServer(index, server_path, f"{root}.{index}{extension or '.json'}", init_timeout, health_interval, seed_file=session_file)
+            for index in range(1, max(1, pool_size))
+        ]
+    
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+    
+    async def _pick(self) -> UpstreamServer:
+        """The ready server with the fewest calls in flight, waiting for one if none is ready"""
+        deadline = time.monotonic() + self.call_timeout
+        while True:
+            ready = [upstream for upstream in self.upstreams if upstream.ready.is_set()]
+            if ready:
+                return min(ready, key=lambda upstream: upstream.in_flight)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise Exception("No Instagram MCP server is ready")
+            waiters = [asyncio.create_task(upstream.ready.wait()) for upstream in self.upstreams]
+            try:
+                await asyncio.wait(waiters, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                for waiter in waiters:
+                    waiter.cancel()
+    
+    async def _forward(self, call):
+        """Run call on a ready server, moving to another one if it went away before the call was sent"""
+        for attempt in range(2):
+            upstream = await self._pick()
+            try:
+                return await upstream.request(call)
+            except UpstreamUnavailable:
+                if attempt:
+                    raise
+    
+    def health(self) -> Dict[str, Any]:
+        """Pool status; "ok" when at least one server is ready"""
+        servers = [upstream.status() for upstream in self.upstreams]
+        ready = sum(1 for server in servers if server["ready"])
+        return {
+            "status": "ok" if ready else "starting",
+            "ready": ready,
+            "pool_size": len(servers),
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "servers": servers
+        }
+    
+    def build_server(self):
+        """Low-level MCP server whose tools are forwarded to the pool"""
+        from mcp import types
+        from mcp.server.lowlevel import Server
+        
+        server = Server("instafacade-instagram-daemon")
+        
+        @server.list_tools()
+        async def list_tools() -> List[types.Tool]:
+            result = await self._forward(lambda session: session.list_tools())
+            return result.tools
+        
+        @server.call_tool(validate_input=False)
+        async def call_tool(name: str, arguments: Dict[str, Any]) -> types.CallToolResult:
+            logger.info("📡 %s", name)
+            try:
+                return await self._forward(lambda session: session.call_tool(name, arguments))
+            except Exception as e:
+                logger.warning("❌ %s failed: %s", name, e)
+                return types.CallToolResult(content=[types.TextContent(type="text", text=str(e))], isError=True)
+        
+        return server
+    
+    def build_app(self):
+        """Starlette app: GET /sse and POST /messages/ for MCP clients, GET /health for monitoring"""
+        from mcp.server.sse import SseServerTransport
+        from starlette.applications import Starlette
+        from starlette.responses import JSONResponse, Response
+        from starlette.routing import Mount, Route
+        
+        server = self.build_server()
+        transport = SseServerTransport("/messages/")
+        
+        async def handle_sse(request):
+            async with transport.connect_sse(request.scope, request.receive, request._send) as (read, write):
+                await server.run(read, write, server.create_initialization_options())
+            return Response()
+        
+        async def handle_health(request):
+            health = self.health()
+            return JSONResponse(health, status_code=200 if health["ready"] else 503)
+        
+        return Starlette(routes=[
+            Route("/sse", endpoint=handle_sse, methods=["GET"]),
+            Route("/health", endpoint=handle_health, methods=["GET"]),
+            Mount("/messages/", app=transport.handle_post_message)
+        ])
+    
+    async def _run_after_primary(self, upstream: UpstreamServer):
+        """Start a secondary server once server #0 is logged in, so it seeds from a fresh session"""
+        await self.upstreams[0].ready.wait()
+        await upstream.run()
+    
+    async def serve(self):
+        """Start the pool and serve until cancelled"""
+        import uvicorn
+        
+        if self.host not in ("127.0.0.1", "localhost", "::1"):
+            logger.warning("⚠️ MCP daemon listening on %s: anyone who can reach it can send DMs from your account", self.host)
+        
+        tasks = [asyncio.create_task(self.upstreams[0].run())]
+        tasks += [asyncio.create_task(self._run_after_primary(upstream)) for upstream in self.upstreams[1:]]
+        config = uvicorn.Config(self.build_app(), host=self.host, port=self.port, log_level="warning")
+        try:
+            logger.info("🚀 MCP daemon listening on %s (pool of %s)", self.url, len(self.upstreams))
+            await uvicorn.Server(config).serve()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
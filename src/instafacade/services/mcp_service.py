@@ -1 +1,303 @@
- 
\ No newline at end of file
+"""
+MCP Service for InstaFacade - Direct access to the Instagram DM MCP server tools
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sys
+from contextlib import asynccontextmanager
+from typing import Dict, Any, List, Optional
+import anyio
+from ..core import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class DaemonSession:
+    """
+    ClientSession stand-in for a connection to the shared MCP daemon (see mcp_daemon.py).
+    
+    A background task owns the SSE connection, pings it every health_interval seconds and
+    reconnects with backoff when it drops; calls made meanwhile wait for the new session.
+    A call is retried once only if the connection was already closed before it was sent,
+    so a DM is never delivered twice.
+    """
+    
+    def __init__(self, url: str, init_timeout: float = 60.0, health_interval: Optional[float] = None, reconnect_timeout: float = 60.0):
+        self.url = url if url.rstrip("/").endswith("/sse") else url.rstrip("/") + "/sse"
+        self.init_timeout = init_timeout
+        self.health_interval = health_interval if health_interval is not None else float(os.getenv('INSTAFACADE_MCP_HEALTH_INTERVAL', '30'))
+        self.reconnect_timeout = reconnect_timeout
+        self.reconnects = 0
+        self._session = None
+        self._ready = asyncio.Event()
+        self._broken = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+    
+    async def start(self):
+        """Open the first connection; raises if the daemon cannot be reached"""
+        started = asyncio.get_running_loop().create_future()
+        self._task = asyncio.create_task(self._run(started))
+        await started
+    
+    async def aclose(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except BaseException:
+                pass
+            self._task = None
+    
+    async def _run(self, started: asyncio.Future):
+        from mcp import ClientSession
+        from mcp.client.sse import sse_client
+        
+        delay = 1.0
+        while True:
+            try:
+                async with sse_client(self.url, timeout=min(self.init_timeout, 10.0)) as (read, write):
+                    async with ClientSession(read, write) as session:
+                        await asyncio.wait_for(session.initialize(), timeout=self.init_timeout)
+                        self._session = session
+                        self._broken.clear()
+                        self._ready.set()
+                        if not started.done():
+                            started.set_result(None)
+                        else:
+                            logger.info("🔌 Reconnected to MCP daemon at %s", self.url)
+                        delay = 1.0
+                        await self._watch(session)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if not started.done():
+                    started.set_exception(e)
+                    return
+                logger.warning("💔 Lost MCP daemon connection: %s", e)
+            finally:
+                self._ready.clear()
+                self._session = None
+            
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30.0)
+            self.reconnects += 1
+    
+    async def _watch(self, session):
+        """Return when the connection is reported broken or stops answering pings"""
+        while True:
+            try:
+                await asyncio.wait_for(self._broken.wait(), timeout=self.health_interval)
+                return
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await asyncio.wait_for(session.send_ping(), timeout=10.0)
+            except Exception as e:
+                logger.warning("💔 MCP daemon health check failed: %s", str(e) or type(e).__name__)
+                return
+    
+    async def _request(self, call):
+        from mcp.shared.exceptions import McpError
+        from mcp.types import CONNECTION_CLOSED
+        
+        for attempt in range(2):
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout=self.reconnect_timeout)
+            except asyncio.TimeoutError:
+                raise Exception(f"MCP daemon at {self.url} is unavailable")
+            session = self._session
+            if session is None:
+                # Dropped after the ready signal; nothing was sent, wait for the next connection
+                continue
+            try:
+                return await call(session)
+            except (anyio.ClosedResourceError, anyio.BrokenResourceError) as e:
+                # The request never left: safe to send again on the next connection
+                self._mark_broken()
+                if attempt:
+                    raise Exception(f"MCP daemon connection lost: {e}")
+            except McpError as e:
+                # Closed while waiting for the answer: the call may have run, so it is not retried
+                if e.error.code == CONNECTION_CLOSED:
+                    self._mark_broken()
+                raise
+        raise Exception(f"MCP daemon at {self.url} is unavailable")
+    
+    def _mark_broken(self):
+        """Make the background task reconnect and hold new calls until it has"""
+        self._broken.set()
+        self._ready.clear()
+    
+    async def call_tool(self, name: str, arguments: Optional[Dict[str, Any]] = None, *args, **kwargs):
+        return await self._request(lambda session: session.call_tool(name, arguments, *args, **kwargs))
+    
+    async def list_tools(self, *args, **kwargs):
+        return await self._request(lambda session: session.list_tools(*args, **kwargs))
+    
+    async def send_ping(self):
+        return await self._request(lambda session: session.send_ping())
+
+
+class MCPService:
+    """
+    Calls Instagram DM MCP tools from code instead of through the agent.
+    
+    Holds the live ClientSession (started here with connect(), or handed over with
+    attach()) and the event loop it runs on, so tools running in worker threads can
+    call MCP tools too. Tool results are returned as dictionaries.
+    """
+    
+    def __init__(self, session=None, timeout: Optional[float] = None):
+        """
+        Args:
+            session: An initialized mcp.ClientSession, if one is already open
+            timeout: Seconds to wait for a tool call (INSTAFACADE_MCP_TOOL_TIMEOUT, default 60)
+        """
+        self.session = session
+        self.timeout = timeout if timeout is not None else float(os.getenv('INSTAFACADE_MCP_TOOL_TIMEOUT', '60'))
+        self.daemon_url = os.getenv('INSTAFACADE_MCP_DAEMON_URL', '').strip() or None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    @property
+    def connected(self) -> bool:
+        return self.session is not None
+    
+    def attach(self, session):
+        """Use an initialized ClientSession; call from the event loop that owns it"""
+        self.session = session
+        self.loop = asyncio.get_running_loop()
+    
+    def detach(self):
+        self.session = None
+        self.loop = None
+    
+    @asynccontextmanager
+    async def connect(self, server_path: str, session_file: Optional[str] = None, init_timeout: float = 60.0):
+        """
+        Attach to the shared MCP daemon (INSTAFACADE_MCP_DAEMON_URL) if one is running,
+        otherwise start the Instagram DM MCP server over stdio, initialize the session and attach it
+        
+        Args:
+            server_path: Path of instagram_dm_mcp/src/mcp_server.py
+            session_file: Instagram session file passed to the server (default ./session.json)
+            init_timeout: Seconds to wait for the server to log in and initialize
+        """
+        if self.daemon_url:
+            daemon = DaemonSession(self.daemon_url, init_timeout=init_timeout, reconnect_timeout=self.timeout)
+            try:
+                await daemon.start()
+            except Exception as e:
+                logger.warning("⚠️ MCP daemon at %s not reachable (%s), starting the server over stdio", daemon.url, e)
+            else:
+                logger.info("🔌 Attached to MCP daemon at %s", daemon.url)
+                self.attach(daemon)
+                try:
+                    yield daemon
+                finally:
+                    self.detach()
+                    await daemon.aclose()
+                return
+        
+        from mcp import ClientSession, StdioServerParameters
+        from mcp.client.stdio import stdio_client
+        
+        session_file = session_file or os.path.join(os.getcwd(), "session.json")
+        server_params = StdioServerParameters(command=sys.executable, args=[server_path, "--session-file", session_file])
+        logger.info("🔧 Starting MCP server with command: %s %s", sys.executable, " ".join(server_params.args))
+        
+        async with stdio_client(server_params) as (read, write):
+            async with ClientSession(read, write) as session:
+                await asyncio.wait_for(session.initialize(), timeout=init_timeout)
+                self.attach(session)
+                try:
+                    yield session
+                finally:
+                    self.detach()
+    
+    async def call_tool(self, name: str, arguments: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Call an MCP tool and return its result as a dictionary
+        
+        JSON results are decoded; anything else is returned as {"text": ...}. Raises if
+        there is no session, the call times out, or the server reports a tool error.
+        """
+        if self.session is None:
+            raise Exception("Instagram MCP session is not connected")
+        
+        logger.debug("📡 MCP call: %s %s", name, arguments or {})
+        metrics.incr(f"api_calls.mcp.{name}")
+        with metrics.span("mcp", tool=name):
+            result = await asyncio.wait_for(self.session.call_tool(name, arguments or {}), timeout=self.timeout)
+        
+        payload = self._parse_result(result)
+        if getattr(result, "isError", False):
+            raise Exception(f"MCP tool {name} failed: {payload.get('text') or payload}")
+        return payload
+    
+    def call_tool_sync(self, name: str, arguments: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """call_tool for synchronous code running outside the session's event loop"""
+        return self.run_sync(self.call_tool(name, arguments))
+    
+    def run_sync(self, coroutine):
+        """Run a coroutine on the session's event loop from another thread and wait for it"""
+        if self.loop is None:
+            coroutine.close()
+            raise Exception("Instagram MCP session is not connected")
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            coroutine.close()
+            raise Exception("Synchronous MCP calls cannot run on the session's own event loop; use the async variant")
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+    
+    async def get_user_stories(self, username: str) -> List[Dict[str, Any]]:
+        """Current stories of a user"""
+        payload = self._check_success(await self.call_tool("get_user_stories", {"username": username}), "get_user_stories")
+        return self._items(payload, ("stories", "items", "reels"))
+    
+    async def get_user_posts(self, username: str, count: int = 12) -> List[Dict[str, Any]]:
+        """The latest posts of a user, newest first"""
+        payload = self._check_success(await self.call_tool("get_user_posts", {"username": username, "count": count}), "get_user_posts")
+        return self._items(payload, ("posts", "medias", "items"))[:count]
+    
+    async def send_message(self, username: str, message: str) -> Dict[str, Any]:
+        """Send an Instagram DM and return the server's result"""
+        return self._check_success(await self.call_tool("send_message", {"username": username, "message": message}), "send_message")
+    
+    @staticmethod
+    def _parse_result(result) -> Dict[str, Any]:
+        structured = getattr(result, "structuredContent", None)
+        if isinstance(structured, dict):
+            # FastMCP wraps non-object return values as {"result": ...}
+            inner = structured.get("result")
+            return inner if len(structured) == 1 and isinstance(inner, dict) else structured
+        
+        texts = [item.text for item in getattr(result, "content", []) or [] if getattr(item, "text", None) is not None]
+        if len(texts) == 1:
+            try:
+                decoded = json.loads(texts[0])
+            except ValueError:
+                decoded = None
+            if isinstance(decoded, dict):
+                return decoded
+            if isinstance(decoded, list):
+                return {"items": decoded}
+        return {"text": "\n".join(texts)}
+    
+    @staticmethod
+    def _check_success(payload: Dict[str, Any], tool_name: str) -> Dict[str, Any]:
+        if payload.get("success") is False:
+            raise Exception(f"{tool_name} failed: {payload.get('message') or payload.get('error') or 'unknown error'}")
+        return payload
+    
+    @staticmethod
+    def _items(payload: Dict[str, Any], keys: tuple) -> List[Dict[str, Any]]:
+        for key in keys:
+            if isinstance(payload.get(key), list):
+                return payload[key]
+        return []
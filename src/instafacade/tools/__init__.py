@@ -7,11 +7,13 @@ from .story_tools import StoryAnalysisTools
 from .post_tools import PostAnalysisTools
 from .message_tools import MessageTools
 from .memory_tools import MemoryTools
+from .sweep_tools import ProfileSweepTools
 
 __all__ = [
     "ImageAnalysisTools",
     "StoryAnalysisTools", 
     "PostAnalysisTools",
     "MessageTools",
-    "MemoryTools"
+    "MemoryTools",
+    "ProfileSweepTools"
 ] 
\ No newline at end of file
@@ -2,16 +2,24 @@
 Image analysis tools for InstaFacade
 """
 
+import asyncio
+import logging
+import os
 from typing import Dict, Any, Optional
 from langchain.tools import tool
+from langchain_core.tools import StructuredTool
 from ..core.analyzer import InstaFacadeAnalyzer
+from ..core.async_analyzer import AsyncInstaFacadeAnalyzer
+
+logger = logging.getLogger(__name__)
 
 
 class ImageAnalysisTools:
     """Tools for image authenticity analysis"""
     
-    def __init__(self, facade_analyzer: Optional[InstaFacadeAnalyzer] = None):
+    def __init__(self, facade_analyzer: Optional[InstaFacadeAnalyzer] = None, async_analyzer: Optional[AsyncInstaFacadeAnalyzer] = None):
         self.facade_analyzer = facade_analyzer
+        self.async_analyzer = async_analyzer
     
     def get_tools(self):
         """Get all image analysis tools"""
@@ -24,10 +32,10 @@ class ImageAnalysisTools:
     
     @property
     def analyze_image_authenticity(self):
-        """Create the analyze image tool with proper closure"""
+        """Create the analyze image tool with proper closure (sync and async variants)"""
         facade_analyzer = self.facade_analyzer
+        async_analyzer = self.async_analyzer
         
-        @tool
         def analyze_image_authenticity(image_path_or_url: str) -> Dict[str, Any]:
             """
             Analyze an image for authenticity using InstaFacade.
@@ -38,39 +46,45 @@ class ImageAnalysisTools:
             Returns:
                 Dictionary with analysis results including deception detection
             """
-            print(f"🔍 TOOL CALLED: analyze_image_authenticity with input: {image_path_or_url}")
+            logger.info("🔍 TOOL CALLED: analyze_image_authenticity with input: %s", image_path_or_url)
             
             if not facade_analyzer:
-                print("❌ InstaFacade analyzer not available")
+                logger.warning("❌ InstaFacade analyzer not available")
                 return {"error": "InstaFacade analyzer not available"}
             
+            input_error = _check_image_input(image_path_or_url)
+            if input_error:
+                return input_error
+            
             try:
-                # Check if input is URL or local file
-                is_url = image_path_or_url.startswith(('http://', 'https://'))
-                
-                if is_url:
-                    print(f"🌐 Input detected as URL, validating accessibility...")
-                    import requests
-                    response = requests.head(image_path_or_url, timeout=10)
-                    response.raise_for_status()
-                    print(f"✅ URL is accessible, starting analysis...")
-                else:
-                    print(f"📁 Input detected as local file path, checking existence...")
-                    import os
-                    if not os.path.exists(image_path_or_url):
-                        print(f"❌ Image file not found: {image_path_or_url}")
-                        return {"error": f"Image file not found: {image_path_or_url}"}
-                    print(f"✅ Local file exists, starting analysis...")
-                
-                print(f"🔍 Analyzing {'URL' if is_url else 'file'}: {image_path_or_url}")
                 results = facade_analyzer.analyze_image(image_path_or_url)
-                print(f"✅ Analysis completed: {results}")
+                logger.debug("✅ Analysis completed: %s", results)
+                return results
+            except Exception as e:
+                logger.warning("❌ Image analysis failed: %s", e)
+                return {"error": f"Analysis failed: {str(e)}"}
+        
+        async def aanalyze_image_authenticity(image_path_or_url: str) -> Dict[str, Any]:
+            """Async variant used by the agent's event loop"""
+            if not async_analyzer:
+                # Keep the event loop free by running the synchronous pipeline in a worker thread
+                return await asyncio.to_thread(analyze_image_authenticity, image_path_or_url)
+            
+            logger.info("🔍 TOOL CALLED (async): analyze_image_authenticity with input: %s", image_path_or_url)
+            
+            input_error = _check_image_input(image_path_or_url)
+            if input_error:
+                return input_error
+            
+            try:
+                results = await async_analyzer.analyze_image(image_path_or_url)
+                logger.debug("✅ Analysis completed: %s", results)
                 return results
             except Exception as e:
-                print(f"❌ Image analysis failed: {e}")
+                logger.warning("❌ Image analysis failed: %s", e)
                 return {"error": f"Analysis failed: {str(e)}"}
         
-        return analyze_image_authenticity
+        return StructuredTool.from_function(func=analyze_image_authenticity, coroutine=aanalyze_image_authenticity)
     
     @property
     def get_verdict_summary(self):
@@ -126,7 +140,7 @@ class ImageAnalysisTools:
             Returns:
                 Confirmation message
             """
-            print(f"🧪 DEBUG TOOL CALLED with message: {test_message}")
+            logger.info("🧪 DEBUG TOOL CALLED with message: %s", test_message)
             return f"✅ Debug tool working! Received: {test_message}"
         
         return debug_test_tool
@@ -143,7 +157,26 @@ class ImageAnalysisTools:
             Returns:
                 List of available tools
             """
-            print(f"🛠️  LIST TOOLS CALLED")
-            return "Available tools: analyze_image_authenticity, get_verdict_summary, debug_test_tool, list_available_tools, check_latest_authentic_story, and Instagram MCP tools"
+            logger.info("🛠️  LIST TOOLS CALLED")
+            return "Available tools: analyze_image_authenticity, get_verdict_summary, debug_test_tool, list_available_tools, check_latest_authentic_story, check_latest_authentic_post, sweep_instagram_profile, and Instagram MCP tools"
         
-        return list_available_tools 
\ No newline at end of file
+        return list_available_tools
+
+
+def _check_image_input(image_path_or_url: str) -> Optional[Dict[str, Any]]:
+    """Return an error result if a local image path does not exist"""
+    # Check if input is URL or local file
+    is_url = image_path_or_url.startswith(('http://', 'https://'))
+    
+    if is_url:
+        # The analyzer fetches the URL once and reports accessibility errors itself
+        logger.debug("🌐 Input detected as URL, starting analysis...")
+    else:
+        logger.debug("📁 Input detected as local file path, checking existence...")
+        if not os.path.exists(image_path_or_url):
+            logger.warning("❌ Image file not found: %s", image_path_or_url)
+            return {"error": f"Image file not found: {image_path_or_url}"}
+        logger.debug("✅ Local file exists, starting analysis...")
+    
+    logger.debug("🔍 Analyzing %s: %s", 'URL' if is_url else 'file', image_path_or_url)
+    return None
@@ -2,17 +2,20 @@
 Memory management tools for InstaFacade
 """
 
-from typing import Dict, Any, List
-from langchain.tools import tool
-from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
+import asyncio
+import logging
+from typing import Dict, Any
+from langchain_core.tools import StructuredTool
+from ..core.conversation_memory import ConversationMemory
+
+logger = logging.getLogger(__name__)
 
 
 class MemoryTools:
     """Tools for managing conversation memory"""
     
-    def __init__(self, conversation_history: List, thread_id: str):
-        self.conversation_history = conversation_history
-        self.thread_id = thread_id
+    def __init__(self, memory: ConversationMemory):
+        self.memory = memory
     
     def get_tools(self):
         """Get all memory management tools"""
@@ -22,65 +25,81 @@ class MemoryTools:
     
     @property
     def manage_conversation_memory(self):
-        """Create tool to manage conversation memory"""
-        conversation_history = self.conversation_history
-        thread_id = self.thread_id
+        """Create tool to manage conversation memory (sync and async variants)"""
+        memory = self.memory
         
-        @tool
         def manage_conversation_memory(action: str = "status") -> Dict[str, Any]:
             """
             Manage conversation memory and history.
             
             Args:
-                action: Action to perform - "status", "clear", "summary"
+                action: Action to perform - "status", "clear", "summary", or "compact"
+                        (summarize older turns now to make the conversation cheaper)
                 
             Returns:
                 Dictionary with memory management results
             """
-            print(f"💾 TOOL CALLED: manage_conversation_memory with action: {action}")
+            logger.info("💾 TOOL CALLED: manage_conversation_memory with action: %s", action)
             
             if action == "status":
+                recent = [message for turn in memory.turns[-2:] for message in turn][-3:]  # Show last 3 messages
                 return {
                     "action": "status",
-                    "message_count": len(conversation_history),
-                    "thread_id": thread_id,
+                    **memory.stats(),
                     "memory_enabled": True,
                     "last_messages": [
                         {
                             "type": type(msg).__name__,
                             "content_preview": str(msg.content)[:100] + "..." if len(str(msg.content)) > 100 else str(msg.content)
                         }
-                        for msg in conversation_history[-3:]  # Show last 3 messages
+                        for msg in recent
                     ]
                 }
             
             elif action == "clear":
-                old_count = len(conversation_history)
-                # Keep only the system message
-                system_messages = [msg for msg in conversation_history if isinstance(msg, SystemMessage)]
-                conversation_history.clear()
-                conversation_history.extend(system_messages)
+                removed = memory.clear()
                 return {
                     "action": "clear",
-                    "message": f"Conversation history cleared! Removed {old_count - len(system_messages)} messages.",
-                    "remaining_messages": len(conversation_history)
+                    "message": f"Conversation history cleared! Removed {removed} messages.",
+                    "remaining_messages": 0
                 }
             
             elif action == "summary":
                 message_types = {}
-                for msg in conversation_history:
-                    msg_type = type(msg).__name__
-                    message_types[msg_type] = message_types.get(msg_type, 0) + 1
+                for turn in memory.turns:
+                    for msg in turn:
+                        msg_type = type(msg).__name__
+                        message_types[msg_type] = message_types.get(msg_type, 0) + 1
                 
                 return {
                     "action": "summary",
-                    "total_messages": len(conversation_history),
+                    "total_messages": sum(message_types.values()),
                     "message_types": message_types,
-                    "thread_id": thread_id,
+                    "running_summary": memory.summary or None,
                     "memory_enabled": True
                 }
             
+            elif action == "compact":
+                try:
+                    asyncio.get_running_loop()
+                except RuntimeError:
+                    return asyncio.run(amanage_conversation_memory(action))
+                return {"error": "Use the async tool to compact memory inside an event loop"}
+            
             else:
-                return {"error": f"Unknown action: {action}. Use 'status', 'clear', or 'summary'"}
+                return {"error": f"Unknown action: {action}. Use 'status', 'clear', 'summary' or 'compact'"}
+        
+        async def amanage_conversation_memory(action: str = "status") -> Dict[str, Any]:
+            """Async variant used by the agent's event loop"""
+            if action != "compact":
+                return manage_conversation_memory(action)
+            
+            logger.info("💾 TOOL CALLED (async): manage_conversation_memory with action: %s", action)
+            result = await memory.compact()
+            return {
+                "action": "compact",
+                **result,
+                "message": f"Summarized {result['turns_summarized']} older turns; the last {memory.keep_recent_turns} are kept word for word."
+            }
         
-        return manage_conversation_memory 
\ No newline at end of file
+        return StructuredTool.from_function(func=manage_conversation_memory, coroutine=amanage_conversation_memory)
@@ -3,7 +3,8 @@ Message sending tools for InstaFacade
 """
 
 from typing import Dict, Any, Optional
-from langchain.tools import tool
+from langchain_core.tools import StructuredTool
+from ..services.mcp_service import MCPService
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,6 +13,9 @@ logger = logging.getLogger(__name__)
 class MessageTools:
     """Tools for sending messages via Instagram DM"""
     
+    def __init__(self, mcp_service: Optional[MCPService] = None):
+        self.mcp_service = mcp_service
+    
     def get_tools(self):
         """Get all message tools"""
         return [
@@ -21,72 +25,102 @@ class MessageTools:
     
     @property
     def send_snarky_message_with_proof(self):
-        """Create tool to send the snarky message to the user"""
+        """Create tool to send the snarky message to the user (sync and async variants)"""
         
-        @tool
         def send_snarky_message_with_proof(username: str, snarky_message: str, proof_source: str) -> Dict[str, Any]:
             """
             Send a snarky message to a user who posted a fake story, including proof.
+            The message is delivered directly - there is no need to call send_message afterwards.
             
             Args:
                 username: Username to send the message to
                 snarky_message: The snarky message to send
                 proof_source: Source URL as proof of the fake content
-                
+            
             Returns:
                 Dictionary with sending results
             """
-            print(f"📤 TOOL CALLED: send_snarky_message_with_proof to @{username}")
-            
-            # Combine the snarky message with proof
-            full_message = f"{snarky_message}\n\nProof: {proof_source}"
-            
-            print(f"📝 Full message to send: {full_message}")
-            
-            # This will instruct the agent to use the send_message MCP tool
-            return {
-                "instruction": f"Please call the send_message tool with username '{username}' and message '{full_message}'",
-                "username": username,
-                "message": full_message,
-                "ready_to_send": True
-            }
+            logger.info("📤 TOOL CALLED: send_snarky_message_with_proof to @%s", username)
+            return self._deliver_sync(username, f"{snarky_message}\n\nProof: {proof_source}")
         
-        return send_snarky_message_with_proof
+        async def asend_snarky_message_with_proof(username: str, snarky_message: str, proof_source: str) -> Dict[str, Any]:
+            """Async variant used by the agent's event loop"""
+            logger.info("📤 TOOL CALLED (async): send_snarky_message_with_proof to @%s", username)
+            return await self.deliver(username, f"{snarky_message}\n\nProof: {proof_source}")
+        
+        return StructuredTool.from_function(func=send_snarky_message_with_proof, coroutine=asend_snarky_message_with_proof)
     
     @property
     def send_post_snarky_message_with_proof(self):
-        """Create tool to send the snarky message about a fake post to the user"""
+        """Create tool to send the snarky message about a fake post to the user (sync and async variants)"""
         
-        @tool
         def send_post_snarky_message_with_proof(username: str, snarky_message: str, proof_source: str) -> Dict[str, Any]:
             """
             Send a snarky message to a user who posted a fake image, including proof.
+            The message is delivered directly - there is no need to call send_message afterwards.
             
             Args:
                 username: Username to send the message to
                 snarky_message: The snarky message to send
                 proof_source: Source URL as proof of the stolen content
-                
+            
             Returns:
                 Dictionary with sending results
             """
-            print(f"📤 TOOL CALLED: send_post_snarky_message_with_proof to @{username}")
-            
-            # Combine the snarky message with proof
-            full_message = f"{snarky_message}\n\n🔍 Proof: {proof_source}\n\n#BustedByInstaFacade 📸✨"
-            
-            print(f"📝 Full message to send: {full_message}")
-            
-            # This will instruct the agent to use the send_message MCP tool
-            return {
-                "instruction": f"Please call the send_message tool with username '{username}' and message '{full_message}'",
-                "username": username,
-                "message": full_message,
-                "ready_to_send": True
-            }
+            logger.info("📤 TOOL CALLED: send_post_snarky_message_with_proof to @%s", username)
+            return self._deliver_sync(username, self._post_message(snarky_message, proof_source))
         
-        return send_post_snarky_message_with_proof
-
+        async def asend_post_snarky_message_with_proof(username: str, snarky_message: str, proof_source: str) -> Dict[str, Any]:
+            """Async variant used by the agent's event loop"""
+            logger.info("📤 TOOL CALLED (async): send_post_snarky_message_with_proof to @%s", username)
+            return await self.deliver(username, self._post_message(snarky_message, proof_source))
+        
+        return StructuredTool.from_function(func=send_post_snarky_message_with_proof, coroutine=asend_post_snarky_message_with_proof)
+    
+    @staticmethod
+    def _post_message(snarky_message: str, proof_source: str) -> str:
+        return f"{snarky_message}\n\n🔍 Proof: {proof_source}\n\n#BustedByInstaFacade 📸✨"
+    
+    async def deliver(self, username: str, message: str) -> Dict[str, Any]:
+        """
+        Send a DM through the MCP service and report what happened
+        
+        Without a connected session, returns the old instruction for the agent to call
+        send_message itself.
+        """
+        logger.debug("📝 Full message to send: %s", message)
+        
+        if not self.mcp_service or not self.mcp_service.connected:
+            return self._send_instruction(username, message)
+        
+        try:
+            result = await self.mcp_service.send_message(username, message)
+        except Exception as e:
+            logger.warning("❌ Failed to send message to @%s: %s", username, e)
+            return {"sent": False, "username": username, "message": message, "error": str(e)}
+        
+        logger.info("✅ Message sent to @%s", username)
+        return {"sent": True, "username": username, "message": message, "result": result}
+    
+    def _deliver_sync(self, username: str, message: str) -> Dict[str, Any]:
+        """deliver() for the synchronous tool variants, run on the MCP session's event loop"""
+        if not self.mcp_service or not self.mcp_service.connected:
+            return self._send_instruction(username, message)
+        try:
+            return self.mcp_service.run_sync(self.deliver(username, message))
+        except Exception as e:
+            return {"sent": False, "username": username, "message": message, "error": str(e)}
+    
+    @staticmethod
+    def _send_instruction(username: str, message: str) -> Dict[str, Any]:
+        # No live session: instruct the agent to use the send_message MCP tool
+        return {
+            "instruction": f"Please call the send_message tool with username '{username}' and message '{message}'",
+            "username": username,
+            "message": message,
+            "ready_to_send": True
+        }
+    
     def generate_savage_message(
         self,
         username: str,
@@ -106,12 +140,13 @@ class MessageTools:
             client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
             
             if is_fake:
+                confidence = evidence_details.get('confidence')
                 evidence_text = f"""
     EVIDENCE FOUND:
     - Original Source: {evidence_details.get('source', 'Unknown')}
     - Original Title: {evidence_details.get('title', 'N/A')}
     - Evidence URL: {evidence_details.get('url', 'N/A')}
-    - Detection Confidence: {evidence_details.get('confidence', 0.0) * 100:.1f}%
+    - Detection Confidence: {f'{confidence * 100:.1f}%' if confidence is not None else 'N/A'}
     """
                 
                 style_instructions = {
@@ -123,11 +158,11 @@ class MessageTools:
                 }
                 
                 prompt = f"""You are the most savage AI content detective ever created. You just caught @{username} red-handed posting STOLEN content on their Instagram {content_type}.
-
+    
     {evidence_text}
-
+    
     Your job is to generate an absolutely SAVAGE message to call them out. Style: {style} - {style_instructions.get(style, 'Be savage')}.
-
+    
     REQUIREMENTS:
     1. Be absolutely savage and unforgiving
     2. Include the evidence URL in the message for proof
@@ -136,14 +171,14 @@ class MessageTools:
     5. Use emojis strategically for maximum impact
     6. Keep it under 280 characters for Instagram DM
     7. Make it so savage that they'll think twice before stealing content again
-
+    
     DO NOT be nice or polite. This is about calling out content theft. Be RUTHLESS but clever.
-
+    
     Generate the message now:"""
-
+            
             else:
                 prompt = f"""Generate a message congratulating @{username} for posting authentic, original content on their Instagram {content_type}. Be enthusiastic and supportive, but keep the same energy level as if you were being savage. Make it fun and engaging. Style: {style}. Keep under 280 characters."""
-
+            
             response = client.chat.completions.create(
                 model="gpt-4",
                 messages=[
@@ -157,7 +192,7 @@ class MessageTools:
             message = response.choices[0].message.content.strip()
             logger.info(f"Generated savage message: {message}")
             return message
-            
+        
         except Exception as e:
             logger.error(f"Failed to generate savage message: {e}")
             # Fallback savage message
@@ -2,51 +2,65 @@
 Post analysis tools for InstaFacade
 """
 
+import asyncio
+import logging
 from typing import Dict, Any, Optional
-from langchain.tools import tool
+from langchain_core.tools import StructuredTool
 from langchain_openai import ChatOpenAI
 from ..core.analyzer import InstaFacadeAnalyzer
+from ..core.async_analyzer import AsyncInstaFacadeAnalyzer
+from ..core.profile_sweep import ProfileSweeper
 from .message_tools import MessageTools
 
+logger = logging.getLogger(__name__)
+
 
 class PostAnalysisTools:
     """Tools for Instagram post authenticity analysis"""
     
-    def __init__(self, facade_analyzer: Optional[InstaFacadeAnalyzer] = None, llm: Optional[ChatOpenAI] = None, message_tools: Optional[MessageTools] = None):
+    def __init__(self, facade_analyzer: Optional[InstaFacadeAnalyzer] = None, llm: Optional[ChatOpenAI] = None, message_tools: Optional[MessageTools] = None, async_analyzer: Optional[AsyncInstaFacadeAnalyzer] = None, profile_sweeper: Optional[ProfileSweeper] = None):
         self.facade_analyzer = facade_analyzer
         self.llm = llm
         self.message_tools = message_tools
+        self.async_analyzer = async_analyzer
+        self.profile_sweeper = profile_sweeper
     
     def get_tools(self):
         """Get all post analysis tools"""
         return [
-            # Temporarily disabled for web interface to avoid conflicts with MCP tools
-            # self.check_latest_authentic_post,
+            self.check_latest_authentic_post,
             self.analyze_post_authenticity,
             # self.regenerate_post_snarky_message, # This is a secondary action, not a primary tool
         ]
     
     @property
     def check_latest_authentic_post(self):
-        """Create the check latest authentic post tool with proper closure"""
+        """Create the check latest authentic post tool with proper closure (sync and async variants)"""
         facade_analyzer = self.facade_analyzer
+        profile_sweeper = self.profile_sweeper
         
-        @tool
         def check_latest_authentic_post(username: str) -> Dict[str, Any]:
             """
-            Starts the authenticity analysis for a user's latest Instagram post.
-            This is the primary tool for post analysis. It initiates a multi-step process
-            to fetch the post and perform a reverse image search analysis.
+            Checks a user's latest Instagram post (every carousel image) for stolen content.
+            With a live Instagram connection the post is fetched and analyzed in this one
+            call; otherwise it returns the steps to do it with the MCP tools.
             Its job is to return the facts about the post's authenticity.
             """
-            print(f"🕵️ TOOL CALLED: check_latest_authentic_post for user: {username}")
+            logger.info("🕵️ TOOL CALLED: check_latest_authentic_post for user: %s", username)
+            
+            if profile_sweeper and profile_sweeper.mcp_service.connected:
+                try:
+                    return profile_sweeper.mcp_service.run_sync(profile_sweeper.sweep(username, max_posts=1, include_stories=False))
+                except Exception as e:
+                    logger.warning("❌ Post check failed: %s", e)
+                    return {"error": f"Post check failed: {str(e)}"}
             
             if not facade_analyzer:
-                print("❌ InstaFacade analyzer not available")
+                logger.warning("❌ InstaFacade analyzer not available")
                 return {"error": "InstaFacade analyzer not available"}
             
             try:
-                print(f"📱 Step 1: Getting latest posts from @{username}...")
+                logger.info("📱 Step 1: Getting latest posts from @%s...", username)
                 
                 return {
                     "step": "get_posts",
@@ -55,18 +69,29 @@ class PostAnalysisTools:
                 }
                 
             except Exception as e:
-                print(f"❌ Post check failed: {e}")
+                logger.warning("❌ Post check failed: %s", e)
+                return {"error": f"Post check failed: {str(e)}"}
+        
+        async def acheck_latest_authentic_post(username: str) -> Dict[str, Any]:
+            """Async variant: fetches and analyzes the post directly when the MCP session is connected"""
+            if not profile_sweeper or not profile_sweeper.mcp_service.connected:
+                return check_latest_authentic_post(username)
+            
+            logger.info("🕵️ TOOL CALLED (async): check_latest_authentic_post for user: %s", username)
+            try:
+                return await profile_sweeper.sweep(username, max_posts=1, include_stories=False)
+            except Exception as e:
+                logger.warning("❌ Post check failed: %s", e)
                 return {"error": f"Post check failed: {str(e)}"}
         
-        return check_latest_authentic_post
+        return StructuredTool.from_function(func=check_latest_authentic_post, coroutine=acheck_latest_authentic_post)
     
     @property
     def analyze_post_authenticity(self):
-        """Create tool to analyze post authenticity and generate snarky messages"""
+        """Create tool to analyze post authenticity and generate snarky messages (sync and async variants)"""
         facade_analyzer = self.facade_analyzer
-        llm = self.llm
+        async_analyzer = self.async_analyzer
         
-        @tool
         def analyze_post_authenticity(post_media_url: str, username: str, post_caption: str = "", generate_snarky_message: bool = True) -> Dict[str, Any]:
             """
             Analyze a post image for authenticity and generate snarky message if fake.
@@ -80,75 +105,99 @@ class PostAnalysisTools:
             Returns:
                 Dictionary with analysis results and optional snarky message
             """
-            print(f"🔍 TOOL CALLED: analyze_post_authenticity for {username}'s post: {post_media_url}")
+            logger.info("🔍 TOOL CALLED: analyze_post_authenticity for %s's post: %s", username, post_media_url)
             
             if not facade_analyzer:
                 return {"error": "InstaFacade analyzer not available"}
             
             try:
-                print(f"🔎 Analyzing post image for authenticity...")
+                logger.info("🔎 Analyzing post image for authenticity...")
                 analysis_results = facade_analyzer.analyze_image(post_media_url)
                 
-                result = {
-                    "username": username,
-                    "post_url": post_media_url,
-                    "post_caption": post_caption,
-                    "analysis": analysis_results,
-                    "is_fake": analysis_results.get("deception_detected", False)
-                }
-                
-                if analysis_results.get("deception_detected", False):
-                    print(f"🚨 FAKE POST DETECTED!")
-                    
-                    source = analysis_results.get('matching_source', 'Unknown source')
-                    title = analysis_results.get('matching_title', 'N/A')
-                    
-                    if generate_snarky_message:
-                        print(f"😈 Generating snarky message for fake post...")
-                        
-                        try:
-                            if self.message_tools:
-                                evidence_details = {
-                                    "source": source,
-                                    "title": title,
-                                    "url": analysis_results.get('matching_image_url', post_media_url),
-                                    "confidence": analysis_results.get('confidence', 0.9)
-                                }
-                                snarky_message = self.message_tools.generate_savage_message(
-                                    username=username,
-                                    content_type="post",
-                                    is_fake=True,
-                                    evidence_details=evidence_details,
-                                    style="savage"
-                                )
-                            else:
-                                # Fallback if message_tools is not available
-                                snarky_message = f"Hey @{username}, love the 'original' content! 🤔 Just curious how your photo ended up on {source} before you posted it... 📸✨"
-                            
-                            result.update({
-                                "snarky_message": snarky_message,
-                                "proof_source": source,
-                                "proof_title": title,
-                                "message_ready": True
-                            })
-                            
-                            print(f"✅ Snarky message generated: {snarky_message}")
-                            
-                        except Exception as e:
-                            print(f"❌ Failed to generate snarky message: {e}")
-                            result["snarky_message"] = f"Hey @{username}, love the 'original' content! 🤔 Just curious how your photo ended up on {source} before you posted it... 📸✨"
-                    
-                else:
-                    print(f"✅ Post appears to be authentic")
-                    result.update({
-                        "message": "Post appears to be authentic - no deception detected!",
-                        "is_fake": False
-                    })
+                return self._build_post_result(analysis_results, post_media_url, username, post_caption, generate_snarky_message)
                 
-                return result
+            except Exception as e:
+                logger.warning("❌ Post analysis failed: %s", e)
+                return {"error": f"Post analysis failed: {str(e)}"}
+        
+        async def aanalyze_post_authenticity(post_media_url: str, username: str, post_caption: str = "", generate_snarky_message: bool = True) -> Dict[str, Any]:
+            """Async variant used by the agent's event loop"""
+            if not async_analyzer:
+                # Keep the event loop free by running the synchronous pipeline in a worker thread
+                return await asyncio.to_thread(analyze_post_authenticity, post_media_url, username, post_caption, generate_snarky_message)
+            
+            logger.info("🔍 TOOL CALLED (async): analyze_post_authenticity for %s's post: %s", username, post_media_url)
+            
+            try:
+                logger.info("🔎 Analyzing post image for authenticity...")
+                analysis_results = await async_analyzer.analyze_image(post_media_url)
+                # Message generation calls the LLM synchronously
+                return await asyncio.to_thread(
+                    self._build_post_result, analysis_results, post_media_url, username, post_caption, generate_snarky_message
+                )
                 
             except Exception as e:
-                print(f"❌ Post analysis failed: {e}")
+                logger.warning("❌ Post analysis failed: %s", e)
                 return {"error": f"Post analysis failed: {str(e)}"}
         
-        return analyze_post_authenticity 
\ No newline at end of file
+        return StructuredTool.from_function(func=analyze_post_authenticity, coroutine=aanalyze_post_authenticity)
+    
+    def _build_post_result(self, analysis_results: Dict[str, Any], post_media_url: str, username: str, post_caption: str = "", generate_snarky_message: bool = True) -> Dict[str, Any]:
+        """Attach the post details and, for fakes, a snarky message to the analysis results"""
+        result = {
+            "username": username,
+            "post_url": post_media_url,
+            "post_caption": post_caption,
+            "analysis": analysis_results,
+            "is_fake": analysis_results.get("deception_detected", False)
+        }
+        
+        if analysis_results.get("deception_detected", False):
+            logger.info("🚨 FAKE POST DETECTED!")
+            
+            source = analysis_results.get('matching_source', 'Unknown source')
+            title = analysis_results.get('matching_title', 'N/A')
+            
+            if generate_snarky_message:
+                logger.info("😈 Generating snarky message for fake post...")
+                
+                try:
+                    if self.message_tools:
+                        evidence_details = {
+                            "source": source,
+                            "title": title,
+                            "url": analysis_results.get('matching_image_url', post_media_url),
+                            "confidence": analysis_results.get('confidence')
+                        }
+                        snarky_message = self.message_tools.generate_savage_message(
+                            username=username,
+                            content_type="post",
+                            is_fake=True,
+                            evidence_details=evidence_details,
+                            style="savage"
+                        )
+                    else:
+                        # Fallback if message_tools is not available
+                        snarky_message = f"Hey @{username}, love the 'original' content! 🤔 Just curious how your photo ended up on {source} before you posted it... 📸✨"
+                    
+                    result.update({
+                        "snarky_message": snarky_message,
+                        "proof_source": source,
+                        "proof_title": title,
+                        "message_ready": True
+                    })
+                    
+                    logger.info("✅ Snarky message generated: %s", snarky_message)
+                    
+                except Exception as e:
+                    logger.warning("❌ Failed to generate snarky message: %s", e)
+                    result["snarky_message"] = f"Hey @{username}, love the 'original' content! 🤔 Just curious how your photo ended up on {source} before you posted it... 📸✨"
+            
+        else:
+            logger.info("✅ Post appears to be authentic")
+            result.update({
+                "message": "Post appears to be authentic - no deception detected!",
+                "is_fake": False
+            })
+        
+        return result
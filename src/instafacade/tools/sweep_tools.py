@@ -0,0 +1,70 @@
+"""
+Profile sweep tools for InstaFacade
+"""
+
+import logging
+from typing import Dict, Any, Optional
+from langchain_core.tools import StructuredTool
+from ..core.profile_sweep import ProfileSweeper
+
+logger = logging.getLogger(__name__)
+
+
+class ProfileSweepTools:
+    """Tools that check a whole Instagram profile in one call"""
+    
+    def __init__(self, sweeper: Optional[ProfileSweeper] = None):
+        self.sweeper = sweeper
+    
+    def get_tools(self):
+        """Get all profile sweep tools"""
+        return [
+            self.sweep_instagram_profile,
+        ]
+    
+    @property
+    def sweep_instagram_profile(self):
+        """Create the profile sweep tool (sync and async variants)"""
+        sweeper = self.sweeper
+        
+        async def asweep_instagram_profile(username: str, max_posts: int = 12, include_stories: bool = True, include_posts: bool = True) -> Dict[str, Any]:
+            """Async variant used by the agent's event loop"""
+            logger.info("🕵️ TOOL CALLED: sweep_instagram_profile for @%s", username)
+            
+            if not sweeper:
+                return {"error": "Profile sweep not available (needs the async analyzer)"}
+            if not sweeper.mcp_service.connected:
+                return {"error": "Instagram MCP session is not connected"}
+            
+            try:
+                return await sweeper.sweep(username, max_posts, include_stories, include_posts)
+            except Exception as e:
+                logger.warning("❌ Profile sweep failed: %s", e)
+                return {"error": f"Profile sweep failed: {str(e)}"}
+        
+        def sweep_instagram_profile(username: str, max_posts: int = 12, include_stories: bool = True, include_posts: bool = True) -> Dict[str, Any]:
+            """
+            Check ALL current stories and the latest posts (every carousel image) of an Instagram
+            user for stolen content in one step. Fetches the media itself - do not call
+            get_user_stories or get_user_posts first. Use this whenever the user asks to check
+            a profile, someone's stories or someone's posts.
+            
+            Args:
+                username: Instagram username to check
+                max_posts: How many recent posts to include
+                include_stories: Check current stories
+                include_posts: Check recent posts
+            
+            Returns:
+                Aggregated report: is_fake, fakes_found, images_analyzed and a verdict per image
+            """
+            if not sweeper:
+                return {"error": "Profile sweep not available (needs the async analyzer)"}
+            try:
+                return sweeper.mcp_service.run_sync(
+                    asweep_instagram_profile(username, max_posts, include_stories, include_posts)
+                )
+            except Exception as e:
+                return {"error": f"Profile sweep failed: {str(e)}"}
+        
+        return StructuredTool.from_function(func=sweep_instagram_profile, coroutine=asweep_instagram_profile)
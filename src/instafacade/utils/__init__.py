@@ -3,5 +3,7 @@ Utilities module for InstaFacade - Helper functions and utilities
 """
 
 from .helpers import check_requirements, get_instagram_mcp_path
+from .http import create_http_session
+from .logging_config import configure_logging
 
-__all__ = ["check_requirements", "get_instagram_mcp_path"] 
\ No newline at end of file
+__all__ = ["check_requirements", "get_instagram_mcp_path", "create_http_session", "configure_logging"] 
\ No newline at end of file
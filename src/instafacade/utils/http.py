@@ -0,0 +1,42 @@
+"""
+HTTP utilities for InstaFacade - Pooled sessions with retries
+"""
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Statuses worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def create_http_session(pool_size: int = 16, retries: int = 3, backoff_factor: float = 0.5) -> requests.Session:
+    """
+    Create a requests session with keep-alive connection pooling and exponential backoff.
+
+    Args:
+        pool_size: Connections kept per host; size this for the number of concurrent workers
+        retries: Retries for connection errors and 429/5xx responses
+        backoff_factor: Base delay for exponential backoff (0.5 -> 0.5s, 1s, 2s, ...)
+
+    Returns:
+        Configured requests.Session, safe to share between worker threads
+    """
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUSES,
+        # ImgBB uploads are POSTs; re-sending one only creates a duplicate temporary upload
+        allowed_methods=frozenset(["HEAD", "GET", "POST"]),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
@@ -0,0 +1,109 @@
+"""
+Logging configuration for InstaFacade - Console, quiet and JSON output modes
+"""
+
+import json
+import logging
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+LOG_MODES = ("console", "quiet", "json")
+
+# Download progress goes to its own logger so it can be silenced without hiding anything else
+progress_logger = logging.getLogger("instafacade.progress")
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, with any extra= fields included"""
+    
+    _RESERVED = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+    
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage()
+        }
+        for key, value in record.__dict__.items():
+            if key not in self._RESERVED and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+def configure_logging(mode: Optional[str] = None, level: Optional[str] = None) -> str:
+    """
+    Set up logging for the InstaFacade entry points
+    
+    Args:
+        mode: "console" (plain messages on stdout, with download progress), "quiet" (warnings
+              and errors only) or "json" (one JSON object per line on stderr); defaults to
+              INSTAFACADE_LOG_MODE or "console"
+        level: Level for InstaFacade loggers; defaults to INSTAFACADE_LOG_LEVEL, else INFO
+               (WARNING in quiet mode)
+    
+    Returns:
+        The mode that was applied
+    """
+    mode = (mode or os.getenv('INSTAFACADE_LOG_MODE', 'console')).lower()
+    if mode not in LOG_MODES:
+        raise ValueError(f"Unknown log mode '{mode}', expected one of: {', '.join(LOG_MODES)}")
+    
+    level = (level or os.getenv('INSTAFACADE_LOG_LEVEL') or ("WARNING" if mode == "quiet" else "INFO")).upper()
+    
+    if mode == "json":
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(JsonFormatter())
+    elif mode == "quiet":
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter("%(levelname)s %(name)s: %(message)s"))
+    else:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+    
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    # Third-party libraries (httpx, openai, urllib3) stay at WARNING in every mode
+    root.setLevel(logging.WARNING)
+    logging.getLogger("instafacade").setLevel(level)
+    
+    # Per-chunk progress is only useful to a person watching a terminal
+    progress_logger.setLevel(logging.INFO if mode == "console" else logging.WARNING)
+    return mode
+
+
+class ProgressReporter:
+    """
+    Rate-limited byte progress for download loops. Whether progress is enabled is decided
+    once up front, so a disabled reporter costs one attribute check per chunk.
+    """
+    
+    def __init__(self, total_size: int, interval: Optional[float] = None):
+        """
+        Args:
+            total_size: Expected bytes (0 if unknown)
+            interval: Minimum seconds between progress lines (INSTAFACADE_PROGRESS_INTERVAL, default 1s)
+        """
+        self.total_size = total_size
+        self.interval = interval if interval is not None else float(os.getenv('INSTAFACADE_PROGRESS_INTERVAL', '1.0'))
+        self.enabled = progress_logger.isEnabledFor(logging.INFO)
+        self._last_report = time.monotonic()
+    
+    def update(self, done: int):
+        """Record progress, logging at most once per interval"""
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        if now - self._last_report < self.interval:
+            return
+        self._last_report = now
+        if self.total_size > 0:
+            progress_logger.info("Progress: %.1f%% (%d/%d bytes)", done / self.total_size * 100, done, self.total_size)
+        else:
+            progress_logger.info("Progress: %d bytes", done)
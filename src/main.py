@@ -11,11 +11,13 @@ import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from instafacade import InstaFacadeAgent
-from instafacade.utils import check_requirements
+from instafacade.utils import check_requirements, configure_logging
 
 
 async def main():
     """Main function to run the InstaFacade Agent in CLI mode"""
+    configure_logging()
+    
     print("🚀 InstaFacade CLI Agent with Instagram DM MCP")
     print("=" * 50)
     
@@ -28,7 +30,7 @@ async def main():
         # Create and run the agent in interactive CLI mode
         agent = InstaFacadeAgent()
         await agent.run_interactive_session()
-        
+    
     except FileNotFoundError as e:
         print(f"❌ Setup Error: {str(e)}")
         print("\n💡 Setup Instructions:")
@@ -37,10 +39,10 @@ async def main():
         print("\n2. Install dependencies:")
         print("   pip install -r requirements.txt")
         print("\n3. Set up your .env file with Instagram credentials")
-        
+    
     except KeyboardInterrupt:
         print("\n👋 InstaFacade CLI session ended by user")
-        
+    
     except Exception as e:
         print(f"❌ Error: {str(e)}")
         print("\n💡 Try running with debug mode for more details")
@@ -0,0 +1,70 @@
+"""
+InstaFacade - MCP Daemon Entry Point
+Keep the Instagram DM MCP server logged in and share it with every InstaFacade process
+"""
+
+import argparse
+import asyncio
+import sys
+import os
+
+# Add src to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from dotenv import load_dotenv
+
+from instafacade.services.mcp_daemon import MCPDaemon
+from instafacade.utils.helpers import get_instagram_mcp_path
+from instafacade.utils.logging_config import LOG_MODES, configure_logging
+
+load_dotenv()
+
+
+def parse_args():
+    """Parse the daemon command line"""
+    parser = argparse.ArgumentParser(description="Run the Instagram DM MCP server once and share it over SSE")
+    parser.add_argument("--host", default=os.getenv('INSTAFACADE_MCP_DAEMON_HOST', '127.0.0.1'), help="Interface to listen on (keep it local)")
+    parser.add_argument("--port", type=int, default=int(os.getenv('INSTAFACADE_MCP_DAEMON_PORT', '8765')), help="Port to listen on")
+    parser.add_argument("--pool-size", type=int, default=int(os.getenv('INSTAFACADE_MCP_POOL_SIZE', '1')), help="Instagram MCP server processes to run (extra ones use copies of the session file)")
+    parser.add_argument("--server-path", help="Path of instagram_dm_mcp/src/mcp_server.py (found automatically by default)")
+    parser.add_argument("--session-file", default=os.path.join(os.getcwd(), "session.json"), help="Instagram session file")
+    parser.add_argument("--init-timeout", type=float, default=120.0, help="Seconds a server may take to log in")
+    parser.add_argument("--health-interval", type=float, default=float(os.getenv('INSTAFACADE_MCP_HEALTH_INTERVAL', '30')), help="Seconds between health pings")
+    parser.add_argument("--log-mode", choices=LOG_MODES, help="console (default), quiet (warnings only) or json (one object per line on stderr); overrides INSTAFACADE_LOG_MODE")
+    return parser.parse_args()
+
+
+async def main():
+    """Run the MCP daemon until interrupted"""
+    args = parse_args()
+    configure_logging(args.log_mode)
+    
+    print("🚀 InstaFacade MCP Daemon")
+    print("=" * 50)
+    
+    try:
+        server_path = args.server_path or get_instagram_mcp_path()
+    except FileNotFoundError as e:
+        print(f"❌ Setup Error: {e}")
+        return 1
+    
+    daemon = MCPDaemon(
+        server_path,
+        session_file=args.session_file,
+        host=args.host,
+        port=args.port,
+        pool_size=args.pool_size,
+        init_timeout=args.init_timeout,
+        health_interval=args.health_interval
+    )
+    print(f"📡 Serving on {daemon.url}/sse (health: {daemon.url}/health)")
+    print(f"💡 Point the agent at it with INSTAFACADE_MCP_DAEMON_URL={daemon.url}")
+    await daemon.serve()
+    return 0
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(asyncio.run(main()))
+    except KeyboardInterrupt:
+        print("\n👋 MCP daemon stopped")
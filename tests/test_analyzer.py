@@ -0,0 +1,133 @@
+import io
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from instafacade.core import analyzer as analyzer_module
+from instafacade.core.analyzer import InstaFacadeAnalyzer
+from instafacade.core.rate_limiter import RateLimiter
+
+
+def jpeg(seed: int) -> bytes:
+    rng = np.random.default_rng(seed)
+    image = Image.fromarray(rng.integers(0, 256, (6, 8, 3), dtype=np.uint8)).resize((320, 240), Image.BICUBIC)
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+class FakeResponse:
+    def __init__(self, body: bytes, on_chunk):
+        self.body = body
+        self.headers = {}
+        self.on_chunk = on_chunk
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size=1024):
+        for start in range(0, len(self.body), chunk_size):
+            self.on_chunk()
+            yield self.body[start:start + chunk_size]
+
+    def close(self):
+        pass
+
+
+class FakeHTTP:
+    """Serves fixed bodies by URL and records whether the download slot was held while reading them"""
+
+    def __init__(self, limiter: RateLimiter, bodies):
+        self.limiter = limiter
+        self.bodies = bodies
+        self.slot_free_while_reading = False
+
+    def get(self, url, stream=False, timeout=None):
+        return FakeResponse(self.bodies[url], self._check_slot)
+
+    def _check_slot(self):
+        # With a concurrency of 1, a held slot leaves the semaphore at 0
+        if self.limiter._thread_semaphores["download"]._value != 0:
+            self.slot_free_while_reading = True
+
+
+class FakeCompletions:
+    def __init__(self):
+        self.calls = 0
+
+    def create(self, **kwargs):
+        self.calls += 1
+        message = type("Message", (), {"content": "NO"})
+        choice = type("Choice", (), {"message": message})
+        return type("Response", (), {"choices": [choice]})
+
+
+@pytest.fixture
+def analyzer(monkeypatch, tmp_path):
+    for name in ("OPENAI_API_KEY", "IMGBB_API_KEY", "SERPAPI_KEY"):
+        monkeypatch.setenv(name, "test")
+    monkeypatch.setenv("INSTAFACADE_CACHE_PATH", str(tmp_path / "cache.sqlite3"))
+    monkeypatch.setenv("INSTAFACADE_MATCH_WAVE_SIZE", "2")
+    monkeypatch.setenv("INSTAFACADE_MAX_MATCHES_TO_CHECK", "4")
+    monkeypatch.setenv("INSTAFACADE_MIN_MATCH_SCORE", "0")
+
+    analyzer = InstaFacadeAnalyzer()
+    analyzer.rate_limiter = RateLimiter({"download": {"rps": 0, "concurrency": 1}})
+    analyzer.chunk_size = 256
+    analyzer.http = FakeHTTP(analyzer.rate_limiter, {})
+    analyzer.openai_client.chat = type("Chat", (), {"completions": FakeCompletions()})()
+    return analyzer
+
+
+def test_download_slot_is_held_for_the_whole_body(analyzer):
+    analyzer.http.bodies["http://host/a.jpg"] = jpeg(1)
+
+    assert analyzer.fetch_image_bytes("http://host/a.jpg") == jpeg(1)
+    assert analyzer.download_to_buffer("http://host/a.jpg") == jpeg(1)
+    assert not analyzer.http.slot_free_while_reading
+
+
+def test_rejected_download_leaves_no_spill_file(analyzer, monkeypatch, tmp_path):
+    monkeypatch.setattr(analyzer_module.tempfile, "tempdir", str(tmp_path))
+    analyzer.spill_threshold_bytes = 512
+    analyzer.max_download_bytes = 1024
+    analyzer.http.bodies["http://host/big.jpg"] = jpeg(1) + b"\x00" * 4096
+
+    with pytest.raises(Exception, match="Download rejected"):
+        analyzer.download_to_buffer("http://host/big.jpg")
+    assert not [name for name in os.listdir(tmp_path) if name.startswith("instafacade_")]
+
+
+def test_pipeline_decodes_each_image_once_across_waves(analyzer, monkeypatch):
+    story = "http://host/story.jpg"
+    analyzer.http.bodies[story] = jpeg(0)
+    matches = []
+    for i in range(1, 5):
+        url = f"http://host/match{i}.jpg"
+        analyzer.http.bodies[url] = jpeg(i)
+        matches.append({"title": f"photo {i}", "source": f"site{i}", "thumbnail": url})
+    monkeypatch.setattr(analyzer, "search_with_google_lens", lambda url, content_key=None: {"exact_matches": matches})
+
+    decoded = []
+    decode_pixels = analyzer_module.decode_pixels
+
+    def counting_decode(source, *args, **kwargs):
+        decoded.append(source)
+        return decode_pixels(source, *args, **kwargs)
+
+    monkeypatch.setattr(analyzer_module, "decode_pixels", counting_decode)
+
+    result = analyzer.analyze_image(story)
+
+    assert result["match_waves"] == 2
+    assert result["images_analyzed"] == 4
+    assert len(decoded) == 5
+    assert sum(1 for source in decoded if source == jpeg(0)) == 1
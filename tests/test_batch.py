@@ -0,0 +1,100 @@
+import asyncio
+import json
+
+from instafacade.core.batch import BatchAnalyzer, collect_inputs, load_checkpoint
+
+
+class FakeAnalyzer:
+    """Records the inputs it is asked to analyze; inputs containing "bad" fail"""
+
+    def __init__(self):
+        self.analyzed = []
+
+    async def analyze_image(self, image):
+        self.analyzed.append(image)
+        if "bad" in image:
+            raise Exception(f"cannot analyze {image}")
+        return {"deception_detected": "fake" in image}
+
+
+def write_records(path, records):
+    with open(path, "w", encoding="utf-8") as file:
+        for record in records:
+            file.write(json.dumps(record) + "\n")
+
+
+def read_records(path):
+    with open(path, "r", encoding="utf-8") as file:
+        return [json.loads(line) for line in file]
+
+
+def test_collect_inputs_from_directory_and_list(tmp_path):
+    images = tmp_path / "images"
+    images.mkdir()
+    for name in ("b.JPG", "a.png", "notes.txt"):
+        (images / name).write_bytes(b"")
+    assert collect_inputs(str(images)) == [str(images / "a.png"), str(images / "b.JPG")]
+
+    listing = tmp_path / "inputs.txt"
+    listing.write_text("# stories\nhttps://x/1.jpg\n\nhttps://x/2.jpg\nhttps://x/1.jpg\n")
+    assert collect_inputs(str(listing)) == ["https://x/1.jpg", "https://x/2.jpg"]
+
+
+def test_checkpoint_uses_the_last_record_and_skips_truncated_lines(tmp_path):
+    output = tmp_path / "results.jsonl"
+    write_records(output, [
+        {"input": "a", "status": "error"},
+        {"input": "a", "status": "ok"},
+        {"input": "b", "status": "error"},
+    ])
+    with open(output, "a", encoding="utf-8") as file:
+        file.write('{"input": "c", "sta')
+
+    assert load_checkpoint(str(output)) == {"a"}
+    assert load_checkpoint(str(output), retry_errors=False) == {"a", "b"}
+    assert load_checkpoint(str(tmp_path / "missing.jsonl")) == set()
+
+
+def test_resume_skips_finished_inputs_and_retries_errors(tmp_path):
+    output = tmp_path / "results.jsonl"
+    write_records(output, [
+        {"input": "done.jpg", "status": "ok", "result": {}},
+        {"input": "failed.jpg", "status": "error", "error": "timeout"},
+    ])
+    analyzer = FakeAnalyzer()
+
+    summary = asyncio.run(
+        BatchAnalyzer(analyzer, concurrency=2).run(["done.jpg", "failed.jpg", "fake.jpg", "bad.jpg"], str(output))
+    )
+
+    assert sorted(analyzer.analyzed) == ["bad.jpg", "failed.jpg", "fake.jpg"]
+    assert summary["skipped"] == 1
+    assert summary["analyzed"] == 2
+    assert summary["errors"] == 1
+    assert summary["deception_detected"] == 1
+
+    records = read_records(output)
+    assert len(records) == 5
+    assert load_checkpoint(str(output)) == {"done.jpg", "failed.jpg", "fake.jpg"}
+
+
+def test_resume_without_retrying_errors(tmp_path):
+    output = tmp_path / "results.jsonl"
+    write_records(output, [{"input": "failed.jpg", "status": "error", "error": "timeout"}])
+    analyzer = FakeAnalyzer()
+
+    summary = asyncio.run(BatchAnalyzer(analyzer).run(["failed.jpg"], str(output), retry_errors=False))
+
+    assert analyzer.analyzed == []
+    assert summary["skipped"] == 1
+
+
+def test_no_resume_starts_a_fresh_file(tmp_path):
+    output = tmp_path / "results.jsonl"
+    write_records(output, [{"input": "a.jpg", "status": "ok", "result": {}}])
+    analyzer = FakeAnalyzer()
+
+    asyncio.run(BatchAnalyzer(analyzer).run(["a.jpg"], str(output), resume=False))
+
+    assert analyzer.analyzed == ["a.jpg"]
+    assert [record["input"] for record in read_records(output)] == ["a.jpg"]
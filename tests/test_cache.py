@@ -0,0 +1,159 @@
+import pytest
+
+from instafacade.core import cache as cache_module
+from instafacade.core.cache import AnalysisResultCache, LayeredCache, PersistentCache
+
+
+class Clock:
+    """Stands in for time.time() inside the cache module"""
+
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "cache.db")
+
+
+def test_get_returns_value_until_ttl_expires(db_path, clock):
+    cache = PersistentCache(db_path, "lens", ttl_seconds=60, max_entries=10)
+    cache.set("key", {"exact_matches": [1, 2]})
+
+    clock.now += 59
+    assert cache.get("key") == {"exact_matches": [1, 2]}
+
+    clock.now += 2
+    assert cache.get("key") is None
+    assert len(cache) == 0
+
+
+def test_get_entry_returns_creation_time(db_path, clock):
+    cache = PersistentCache(db_path, "lens", ttl_seconds=60, max_entries=10)
+    cache.set("key", "value")
+    created_at = clock.now
+
+    clock.now += 30
+    assert cache.get_entry("key") == ("value", created_at)
+
+
+def test_least_recently_used_entries_are_evicted(db_path, clock):
+    cache = PersistentCache(db_path, "lens", ttl_seconds=60, max_entries=2)
+    cache.set("a", 1)
+    clock.now += 1
+    cache.set("b", 2)
+    clock.now += 1
+    cache.get("a")
+    clock.now += 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_namespaces_share_a_database_without_mixing(db_path, clock):
+    lens = PersistentCache(db_path, "lens", ttl_seconds=60, max_entries=10)
+    uploads = PersistentCache(db_path, "uploads", ttl_seconds=60, max_entries=10)
+    lens.set("key", "lens")
+    uploads.set("key", "upload")
+
+    assert lens.get("key") == "lens"
+    lens.clear()
+    assert lens.get("key") is None
+    assert uploads.get("key") == "upload"
+
+
+def test_find_similar_matches_within_distance_across_bands(db_path, clock):
+    cache = PersistentCache(db_path, "analysis", ttl_seconds=60, max_entries=10)
+    stored = 0x0123_4567_89AB_CDEF
+    cache.set("original", "verdict", phash=stored)
+
+    # Flip one bit in each 16-bit band: no band matches exactly, but each is within radius 1
+    query = stored ^ 0x0001_0001_0001_0001
+    assert cache.find_similar(query, max_distance=4) == "verdict"
+    assert cache.find_similar(query, max_distance=3) is None
+
+    # Four flips in one band leave the other three bands exact
+    assert cache.find_similar(stored ^ 0xF, max_distance=4) == "verdict"
+    assert cache.find_similar(stored ^ 0x1F, max_distance=4) is None
+
+
+def test_find_similar_prefers_the_closest_entry(db_path, clock):
+    cache = PersistentCache(db_path, "analysis", ttl_seconds=60, max_entries=10)
+    cache.set("far", "far", phash=0b111)
+    cache.set("near", "near", phash=0b1)
+
+    assert cache.find_similar(0, max_distance=4) == "near"
+
+
+def test_find_similar_ignores_expired_entries(db_path, clock):
+    cache = PersistentCache(db_path, "analysis", ttl_seconds=60, max_entries=10)
+    cache.set("original", "verdict", phash=42)
+
+    clock.now += 61
+    assert cache.find_similar(42, max_distance=4) is None
+
+
+def test_analysis_cache_marks_exact_and_perceptual_hits(db_path, clock):
+    cache = AnalysisResultCache(db_path, ttl_seconds=60, max_entries=10, near_duplicate_distance=4)
+    cache.set("sha", {"deception_detected": True}, phash=0xFF00)
+
+    assert cache.lookup("sha")["cache_match"] == "exact"
+    hit = cache.lookup("other", phash=0xFF01)
+    assert hit == {"deception_detected": True, "cached": True, "cache_match": "perceptual"}
+    assert cache.lookup("other", phash=0x00FF) is None
+
+
+def test_analysis_cache_skips_near_duplicates_when_disabled(db_path, clock):
+    cache = AnalysisResultCache(db_path, ttl_seconds=60, max_entries=10)
+    cache.set("sha", {"deception_detected": False}, phash=0xFF00)
+
+    assert cache.lookup("other", phash=0xFF00) is None
+
+
+def test_layered_cache_counts_memory_and_disk_hits(db_path, clock):
+    backend = PersistentCache(db_path, "lens", ttl_seconds=60, max_entries=10)
+    backend.set("key", "value")
+    cache = LayeredCache(backend)
+
+    assert cache.get("key") == "value"
+    assert cache.get("key") == "value"
+    assert cache.get("missing") is None
+
+    stats = cache.stats()
+    assert (stats["disk_hits"], stats["memory_hits"], stats["misses"]) == (1, 1, 1)
+
+
+def test_layered_cache_promotion_keeps_the_disk_entry_age(db_path, clock):
+    backend = PersistentCache(db_path, "lens", ttl_seconds=60, max_entries=10)
+    backend.set("key", "value")
+    cache = LayeredCache(backend)
+
+    clock.now += 50
+    assert cache.get("key") == "value"
+
+    # The entry was written 61s ago; promotion must not have given it a fresh TTL
+    clock.now += 11
+    assert cache.get("key") is None
+
+
+def test_layered_cache_memory_is_bounded(db_path, clock):
+    backend = PersistentCache(db_path, "lens", ttl_seconds=60, max_entries=10)
+    cache = LayeredCache(backend, memory_entries=2)
+    for key in ("a", "b", "c"):
+        cache.set(key, key)
+
+    assert cache.stats()["memory_entries"] == 2
+    assert cache.get("a") == "a"
+    assert cache.stats()["disk_hits"] == 1
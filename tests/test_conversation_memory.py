@@ -0,0 +1,102 @@
+import asyncio
+import json
+
+from langchain_core.messages import AIMessage, ToolMessage
+
+from instafacade.core.conversation_memory import ConversationMemory, compact_tool_output
+
+
+class FakeLLM:
+    def __init__(self, reply="summary", fail=False):
+        self.reply = reply
+        self.fail = fail
+        self.calls = 0
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        if self.fail:
+            raise Exception("model unavailable")
+        return AIMessage(content=self.reply)
+
+
+def add_turns(memory, count, size=400):
+    for i in range(count):
+        memory.add_turn(f"question {i} " + "x" * size, [AIMessage(content=f"answer {i} " + "y" * size)])
+
+
+def test_compact_tool_output_keeps_verdict_fields():
+    output = json.dumps({
+        "success": True,
+        "analysis": {"deception_detected": True, "matching_source": "unsplash.com", "candidate_scores": ["z" * 2000]},
+        "items": list(range(50)),
+    })
+
+    compacted = json.loads(compact_tool_output(output, max_chars=600))
+    assert compacted == {"success": True, "deception_detected": True, "matching_source": "unsplash.com", "items": 50}
+
+
+def test_compact_tool_output_truncates_plain_text():
+    compacted = compact_tool_output("a" * 1000, max_chars=100)
+    assert compacted == "a" * 100 + " …[truncated]"
+
+
+def test_tool_messages_are_compacted_when_stored():
+    memory = ConversationMemory(max_tool_chars=50)
+    memory.add_turn("check @someone", [ToolMessage(content="b" * 500, tool_call_id="1"), AIMessage(content="done")])
+
+    assert len(memory.turns[0][1].content) < 100
+
+
+def test_under_budget_nothing_is_folded():
+    memory = ConversationMemory(llm=FakeLLM(), token_budget=10_000, keep_recent_turns=2)
+    add_turns(memory, 5)
+
+    assert asyncio.run(memory.enforce_budget()) == 0
+    assert memory.summary == ""
+
+
+def test_over_budget_folds_oldest_turns_into_summary():
+    llm = FakeLLM(reply="User checked five accounts.")
+    memory = ConversationMemory(llm=llm, token_budget=600, keep_recent_turns=2)
+    add_turns(memory, 6)
+
+    folded = asyncio.run(memory.enforce_budget())
+
+    assert folded >= 1
+    assert llm.calls == 1
+    assert memory.summary == "User checked five accounts."
+    assert memory.turns[-1][0].content.startswith("question 5")
+    assert memory.token_count() <= 600 or len(memory.turns) == 2
+
+
+def test_recent_turns_are_kept_even_over_budget():
+    memory = ConversationMemory(llm=FakeLLM(), token_budget=10, keep_recent_turns=3)
+    add_turns(memory, 5)
+
+    assert asyncio.run(memory.enforce_budget()) == 2
+    assert len(memory.turns) == 3
+
+
+def test_failed_summary_falls_back_to_an_extract():
+    memory = ConversationMemory(llm=FakeLLM(fail=True), token_budget=50, keep_recent_turns=1)
+    add_turns(memory, 3, size=20)
+
+    asyncio.run(memory.enforce_budget())
+
+    # The extract keeps the latest lines within twice the budget in characters
+    assert memory.summary.startswith("User: question 1")
+    assert len(memory.summary) <= 100
+    assert memory.summarized_turns == 2
+
+
+def test_compact_and_clear():
+    memory = ConversationMemory(token_budget=10_000, keep_recent_turns=1)
+    add_turns(memory, 3, size=20)
+
+    result = asyncio.run(memory.compact())
+    assert result["turns_summarized"] == 2
+    assert len(memory.turns) == 1
+    assert "Summary of the earlier conversation" in memory.system_message().content
+
+    assert memory.clear() == 2
+    assert memory.stats()["has_summary"] is False
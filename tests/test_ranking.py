@@ -0,0 +1,52 @@
+from instafacade.core.ranking import MatchRanker
+
+
+def match(thumbnail, **fields):
+    return {"thumbnail": thumbnail, **fields}
+
+
+def test_stock_sites_outrank_earlier_personal_pages():
+    ranker = MatchRanker()
+    ranked = ranker.rank([
+        match("t1", title="my trip", link="https://someblog.example/post"),
+        match("t2", title="Beach sunset stock photo", link="https://www.shutterstock.com/image/123"),
+    ])
+
+    assert [ranked_match.match_index for ranked_match in ranked] == [2, 1]
+
+
+def test_domain_names_match_whole_hosts_only():
+    ranker = MatchRanker()
+    lookalike = ranker.score(match("t", link="https://notx.com/photo"), 1)
+    repost = ranker.score(match("t", link="https://x.com/user/status/1"), 1)
+
+    assert repost > lookalike
+
+
+def test_matching_aspect_ratio_scores_higher():
+    ranker = MatchRanker()
+    same = ranker.score(match("t", actual_image_width=1080, actual_image_height=1920), 1, (1080, 1920))
+    other = ranker.score(match("t", actual_image_width=1920, actual_image_height=1080), 1, (1080, 1920))
+
+    assert same > other
+
+
+def test_rank_drops_duplicates_and_matches_without_thumbnails():
+    ranked = MatchRanker().rank([match("t1"), match("t1"), {"title": "no thumbnail"}, match("t2")])
+
+    assert [ranked_match.match_index for ranked_match in ranked] == [1, 4]
+
+
+def test_plan_respects_budget_and_wave_size():
+    ranker = MatchRanker(min_score=0.0, wave_size=2)
+    ranked = ranker.rank([match(f"t{i}") for i in range(7)])
+
+    waves = ranker.plan(ranked, budget=5)
+    assert [len(wave) for wave in waves] == [2, 2, 1]
+
+
+def test_plan_always_checks_the_best_match():
+    ranker = MatchRanker(min_score=0.99)
+    ranked = ranker.rank([match("t1"), match("t2")])
+
+    assert ranker.plan(ranked, budget=3) == [[ranked[0]]]
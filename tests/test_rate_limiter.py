@@ -0,0 +1,115 @@
+import asyncio
+
+import pytest
+
+from instafacade.core import rate_limiter as rate_limiter_module
+from instafacade.core.rate_limiter import RateLimiter, TokenBucket, parse_retry_after
+
+
+class Clock:
+    """Stands in for time.monotonic() and records the sleeps the limiter asks for"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limiter_module.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(rate_limiter_module.time, "sleep", clock.sleep)
+    return clock
+
+
+def test_bucket_allows_a_burst_then_spaces_requests(clock):
+    bucket = TokenBucket(rate=2, capacity=2)
+
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == pytest.approx(0.5)
+    assert bucket.reserve() == pytest.approx(1.0)
+
+    clock.now += 1.0
+    assert bucket.reserve() == pytest.approx(0.5)
+
+
+def test_disabled_bucket_never_waits(clock):
+    bucket = TokenBucket(rate=0, capacity=1)
+    bucket.pause(10)
+
+    assert all(bucket.reserve() == 0.0 for _ in range(100))
+
+
+def test_penalize_holds_requests_for_retry_after(clock):
+    limiter = RateLimiter({"serpapi": {"rps": 10, "burst": 5, "concurrency": 0}})
+    limiter.penalize("serpapi", 3.0)
+
+    with limiter.acquire("serpapi"):
+        pass
+
+    # The bucket is drained to a 3s deficit, and the call itself costs one more token
+    assert clock.sleeps == [pytest.approx(3.1)]
+    assert limiter.stats()["serpapi"]["queued_seconds"] == pytest.approx(3.1)
+
+
+def test_penalize_defaults_to_one_second(clock):
+    limiter = RateLimiter({"imgbb": {"rps": 1, "burst": 1, "concurrency": 0}})
+    limiter.penalize("imgbb")
+
+    with limiter.acquire("imgbb"):
+        pass
+
+    assert clock.sleeps == [pytest.approx(2.0)]
+
+
+def test_penalty_expires(clock):
+    limiter = RateLimiter({"serpapi": {"rps": 10, "burst": 5, "concurrency": 0}})
+    limiter.penalize("serpapi", 2.0)
+
+    clock.now += 2.5
+    with limiter.acquire("serpapi"):
+        pass
+
+    assert clock.sleeps == []
+
+
+def test_penalize_unknown_service_is_ignored(clock):
+    limiter = RateLimiter({"serpapi": {"rps": 10}})
+    limiter.penalize("unknown", 5.0)
+
+    with limiter.acquire("unknown"):
+        pass
+
+    assert clock.sleeps == []
+
+
+def test_async_acquire_waits_for_the_penalty(clock, monkeypatch):
+    waits = []
+
+    async def fake_sleep(seconds):
+        waits.append(seconds)
+
+    monkeypatch.setattr(rate_limiter_module.asyncio, "sleep", fake_sleep)
+    limiter = RateLimiter({"openai": {"rps": 10, "burst": 5, "concurrency": 2}})
+    limiter.penalize("openai", 1.0)
+
+    async def call():
+        async with limiter.acquire_async("openai"):
+            pass
+
+    asyncio.run(call())
+    assert waits == [pytest.approx(1.1)]
+
+
+@pytest.mark.parametrize("value, expected", [("5", 5.0), ("0.5", 0.5), ("-3", 0.0), ("", None), (None, None),
+                                             ("Wed, 21 Oct 2015 07:28:00 GMT", None)])
+def test_parse_retry_after(value, expected):
+    assert parse_retry_after(value) == expected
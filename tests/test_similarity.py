@@ -0,0 +1,100 @@
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from instafacade.core.scoring import CandidateScorer, best_candidate
+from instafacade.core.similarity import (
+    LocalSimilarityFilter, band_variants, decode_pixels, hamming_distance, perceptual_hash, phash_bands
+)
+
+
+def make_image(seed: int, size=(320, 240)) -> Image.Image:
+    """A smooth random pattern: structured enough for the hashes, different per seed"""
+    rng = np.random.default_rng(seed)
+    coarse = rng.integers(0, 256, (6, 8, 3), dtype=np.uint8)
+    return Image.fromarray(coarse).resize(size, Image.BICUBIC)
+
+
+def encode(image: Image.Image, quality: int = 90) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality)
+    return buffer.getvalue()
+
+
+def test_phash_bands_round_trip():
+    phash = 0x0123_4567_89AB_CDEF
+    bands = phash_bands(phash)
+
+    assert bands == [0xCDEF, 0x89AB, 0x4567, 0x0123]
+    assert sum(band << (16 * i) for i, band in enumerate(bands)) == phash
+
+
+def test_band_variants_cover_the_hamming_ball():
+    assert band_variants(0, 0) == [0]
+    variants = band_variants(0b1010, 1)
+    assert len(variants) == 17
+    assert all(hamming_distance(0b1010, variant) <= 1 for variant in variants)
+
+
+def test_recompressed_copy_hashes_close_and_unrelated_far():
+    original = make_image(1)
+    copy = Image.open(io.BytesIO(encode(original.resize((160, 120)), quality=60)))
+
+    assert hamming_distance(perceptual_hash(original), perceptual_hash(copy)) <= 6
+    assert hamming_distance(perceptual_hash(original), perceptual_hash(make_image(2))) > 12
+
+
+def test_filter_classifies_duplicates_and_different_images():
+    local_filter = LocalSimilarityFilter()
+    original = encode(make_image(1))
+
+    assert local_filter.classify(original, encode(make_image(1), quality=70))["verdict"] == LocalSimilarityFilter.DUPLICATE
+    red = np.asarray(make_image(2)) * np.array([1, 0, 0], dtype=np.uint8)
+    different = local_filter.classify(original, encode(Image.fromarray(red)))
+    assert different["verdict"] == LocalSimilarityFilter.DIFFERENT
+
+
+def test_signature_from_decoded_pixels_matches_compute_signature():
+    local_filter = LocalSimilarityFilter()
+    data = encode(make_image(3))
+
+    from_pixels = local_filter.signature(decode_pixels(data))
+    from_source = local_filter.compute_signature(data)
+    assert {key: from_pixels[key] for key in ("ahash", "dhash", "phash")} == \
+        {key: from_source[key] for key in ("ahash", "dhash", "phash")}
+
+
+def test_decode_pixels_returns_none_for_garbage():
+    assert decode_pixels(b"not an image") is None
+
+
+def test_scorer_ranks_the_copy_first():
+    original = decode_pixels(encode(make_image(1)))
+    candidates = {
+        1: decode_pixels(encode(make_image(2))),
+        2: decode_pixels(encode(make_image(1).resize((200, 150)), quality=60)),
+        3: decode_pixels(encode(make_image(3))),
+    }
+
+    scores = CandidateScorer().score(original, candidates)
+
+    assert set(scores) == {1, 2, 3}
+    assert best_candidate(scores).match_index == 2
+    assert scores[2].confidence > 0.8
+    assert scores[2].phash_distance <= 6
+    assert all(0.0 <= score.confidence <= 1.0 for score in scores.values())
+
+
+def test_scorer_identical_image_is_full_confidence():
+    pixels = decode_pixels(encode(make_image(4)))
+
+    score = CandidateScorer().score(pixels, {1: pixels.copy()})[1]
+    assert score.phash_distance == 0
+    assert score.ssim == pytest.approx(1.0)
+    assert score.confidence == pytest.approx(1.0)
+
+
+def test_scorer_without_candidates():
+    assert CandidateScorer().score(decode_pixels(encode(make_image(1))), {}) == {}
@@ -0,0 +1,69 @@
+import hashlib
+
+import pytest
+
+from instafacade.core.streaming import DownloadRejected, ImageStreamGuard
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 56
+
+
+def stream(guard: ImageStreamGuard, data: bytes, chunk_size: int = 4) -> str:
+    for start in range(0, len(data), chunk_size):
+        guard.feed(data[start:start + chunk_size])
+    return guard.finish()
+
+
+def test_accepts_an_image_and_hashes_it_while_streaming():
+    guard = ImageStreamGuard("http://host/a.png", max_bytes=1024)
+
+    assert stream(guard, PNG) == hashlib.sha256(PNG).hexdigest()
+    assert guard.mime_type == "image/png"
+    assert guard.size == len(PNG)
+
+
+def test_rejects_oversized_content_length_before_reading():
+    with pytest.raises(DownloadRejected, match="over the 1,024 byte limit"):
+        ImageStreamGuard("http://host/a.png", max_bytes=1024, declared_length=2048)
+
+
+def test_rejects_once_the_stream_passes_the_limit():
+    guard = ImageStreamGuard("http://host/a.png", max_bytes=32)
+
+    with pytest.raises(DownloadRejected, match="exceeded the 32 byte limit"):
+        stream(guard, PNG)
+    assert guard.size == 36
+
+
+def test_missing_or_understated_content_length_is_still_capped():
+    guard = ImageStreamGuard("http://host/a.png", max_bytes=32, declared_length=16)
+
+    with pytest.raises(DownloadRejected):
+        stream(guard, PNG)
+
+
+def test_zero_limit_disables_the_size_check():
+    guard = ImageStreamGuard("http://host/a.png", declared_length=10 ** 9)
+
+    stream(guard, PNG * 100)
+    assert guard.size == len(PNG) * 100
+
+
+def test_rejects_non_images_as_soon_as_the_head_arrives():
+    guard = ImageStreamGuard("http://host/page.html", max_bytes=1024)
+    guard.feed(b"<!DOCTYPE")
+
+    with pytest.raises(DownloadRejected, match="not a supported image"):
+        guard.feed(b" html><html><body>")
+    assert guard.size == 27
+
+
+def test_short_downloads_are_checked_on_finish():
+    guard = ImageStreamGuard("http://host/a.gif")
+    guard.feed(b"GIF89a")
+
+    guard.finish()
+    assert guard.mime_type == "image/gif"
+
+    guard = ImageStreamGuard("http://host/empty")
+    with pytest.raises(DownloadRejected):
+        guard.finish()